@@ -1,13 +1,19 @@
 import logging
 import asyncio
+import hashlib
 import inspect
+import json
 import subprocess
 import tempfile
 import os
+import math
+import shutil
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 
+import numpy as np
 from google.adk.tools import ToolContext
 from solace_agent_mesh.agent.utils.artifact_helpers import (
     save_artifact_with_metadata,
@@ -17,6 +23,386 @@ from solace_agent_mesh.agent.utils.context_helpers import get_original_session_i
 
 logger = logging.getLogger(__name__)
 
+# Default deadline for a single ImageMagick command, overridable via tool_config
+DEFAULT_OPERATION_TIMEOUT_SECONDS = 60.0
+
+
+def _operation_timeout(tool_config: Optional[Dict[str, Any]]) -> float:
+    """Return the deadline in seconds for one ImageMagick command under a tool config."""
+    current_tool_config = tool_config if tool_config is not None else {}
+    return current_tool_config.get("operation_timeout_seconds", DEFAULT_OPERATION_TIMEOUT_SECONDS)
+
+
+async def _run_imagemagick(
+    cmd: List[str],
+    tool_config: Optional[Dict[str, Any]],
+    log_identifier: str,
+    text: bool = True,
+) -> subprocess.CompletedProcess:
+    """
+    Run an ImageMagick command as a cancellable async subprocess with a deadline.
+
+    If the deadline expires or the calling task is cancelled, the process is
+    killed and reaped immediately so the caller's cleanup can remove its
+    temporary files without waiting for the command to finish.
+
+    Args:
+        cmd: Command and arguments
+        tool_config: Tool configuration; "operation_timeout_seconds" sets the deadline
+        log_identifier: Prefix for log messages
+        text: Decode stdout/stderr as text (default: True)
+
+    Returns:
+        CompletedProcess with captured stdout and stderr
+
+    Raises:
+        subprocess.CalledProcessError: If the command exits with a non-zero status
+        subprocess.TimeoutExpired: If the command exceeds the deadline
+    """
+    timeout = _operation_timeout(tool_config)
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        if isinstance(e, asyncio.TimeoutError):
+            logger.warning(f"{log_identifier} ImageMagick command exceeded {timeout}s deadline, killed")
+            raise subprocess.TimeoutExpired(cmd, timeout) from e
+        logger.info(f"{log_identifier} Operation cancelled, ImageMagick process killed")
+        raise
+
+    if text:
+        stdout = stdout.decode(errors="replace")
+        stderr = stderr.decode(errors="replace")
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+# In-flight operations keyed by tool, source artifact version and normalized parameters
+_inflight_operations: Dict[Tuple[Any, ...], "_InflightOperation"] = {}
+
+
+class _InflightOperation:
+    """A shared render awaited by every concurrent caller with the same key."""
+
+    def __init__(self, task: "asyncio.Task[bytes]"):
+        self.task = task
+        self.waiters = 0
+        # Callers save one at a time, so later ones find the version the first one wrote
+        self.save_lock = asyncio.Lock()
+
+
+async def _run_single_flight(
+    key: Tuple[Any, ...],
+    render: Callable[[], Awaitable[bytes]],
+    save: Callable[[bytes], Awaitable[Dict[str, Any]]],
+    log_identifier: str,
+) -> Dict[str, Any]:
+    """
+    Render once for all concurrent callers sharing the same key, then save per caller.
+
+    The first caller starts the render; identical calls arriving while it is
+    still running await the same task. Each caller then saves the output under
+    its own tool context, one at a time, so callers after the first reuse the
+    identical version it wrote. The shared render is only cancelled once every
+    waiting caller has been cancelled, and is forgotten first so a call arriving
+    after that starts a new render instead of joining the cancelled one.
+
+    Args:
+        key: Hashable key built from the tool name, source version and normalized parameters
+        render: Zero-argument coroutine function producing the output bytes
+        save: Coroutine function saving the output for this caller and returning its result
+        log_identifier: Prefix for log messages
+
+    Returns:
+        This caller's result dictionary
+    """
+    inflight = _inflight_operations.get(key)
+    if inflight is None:
+        inflight = _InflightOperation(asyncio.ensure_future(render()))
+        _inflight_operations[key] = inflight
+        inflight.task.add_done_callback(lambda _task: _forget_inflight(key, inflight))
+    else:
+        logger.info(f"{log_identifier} Joining identical in-flight operation")
+
+    inflight.waiters += 1
+    try:
+        output_bytes = await asyncio.shield(inflight.task)
+    except asyncio.CancelledError:
+        if inflight.waiters == 1 and not inflight.task.done():
+            _forget_inflight(key, inflight)
+            inflight.task.cancel()
+        raise
+    finally:
+        inflight.waiters -= 1
+
+    async with inflight.save_lock:
+        return await save(output_bytes)
+
+
+def _forget_inflight(key: Tuple[Any, ...], inflight: _InflightOperation) -> None:
+    """Remove an operation from the in-flight map unless a newer one replaced it."""
+    if _inflight_operations.get(key) is inflight:
+        del _inflight_operations[key]
+
+
+# Content hash of the latest known version of each output artifact,
+# keyed by (app_name, user_id, session_id, filename) -> (version, sha256 hex digest).
+# Least recently used entries are dropped beyond MAX_INDEXED_ARTIFACTS; a dropped
+# entry only costs one reload and rehash of that artifact's latest version.
+MAX_INDEXED_ARTIFACTS = 4096
+_artifact_hash_index: "OrderedDict[Tuple[str, str, str, str], Tuple[int, str]]" = OrderedDict()
+
+
+def _index_artifact_hash(index_key: Tuple[str, str, str, str], version: int, digest: str) -> None:
+    """Record the digest of an artifact's latest version, evicting the least recently used entries."""
+    _artifact_hash_index[index_key] = (version, digest)
+    _artifact_hash_index.move_to_end(index_key)
+    while len(_artifact_hash_index) > MAX_INDEXED_ARTIFACTS:
+        _artifact_hash_index.popitem(last=False)
+
+# Companion artifact in which save_artifact_with_metadata stores each version's metadata
+_METADATA_SUFFIX = ".metadata.json"
+
+# Keep PNG output byte-for-byte reproducible so repeated operations hash identically
+_DETERMINISTIC_OUTPUT_OPTIONS = ["-define", "png:exclude-chunk=date,tIME"]
+
+
+async def _load_artifact_version(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    filename: str,
+    version: int,
+) -> Any:
+    """Load one artifact version with either an async or a blocking artifact service."""
+    load_artifact_method = getattr(artifact_service, "load_artifact")
+    if inspect.iscoroutinefunction(load_artifact_method):
+        return await load_artifact_method(
+            app_name=app_name, user_id=user_id, session_id=session_id,
+            filename=filename, version=version
+        )
+    return await asyncio.to_thread(
+        load_artifact_method, app_name=app_name, user_id=user_id,
+        session_id=session_id, filename=filename, version=version
+    )
+
+
+async def _stored_content_digest(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    filename: str,
+    version: int,
+) -> Optional[str]:
+    """Return the "content_sha256" recorded in a version's metadata, or None if there is none."""
+    try:
+        metadata_artifact = await _load_artifact_version(
+            artifact_service, app_name, user_id, session_id, f"{filename}{_METADATA_SUFFIX}", version
+        )
+        if not metadata_artifact or not metadata_artifact.inline_data:
+            return None
+        digest = json.loads(metadata_artifact.inline_data.data).get("content_sha256")
+    except Exception as e:
+        logger.debug(f"[ImageMagick] No stored content hash for {filename} v{version}: {e}")
+        return None
+    return digest if isinstance(digest, str) else None
+
+
+async def _find_identical_artifact_version(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    filename: str,
+    content_digest: str,
+) -> Optional[int]:
+    """
+    Return the latest version of an artifact if its content hash matches.
+
+    The latest version's digest is taken from the hash index when it is still
+    current, then from the "content_sha256" stored in that version's metadata.
+    Only versions saved without it are loaded and hashed.
+
+    Args:
+        artifact_service: Artifact service from the invocation context
+        app_name: Application name
+        user_id: User identifier
+        session_id: Session identifier
+        filename: Target artifact filename
+        content_digest: SHA-256 hex digest of the new content
+
+    Returns:
+        The matching latest version, or None if the content differs or no version exists
+    """
+    list_versions_method = getattr(artifact_service, "list_versions")
+    if inspect.iscoroutinefunction(list_versions_method):
+        versions = await list_versions_method(
+            app_name=app_name, user_id=user_id, session_id=session_id, filename=filename
+        )
+    else:
+        versions = await asyncio.to_thread(
+            list_versions_method, app_name=app_name, user_id=user_id,
+            session_id=session_id, filename=filename
+        )
+    if not versions:
+        return None
+    latest_version = max(versions)
+
+    index_key = (app_name, user_id, session_id, filename)
+    indexed = _artifact_hash_index.get(index_key)
+    if indexed and indexed[0] == latest_version:
+        _artifact_hash_index.move_to_end(index_key)
+        latest_digest = indexed[1]
+    else:
+        latest_digest = await _stored_content_digest(
+            artifact_service, app_name, user_id, session_id, filename, latest_version
+        )
+        if latest_digest is None:
+            latest_artifact = await _load_artifact_version(
+                artifact_service, app_name, user_id, session_id, filename, latest_version
+            )
+            if not latest_artifact or not latest_artifact.inline_data:
+                return None
+            latest_digest = hashlib.sha256(latest_artifact.inline_data.data).hexdigest()
+        _index_artifact_hash(index_key, latest_version, latest_digest)
+
+    return latest_version if latest_digest == content_digest else None
+
+
+async def _save_output_artifact(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    filename: str,
+    content_bytes: bytes,
+    mime_type: str,
+    metadata_dict: Dict[str, Any],
+    timestamp: datetime,
+    tool_context: ToolContext,
+    log_identifier: str,
+) -> Dict[str, Any]:
+    """
+    Save an output artifact unless the latest version already has identical content.
+
+    Args:
+        artifact_service: Artifact service from the invocation context
+        app_name: Application name
+        user_id: User identifier
+        session_id: Session identifier
+        filename: Output artifact filename
+        content_bytes: Output image bytes
+        mime_type: Output MIME type
+        metadata_dict: Metadata to store alongside a newly written version
+        timestamp: Creation timestamp
+        tool_context: Framework context
+        log_identifier: Prefix for log messages
+
+    Returns:
+        Save result dictionary with "status", "data_version" and "reused_existing_version"
+    """
+    content_digest = hashlib.sha256(content_bytes).hexdigest()
+    existing_version = await _find_identical_artifact_version(
+        artifact_service, app_name, user_id, session_id, filename, content_digest
+    )
+    if existing_version is not None:
+        logger.info(
+            f"{log_identifier} Output identical to {filename} v{existing_version}, skipping save"
+        )
+        return {
+            "status": "success",
+            "data_version": existing_version,
+            "reused_existing_version": True,
+        }
+
+    metadata_dict["content_sha256"] = content_digest
+    save_result = await save_artifact_with_metadata(
+        artifact_service=artifact_service,
+        app_name=app_name,
+        user_id=user_id,
+        session_id=session_id,
+        filename=filename,
+        content_bytes=content_bytes,
+        mime_type=mime_type,
+        metadata_dict=metadata_dict,
+        timestamp=timestamp,
+        schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
+        tool_context=tool_context,
+    )
+    if save_result.get("status") != "error":
+        _index_artifact_hash(
+            (app_name, user_id, session_id, filename), save_result["data_version"], content_digest
+        )
+    save_result["reused_existing_version"] = False
+    return save_result
+
+
+async def _load_image_artifact(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    image_filename: str,
+) -> Tuple[str, int, bytes]:
+    """
+    Resolve and load an image artifact given as "name" or "name:version".
+
+    Args:
+        artifact_service: Artifact service from the invocation context
+        app_name: Application name
+        user_id: User identifier
+        session_id: Session identifier
+        image_filename: Input image filename with optional version
+
+    Returns:
+        Tuple of (filename without version, loaded version, image bytes)
+    """
+    parts = image_filename.rsplit(":", 1)
+    filename_base = parts[0]
+    version_str = parts[1] if len(parts) > 1 else None
+    version_to_load = int(version_str) if version_str else None
+
+    if version_to_load is None:
+        list_versions_method = getattr(artifact_service, "list_versions")
+        if inspect.iscoroutinefunction(list_versions_method):
+            versions = await list_versions_method(
+                app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
+            )
+        else:
+            versions = await asyncio.to_thread(
+                list_versions_method, app_name=app_name, user_id=user_id,
+                session_id=session_id, filename=filename_base
+            )
+        if not versions:
+            raise FileNotFoundError(f"Image artifact '{filename_base}' not found.")
+        version_to_load = max(versions)
+
+    load_artifact_method = getattr(artifact_service, "load_artifact")
+    if inspect.iscoroutinefunction(load_artifact_method):
+        image_artifact = await load_artifact_method(
+            app_name=app_name, user_id=user_id, session_id=session_id,
+            filename=filename_base, version=version_to_load
+        )
+    else:
+        image_artifact = await asyncio.to_thread(
+            load_artifact_method, app_name=app_name, user_id=user_id,
+            session_id=session_id, filename=filename_base, version=version_to_load
+        )
+
+    if not image_artifact or not image_artifact.inline_data:
+        raise FileNotFoundError(f"Content for '{filename_base}' v{version_to_load} not found.")
+
+    return filename_base, version_to_load, image_artifact.inline_data.data
+
 
 async def crop_image(
     image_filename: str,
@@ -65,92 +451,51 @@ async def crop_image(
         if not all([app_name, user_id, session_id, artifact_service]):
             raise ValueError("Missing required context parts")
 
-        # Parse input filename and version
-        parts = image_filename.rsplit(":", 1)
-        filename_base = parts[0]
-        version_str = parts[1] if len(parts) > 1 else None
-        version_to_load = int(version_str) if version_str else None
-
-        # Get latest version if not specified
-        if version_to_load is None:
-            list_versions_method = getattr(artifact_service, "list_versions")
-            if inspect.iscoroutinefunction(list_versions_method):
-                versions = await list_versions_method(
-                    app_name=app_name,
-                    user_id=user_id,
-                    session_id=session_id,
-                    filename=filename_base,
-                )
-            else:
-                versions = await asyncio.to_thread(
-                    list_versions_method,
-                    app_name=app_name,
-                    user_id=user_id,
-                    session_id=session_id,
-                    filename=filename_base,
-                )
-            if not versions:
-                raise FileNotFoundError(f"Image artifact '{filename_base}' not found.")
-            version_to_load = max(versions)
-
-        # Load image artifact
-        load_artifact_method = getattr(artifact_service, "load_artifact")
-        if inspect.iscoroutinefunction(load_artifact_method):
-            image_artifact = await load_artifact_method(
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id,
-                filename=filename_base,
-                version=version_to_load,
-            )
-        else:
-            image_artifact = await asyncio.to_thread(
-                load_artifact_method,
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id,
-                filename=filename_base,
-                version=version_to_load,
-            )
+        # Resolve the input version and load the image
+        filename_base, version_to_load, image_bytes = await _load_image_artifact(
+            artifact_service, app_name, user_id, session_id, image_filename
+        )
 
-        if not image_artifact or not image_artifact.inline_data:
-            raise FileNotFoundError(f"Content for '{filename_base}' v{version_to_load} not found.")
+        # Determine output filename
+        if not output_filename:
+            name_parts = filename_base.rsplit(".", 1)
+            if len(name_parts) == 2:
+                output_filename = f"{name_parts[0]}_cropped.{name_parts[1]}"
+            else:
+                output_filename = f"{filename_base}_cropped"
 
-        image_bytes = image_artifact.inline_data.data
+        crop_geometry = f"{width}x{height}+{x_offset}+{y_offset}"
 
-        # Create temporary files for input and output
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
-            tmp_input.write(image_bytes)
-            tmp_input_path = tmp_input.name
+        async def _render() -> bytes:
+            # Create temporary files for input and output
+            with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
+                tmp_input.write(image_bytes)
+                tmp_input_path = tmp_input.name
 
-        try:
-            # Determine output filename
-            if not output_filename:
-                name_parts = filename_base.rsplit(".", 1)
-                if len(name_parts) == 2:
-                    output_filename = f"{name_parts[0]}_cropped.{name_parts[1]}"
-                else:
-                    output_filename = f"{filename_base}_cropped"
+            try:
+                tmp_output_path = tempfile.mktemp(suffix=Path(output_filename).suffix)
 
-            tmp_output_path = tempfile.mktemp(suffix=Path(output_filename).suffix)
+                # Run ImageMagick crop command
+                cmd = [
+                    "convert", tmp_input_path, "-crop", crop_geometry, "+repage",
+                    *_DETERMINISTIC_OUTPUT_OPTIONS, tmp_output_path,
+                ]
 
-            # Run ImageMagick crop command
-            crop_geometry = f"{width}x{height}+{x_offset}+{y_offset}"
-            cmd = ["convert", tmp_input_path, "-crop", crop_geometry, "+repage", tmp_output_path]
+                logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
+                result = await _run_imagemagick(cmd, tool_config, log_identifier)
 
-            logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
-            result = await asyncio.to_thread(
-                subprocess.run,
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+                # Read the output file
+                with open(tmp_output_path, "rb") as f:
+                    return f.read()
 
-            # Read the output file
-            with open(tmp_output_path, "rb") as f:
-                output_bytes = f.read()
+            finally:
+                # Clean up temporary files
+                if os.path.exists(tmp_input_path):
+                    os.unlink(tmp_input_path)
+                if os.path.exists(tmp_output_path):
+                    os.unlink(tmp_output_path)
 
+        async def _save(output_bytes: bytes) -> Dict[str, Any]:
             # Determine MIME type
             suffix = Path(output_filename).suffix.lower()
             mime_type_map = {
@@ -174,7 +519,7 @@ async def crop_image(
                 "creation_timestamp_iso": timestamp.isoformat(),
             }
 
-            save_result = await save_artifact_with_metadata(
+            save_result = await _save_output_artifact(
                 artifact_service=artifact_service,
                 app_name=app_name,
                 user_id=user_id,
@@ -184,8 +529,8 @@ async def crop_image(
                 mime_type=mime_type,
                 metadata_dict=metadata_dict,
                 timestamp=timestamp,
-                schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
                 tool_context=tool_context,
+                log_identifier=log_identifier,
             )
 
             if save_result.get("status") == "error":
@@ -197,16 +542,20 @@ async def crop_image(
                 "message": f"Image cropped successfully to {width}x{height}+{x_offset}+{y_offset}",
                 "output_filename": output_filename,
                 "output_version": save_result["data_version"],
+                "reused_existing_version": save_result["reused_existing_version"],
                 "crop_geometry": crop_geometry,
             }
 
-        finally:
-            # Clean up temporary files
-            if os.path.exists(tmp_input_path):
-                os.unlink(tmp_input_path)
-            if os.path.exists(tmp_output_path):
-                os.unlink(tmp_output_path)
+        operation_key = (
+            "crop_image", app_name, user_id, session_id,
+            filename_base, version_to_load, crop_geometry, output_filename,
+            _operation_timeout(tool_config),
+        )
+        return await _run_single_flight(operation_key, _render, _save, log_identifier)
 
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"{log_identifier} ImageMagick command timed out after {e.timeout}s")
+        return {"status": "error", "message": f"ImageMagick operation timed out after {e.timeout}s"}
     except subprocess.CalledProcessError as e:
         logger.error(f"{log_identifier} ImageMagick command failed: {e.stderr}")
         return {"status": "error", "message": f"ImageMagick error: {e.stderr}"}
@@ -271,83 +620,60 @@ async def resize_image(
         if not all([app_name, user_id, session_id, artifact_service]):
             raise ValueError("Missing required context parts")
 
-        # Parse input filename and load image (same as crop_image)
-        parts = image_filename.rsplit(":", 1)
-        filename_base = parts[0]
-        version_str = parts[1] if len(parts) > 1 else None
-        version_to_load = int(version_str) if version_str else None
-
-        if version_to_load is None:
-            list_versions_method = getattr(artifact_service, "list_versions")
-            if inspect.iscoroutinefunction(list_versions_method):
-                versions = await list_versions_method(
-                    app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
-                )
-            else:
-                versions = await asyncio.to_thread(
-                    list_versions_method, app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
-                )
-            if not versions:
-                raise FileNotFoundError(f"Image artifact '{filename_base}' not found.")
-            version_to_load = max(versions)
-
-        load_artifact_method = getattr(artifact_service, "load_artifact")
-        if inspect.iscoroutinefunction(load_artifact_method):
-            image_artifact = await load_artifact_method(
-                app_name=app_name, user_id=user_id, session_id=session_id,
-                filename=filename_base, version=version_to_load
-            )
-        else:
-            image_artifact = await asyncio.to_thread(
-                load_artifact_method, app_name=app_name, user_id=user_id,
-                session_id=session_id, filename=filename_base, version=version_to_load
-            )
-
-        if not image_artifact or not image_artifact.inline_data:
-            raise FileNotFoundError(f"Content for '{filename_base}' v{version_to_load} not found.")
-
-        image_bytes = image_artifact.inline_data.data
-
-        # Create temporary files
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
-            tmp_input.write(image_bytes)
-            tmp_input_path = tmp_input.name
-
-        try:
-            if not output_filename:
-                name_parts = filename_base.rsplit(".", 1)
-                if len(name_parts) == 2:
-                    output_filename = f"{name_parts[0]}_resized.{name_parts[1]}"
-                else:
-                    output_filename = f"{filename_base}_resized"
-
-            tmp_output_path = tempfile.mktemp(suffix=Path(output_filename).suffix)
-
-            # Build resize geometry
-            if percentage:
-                resize_geometry = f"{percentage}%"
-            elif width and height:
-                if maintain_aspect_ratio:
-                    resize_geometry = f"{width}x{height}"
-                else:
-                    resize_geometry = f"{width}x{height}!"
-            elif width:
-                resize_geometry = f"{width}x"
-            else:  # height only
-                resize_geometry = f"x{height}"
-
-            # Run ImageMagick resize command
-            cmd = ["convert", tmp_input_path, "-resize", resize_geometry, tmp_output_path]
-
-            logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
-            result = await asyncio.to_thread(
-                subprocess.run, cmd, capture_output=True, text=True, check=True
-            )
-
-            # Read output file
-            with open(tmp_output_path, "rb") as f:
-                output_bytes = f.read()
+        # Resolve the input version and load the image
+        filename_base, version_to_load, image_bytes = await _load_image_artifact(
+            artifact_service, app_name, user_id, session_id, image_filename
+        )
 
+        if not output_filename:
+            name_parts = filename_base.rsplit(".", 1)
+            if len(name_parts) == 2:
+                output_filename = f"{name_parts[0]}_resized.{name_parts[1]}"
+            else:
+                output_filename = f"{filename_base}_resized"
+
+        # Build resize geometry
+        if percentage:
+            resize_geometry = f"{percentage}%"
+        elif width and height:
+            if maintain_aspect_ratio:
+                resize_geometry = f"{width}x{height}"
+            else:
+                resize_geometry = f"{width}x{height}!"
+        elif width:
+            resize_geometry = f"{width}x"
+        else:  # height only
+            resize_geometry = f"x{height}"
+
+        async def _render() -> bytes:
+            # Create temporary files
+            with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
+                tmp_input.write(image_bytes)
+                tmp_input_path = tmp_input.name
+
+            try:
+                tmp_output_path = tempfile.mktemp(suffix=Path(output_filename).suffix)
+
+                # Run ImageMagick resize command
+                cmd = [
+                    "convert", tmp_input_path, "-resize", resize_geometry,
+                    *_DETERMINISTIC_OUTPUT_OPTIONS, tmp_output_path,
+                ]
+
+                logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
+                result = await _run_imagemagick(cmd, tool_config, log_identifier)
+
+                # Read output file
+                with open(tmp_output_path, "rb") as f:
+                    return f.read()
+
+            finally:
+                if os.path.exists(tmp_input_path):
+                    os.unlink(tmp_input_path)
+                if os.path.exists(tmp_output_path):
+                    os.unlink(tmp_output_path)
+
+        async def _save(output_bytes: bytes) -> Dict[str, Any]:
             # Determine MIME type
             suffix = Path(output_filename).suffix.lower()
             mime_type_map = {
@@ -367,7 +693,7 @@ async def resize_image(
                 "creation_timestamp_iso": timestamp.isoformat(),
             }
 
-            save_result = await save_artifact_with_metadata(
+            save_result = await _save_output_artifact(
                 artifact_service=artifact_service,
                 app_name=app_name,
                 user_id=user_id,
@@ -377,8 +703,8 @@ async def resize_image(
                 mime_type=mime_type,
                 metadata_dict=metadata_dict,
                 timestamp=timestamp,
-                schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
                 tool_context=tool_context,
+                log_identifier=log_identifier,
             )
 
             if save_result.get("status") == "error":
@@ -390,15 +716,20 @@ async def resize_image(
                 "message": f"Image resized successfully using geometry {resize_geometry}",
                 "output_filename": output_filename,
                 "output_version": save_result["data_version"],
+                "reused_existing_version": save_result["reused_existing_version"],
                 "resize_geometry": resize_geometry,
             }
 
-        finally:
-            if os.path.exists(tmp_input_path):
-                os.unlink(tmp_input_path)
-            if os.path.exists(tmp_output_path):
-                os.unlink(tmp_output_path)
+        operation_key = (
+            "resize_image", app_name, user_id, session_id,
+            filename_base, version_to_load, resize_geometry, output_filename,
+            _operation_timeout(tool_config),
+        )
+        return await _run_single_flight(operation_key, _render, _save, log_identifier)
 
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"{log_identifier} ImageMagick command timed out after {e.timeout}s")
+        return {"status": "error", "message": f"ImageMagick operation timed out after {e.timeout}s"}
     except subprocess.CalledProcessError as e:
         logger.error(f"{log_identifier} ImageMagick command failed: {e.stderr}")
         return {"status": "error", "message": f"ImageMagick error: {e.stderr}"}
@@ -462,73 +793,48 @@ async def convert_image_format(
         if not all([app_name, user_id, session_id, artifact_service]):
             raise ValueError("Missing required context parts")
 
-        # Load image artifact
-        parts = image_filename.rsplit(":", 1)
-        filename_base = parts[0]
-        version_str = parts[1] if len(parts) > 1 else None
-        version_to_load = int(version_str) if version_str else None
-
-        if version_to_load is None:
-            list_versions_method = getattr(artifact_service, "list_versions")
-            if inspect.iscoroutinefunction(list_versions_method):
-                versions = await list_versions_method(
-                    app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
-                )
-            else:
-                versions = await asyncio.to_thread(
-                    list_versions_method, app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
-                )
-            if not versions:
-                raise FileNotFoundError(f"Image artifact '{filename_base}' not found.")
-            version_to_load = max(versions)
-
-        load_artifact_method = getattr(artifact_service, "load_artifact")
-        if inspect.iscoroutinefunction(load_artifact_method):
-            image_artifact = await load_artifact_method(
-                app_name=app_name, user_id=user_id, session_id=session_id,
-                filename=filename_base, version=version_to_load
-            )
-        else:
-            image_artifact = await asyncio.to_thread(
-                load_artifact_method, app_name=app_name, user_id=user_id,
-                session_id=session_id, filename=filename_base, version=version_to_load
-            )
+        # Resolve the input version and load the image
+        filename_base, version_to_load, image_bytes = await _load_image_artifact(
+            artifact_service, app_name, user_id, session_id, image_filename
+        )
 
-        if not image_artifact or not image_artifact.inline_data:
-            raise FileNotFoundError(f"Content for '{filename_base}' v{version_to_load} not found.")
+        if not output_filename:
+            name_base = filename_base.rsplit(".", 1)[0]
+            output_filename = f"{name_base}.{output_format}"
 
-        image_bytes = image_artifact.inline_data.data
+        async def _render() -> bytes:
+            # Create temporary files
+            with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
+                tmp_input.write(image_bytes)
+                tmp_input_path = tmp_input.name
 
-        # Create temporary files
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
-            tmp_input.write(image_bytes)
-            tmp_input_path = tmp_input.name
-
-        try:
-            if not output_filename:
-                name_base = filename_base.rsplit(".", 1)[0]
-                output_filename = f"{name_base}.{output_format}"
+            try:
+                tmp_output_path = tempfile.mktemp(suffix=f".{output_format}")
 
-            tmp_output_path = tempfile.mktemp(suffix=f".{output_format}")
+                # Build ImageMagick command
+                cmd = ["convert", tmp_input_path]
 
-            # Build ImageMagick command
-            cmd = ["convert", tmp_input_path]
+                # Add quality parameter for JPEG
+                if quality and output_format in ["jpg", "jpeg"]:
+                    cmd.extend(["-quality", str(quality)])
 
-            # Add quality parameter for JPEG
-            if quality and output_format in ["jpg", "jpeg"]:
-                cmd.extend(["-quality", str(quality)])
+                cmd.extend(_DETERMINISTIC_OUTPUT_OPTIONS)
+                cmd.append(tmp_output_path)
 
-            cmd.append(tmp_output_path)
+                logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
+                result = await _run_imagemagick(cmd, tool_config, log_identifier)
 
-            logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
-            result = await asyncio.to_thread(
-                subprocess.run, cmd, capture_output=True, text=True, check=True
-            )
+                # Read output file
+                with open(tmp_output_path, "rb") as f:
+                    return f.read()
 
-            # Read output file
-            with open(tmp_output_path, "rb") as f:
-                output_bytes = f.read()
+            finally:
+                if os.path.exists(tmp_input_path):
+                    os.unlink(tmp_input_path)
+                if os.path.exists(tmp_output_path):
+                    os.unlink(tmp_output_path)
 
+        async def _save(output_bytes: bytes) -> Dict[str, Any]:
             # Determine MIME type
             mime_type_map = {
                 "jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png",
@@ -549,7 +855,7 @@ async def convert_image_format(
             if quality:
                 metadata_dict["quality"] = quality
 
-            save_result = await save_artifact_with_metadata(
+            save_result = await _save_output_artifact(
                 artifact_service=artifact_service,
                 app_name=app_name,
                 user_id=user_id,
@@ -559,8 +865,8 @@ async def convert_image_format(
                 mime_type=mime_type,
                 metadata_dict=metadata_dict,
                 timestamp=timestamp,
-                schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
                 tool_context=tool_context,
+                log_identifier=log_identifier,
             )
 
             if save_result.get("status") == "error":
@@ -572,15 +878,20 @@ async def convert_image_format(
                 "message": f"Image converted successfully to {output_format}",
                 "output_filename": output_filename,
                 "output_version": save_result["data_version"],
+                "reused_existing_version": save_result["reused_existing_version"],
                 "output_format": output_format,
             }
 
-        finally:
-            if os.path.exists(tmp_input_path):
-                os.unlink(tmp_input_path)
-            if os.path.exists(tmp_output_path):
-                os.unlink(tmp_output_path)
+        operation_key = (
+            "convert_image_format", app_name, user_id, session_id,
+            filename_base, version_to_load, output_format, quality, output_filename,
+            _operation_timeout(tool_config),
+        )
+        return await _run_single_flight(operation_key, _render, _save, log_identifier)
 
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"{log_identifier} ImageMagick command timed out after {e.timeout}s")
+        return {"status": "error", "message": f"ImageMagick operation timed out after {e.timeout}s"}
     except subprocess.CalledProcessError as e:
         logger.error(f"{log_identifier} ImageMagick command failed: {e.stderr}")
         return {"status": "error", "message": f"ImageMagick error: {e.stderr}"}
@@ -650,89 +961,64 @@ async def add_text_overlay(
         if not all([app_name, user_id, session_id, artifact_service]):
             raise ValueError("Missing required context parts")
 
-        # Load image artifact
-        parts = image_filename.rsplit(":", 1)
-        filename_base = parts[0]
-        version_str = parts[1] if len(parts) > 1 else None
-        version_to_load = int(version_str) if version_str else None
-
-        if version_to_load is None:
-            list_versions_method = getattr(artifact_service, "list_versions")
-            if inspect.iscoroutinefunction(list_versions_method):
-                versions = await list_versions_method(
-                    app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
-                )
-            else:
-                versions = await asyncio.to_thread(
-                    list_versions_method, app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
-                )
-            if not versions:
-                raise FileNotFoundError(f"Image artifact '{filename_base}' not found.")
-            version_to_load = max(versions)
-
-        load_artifact_method = getattr(artifact_service, "load_artifact")
-        if inspect.iscoroutinefunction(load_artifact_method):
-            image_artifact = await load_artifact_method(
-                app_name=app_name, user_id=user_id, session_id=session_id,
-                filename=filename_base, version=version_to_load
-            )
-        else:
-            image_artifact = await asyncio.to_thread(
-                load_artifact_method, app_name=app_name, user_id=user_id,
-                session_id=session_id, filename=filename_base, version=version_to_load
-            )
-
-        if not image_artifact or not image_artifact.inline_data:
-            raise FileNotFoundError(f"Content for '{filename_base}' v{version_to_load} not found.")
-
-        image_bytes = image_artifact.inline_data.data
+        # Resolve the input version and load the image
+        filename_base, version_to_load, image_bytes = await _load_image_artifact(
+            artifact_service, app_name, user_id, session_id, image_filename
+        )
 
-        # Create temporary files
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
-            tmp_input.write(image_bytes)
-            tmp_input_path = tmp_input.name
-
-        try:
-            if not output_filename:
-                name_parts = filename_base.rsplit(".", 1)
-                if len(name_parts) == 2:
-                    output_filename = f"{name_parts[0]}_text.{name_parts[1]}"
-                else:
-                    output_filename = f"{filename_base}_text"
-
-            tmp_output_path = tempfile.mktemp(suffix=Path(output_filename).suffix)
-
-            # Build ImageMagick command
-            cmd = ["convert", tmp_input_path]
-
-            # Add background color if specified
-            if background_color:
-                cmd.extend([
-                    "-background", background_color,
-                    "-fill", font_color,
-                    "-pointsize", str(font_size),
-                    "-gravity", position,
-                    "-annotate", "+0+0", text
-                ])
+        if not output_filename:
+            name_parts = filename_base.rsplit(".", 1)
+            if len(name_parts) == 2:
+                output_filename = f"{name_parts[0]}_text.{name_parts[1]}"
             else:
-                cmd.extend([
-                    "-fill", font_color,
-                    "-pointsize", str(font_size),
-                    "-gravity", position,
-                    "-annotate", "+0+0", text
-                ])
-
-            cmd.append(tmp_output_path)
-
-            logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
-            result = await asyncio.to_thread(
-                subprocess.run, cmd, capture_output=True, text=True, check=True
-            )
-
-            # Read output file
-            with open(tmp_output_path, "rb") as f:
-                output_bytes = f.read()
-
+                output_filename = f"{filename_base}_text"
+
+        async def _render() -> bytes:
+            # Create temporary files
+            with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
+                tmp_input.write(image_bytes)
+                tmp_input_path = tmp_input.name
+
+            try:
+                tmp_output_path = tempfile.mktemp(suffix=Path(output_filename).suffix)
+
+                # Build ImageMagick command
+                cmd = ["convert", tmp_input_path]
+
+                # Add background color if specified
+                if background_color:
+                    cmd.extend([
+                        "-background", background_color,
+                        "-fill", font_color,
+                        "-pointsize", str(font_size),
+                        "-gravity", position,
+                        "-annotate", "+0+0", text
+                    ])
+                else:
+                    cmd.extend([
+                        "-fill", font_color,
+                        "-pointsize", str(font_size),
+                        "-gravity", position,
+                        "-annotate", "+0+0", text
+                    ])
+
+                cmd.extend(_DETERMINISTIC_OUTPUT_OPTIONS)
+                cmd.append(tmp_output_path)
+
+                logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
+                result = await _run_imagemagick(cmd, tool_config, log_identifier)
+
+                # Read output file
+                with open(tmp_output_path, "rb") as f:
+                    return f.read()
+
+            finally:
+                if os.path.exists(tmp_input_path):
+                    os.unlink(tmp_input_path)
+                if os.path.exists(tmp_output_path):
+                    os.unlink(tmp_output_path)
+
+        async def _save(output_bytes: bytes) -> Dict[str, Any]:
             # Determine MIME type
             suffix = Path(output_filename).suffix.lower()
             mime_type_map = {
@@ -757,7 +1043,7 @@ async def add_text_overlay(
             if background_color:
                 metadata_dict["background_color"] = background_color
 
-            save_result = await save_artifact_with_metadata(
+            save_result = await _save_output_artifact(
                 artifact_service=artifact_service,
                 app_name=app_name,
                 user_id=user_id,
@@ -767,8 +1053,8 @@ async def add_text_overlay(
                 mime_type=mime_type,
                 metadata_dict=metadata_dict,
                 timestamp=timestamp,
-                schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
                 tool_context=tool_context,
+                log_identifier=log_identifier,
             )
 
             if save_result.get("status") == "error":
@@ -780,16 +1066,22 @@ async def add_text_overlay(
                 "message": f"Text overlay added successfully",
                 "output_filename": output_filename,
                 "output_version": save_result["data_version"],
+                "reused_existing_version": save_result["reused_existing_version"],
                 "text": text,
                 "position": position,
             }
 
-        finally:
-            if os.path.exists(tmp_input_path):
-                os.unlink(tmp_input_path)
-            if os.path.exists(tmp_output_path):
-                os.unlink(tmp_output_path)
-
+        operation_key = (
+            "add_text_overlay", app_name, user_id, session_id,
+            filename_base, version_to_load, text, position,
+            font_size, font_color, background_color, output_filename,
+            _operation_timeout(tool_config),
+        )
+        return await _run_single_flight(operation_key, _render, _save, log_identifier)
+
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"{log_identifier} ImageMagick command timed out after {e.timeout}s")
+        return {"status": "error", "message": f"ImageMagick operation timed out after {e.timeout}s"}
     except subprocess.CalledProcessError as e:
         logger.error(f"{log_identifier} ImageMagick command failed: {e.stderr}")
         return {"status": "error", "message": f"ImageMagick error: {e.stderr}"}
@@ -841,45 +1133,10 @@ async def get_image_info(
         if not all([app_name, user_id, session_id, artifact_service]):
             raise ValueError("Missing required context parts")
 
-        # Parse input filename and version
-        parts = image_filename.rsplit(":", 1)
-        filename_base = parts[0]
-        version_str = parts[1] if len(parts) > 1 else None
-        version_to_load = int(version_str) if version_str else None
-
-        # Get latest version if not specified
-        if version_to_load is None:
-            list_versions_method = getattr(artifact_service, "list_versions")
-            if inspect.iscoroutinefunction(list_versions_method):
-                versions = await list_versions_method(
-                    app_name=app_name, user_id=user_id, session_id=session_id, filename=filename_base
-                )
-            else:
-                versions = await asyncio.to_thread(
-                    list_versions_method, app_name=app_name, user_id=user_id,
-                    session_id=session_id, filename=filename_base
-                )
-            if not versions:
-                raise FileNotFoundError(f"Image artifact '{filename_base}' not found.")
-            version_to_load = max(versions)
-
-        # Load image artifact
-        load_artifact_method = getattr(artifact_service, "load_artifact")
-        if inspect.iscoroutinefunction(load_artifact_method):
-            image_artifact = await load_artifact_method(
-                app_name=app_name, user_id=user_id, session_id=session_id,
-                filename=filename_base, version=version_to_load
-            )
-        else:
-            image_artifact = await asyncio.to_thread(
-                load_artifact_method, app_name=app_name, user_id=user_id,
-                session_id=session_id, filename=filename_base, version=version_to_load
-            )
-
-        if not image_artifact or not image_artifact.inline_data:
-            raise FileNotFoundError(f"Content for '{filename_base}' v{version_to_load} not found.")
-
-        image_bytes = image_artifact.inline_data.data
+        # Resolve the input version and load the image
+        filename_base, version_to_load, image_bytes = await _load_image_artifact(
+            artifact_service, app_name, user_id, session_id, image_filename
+        )
 
         # Create temporary file for the image
         with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
@@ -896,13 +1153,7 @@ async def get_image_info(
             ]
 
             logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
-            result = await asyncio.to_thread(
-                subprocess.run,
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            result = await _run_imagemagick(cmd, tool_config, log_identifier)
 
             # Parse the output
             # Format: width|height|format|filesize|colorspace|depth|compression|quality
@@ -951,6 +1202,9 @@ async def get_image_info(
             if os.path.exists(tmp_input_path):
                 os.unlink(tmp_input_path)
 
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"{log_identifier} ImageMagick command timed out after {e.timeout}s")
+        return {"status": "error", "message": f"ImageMagick operation timed out after {e.timeout}s"}
     except subprocess.CalledProcessError as e:
         logger.error(f"{log_identifier} ImageMagick identify command failed: {e.stderr}")
         return {"status": "error", "message": f"ImageMagick error: {e.stderr}"}
@@ -960,3 +1214,486 @@ async def get_image_info(
     except Exception as e:
         logger.exception(f"{log_identifier} Unexpected error: {e}")
         return {"status": "error", "message": f"An unexpected error occurred: {e}"}
+
+
+def _escape_percent(text: str) -> str:
+    """Escape "%" so ImageMagick shows text literally instead of expanding format escapes."""
+    return text.replace("%", "%%")
+
+
+async def create_contact_sheet(
+    image_filenames: List[str],
+    columns: Optional[int] = None,
+    tile_size: int = 256,
+    label_tiles: bool = True,
+    background_color: str = "white",
+    output_filename: Optional[str] = None,
+    tool_context: Optional[ToolContext] = None,
+    tool_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Build a single contact sheet (grid montage) from many images using ImageMagick.
+
+    Each image is downscaled while it is decoded, so large inputs never need to
+    be held at full resolution, and the whole grid is produced by one montage call.
+
+    Args:
+        image_filenames: Input image filenames with optional versions (e.g., ["a.jpg", "b.png:2"])
+        columns: Number of tiles per row (default: roughly square grid)
+        tile_size: Maximum width and height of each tile in pixels (default: 256)
+        label_tiles: Label each tile with its filename (default: True)
+        background_color: Sheet background color name or hex (default: "white")
+        output_filename: Optional output filename (default: "contact_sheet.png")
+        tool_context: Framework context for accessing artifact service
+        tool_config: Optional configuration:
+            - max_images: Maximum number of images per sheet (default: 100)
+            - tile_spacing: Pixels between tiles (default: 4)
+
+    Returns:
+        Dictionary with status, message, and output file information
+    """
+    log_identifier = f"[ImageMagick:create_contact_sheet:{len(image_filenames)} images]"
+    logger.info(f"{log_identifier} Creating contact sheet")
+
+    if not tool_context:
+        logger.error(f"{log_identifier} ToolContext is missing.")
+        return {"status": "error", "message": "ToolContext is missing."}
+
+    current_tool_config = tool_config if tool_config is not None else {}
+    max_images = current_tool_config.get("max_images", 100)
+    tile_spacing = current_tool_config.get("tile_spacing", 4)
+
+    if not image_filenames:
+        return {"status": "error", "message": "Must specify at least one image"}
+    if len(image_filenames) > max_images:
+        return {
+            "status": "error",
+            "message": f"Too many images ({len(image_filenames)}). Maximum per sheet: {max_images}"
+        }
+    if tile_size <= 0 or (columns is not None and columns <= 0):
+        return {"status": "error", "message": "tile_size and columns must be positive"}
+
+    try:
+        # Extract invocation context
+        inv_context = tool_context._invocation_context
+        if not inv_context:
+            raise ValueError("InvocationContext is not available.")
+
+        app_name = getattr(inv_context, "app_name", None)
+        user_id = getattr(inv_context, "user_id", None)
+        session_id = get_original_session_id(inv_context)
+        artifact_service = getattr(inv_context, "artifact_service", None)
+
+        if not all([app_name, user_id, session_id, artifact_service]):
+            raise ValueError("Missing required context parts")
+
+        # Load all image artifacts concurrently
+        loaded_images = await asyncio.gather(*[
+            _load_image_artifact(artifact_service, app_name, user_id, session_id, name)
+            for name in image_filenames
+        ])
+
+        if not output_filename:
+            output_filename = "contact_sheet.png"
+        if columns is None:
+            columns = math.ceil(math.sqrt(len(loaded_images)))
+        rows = math.ceil(len(loaded_images) / columns)
+
+        tmp_dir = tempfile.mkdtemp(prefix="contact_sheet_")
+        try:
+            # Decode JPEGs at reduced scale and resize every input as it is read
+            cmd = [
+                "montage",
+                "-define", f"jpeg:size={tile_size * 2}x{tile_size * 2}",
+            ]
+            for index, (filename_base, _version, image_bytes) in enumerate(loaded_images):
+                tmp_input_path = os.path.join(tmp_dir, f"{index}{Path(filename_base).suffix}")
+                with open(tmp_input_path, "wb") as f:
+                    f.write(image_bytes)
+                if label_tiles:
+                    cmd.extend(["-label", _escape_percent(filename_base)])
+                cmd.append(f"{tmp_input_path}[{tile_size}x{tile_size}>]")
+
+            tmp_output_path = os.path.join(tmp_dir, f"output{Path(output_filename).suffix}")
+            cmd.extend([
+                "-tile", f"{columns}x",
+                "-geometry", f"{tile_size}x{tile_size}>+{tile_spacing}+{tile_spacing}",
+                "-background", background_color,
+                *_DETERMINISTIC_OUTPUT_OPTIONS,
+                tmp_output_path,
+            ])
+
+            logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
+            result = await _run_imagemagick(cmd, tool_config, log_identifier)
+
+            # Read output file
+            with open(tmp_output_path, "rb") as f:
+                output_bytes = f.read()
+
+            # Determine MIME type
+            suffix = Path(output_filename).suffix.lower()
+            mime_type_map = {
+                ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png",
+                ".gif": "image/gif", ".bmp": "image/bmp", ".webp": "image/webp",
+            }
+            mime_type = mime_type_map.get(suffix, "application/octet-stream")
+
+            # Save output artifact
+            timestamp = datetime.now(timezone.utc)
+            source_images = [f"{name}:{version}" for name, version, _ in loaded_images]
+            metadata_dict = {
+                "description": f"Contact sheet of {len(loaded_images)} images",
+                "source_tool": "create_contact_sheet",
+                "source_images": source_images,
+                "grid": f"{columns}x{rows}",
+                "tile_size": tile_size,
+                "creation_timestamp_iso": timestamp.isoformat(),
+            }
+
+            save_result = await _save_output_artifact(
+                artifact_service=artifact_service,
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+                filename=output_filename,
+                content_bytes=output_bytes,
+                mime_type=mime_type,
+                metadata_dict=metadata_dict,
+                timestamp=timestamp,
+                tool_context=tool_context,
+                log_identifier=log_identifier,
+            )
+
+            if save_result.get("status") == "error":
+                raise Exception(f"Failed to save artifact: {save_result.get('message')}")
+
+            logger.info(f"{log_identifier} Successfully created contact sheet {output_filename}")
+            return {
+                "status": "success",
+                "message": f"Contact sheet created with {len(loaded_images)} images in a {columns}x{rows} grid",
+                "output_filename": output_filename,
+                "output_version": save_result["data_version"],
+                "reused_existing_version": save_result["reused_existing_version"],
+                "image_count": len(loaded_images),
+                "grid": {"columns": columns, "rows": rows},
+                "source_images": source_images,
+            }
+
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    except subprocess.TimeoutExpired as e:
+        logger.error(f"{log_identifier} ImageMagick command timed out after {e.timeout}s")
+        return {"status": "error", "message": f"ImageMagick operation timed out after {e.timeout}s"}
+    except subprocess.CalledProcessError as e:
+        logger.error(f"{log_identifier} ImageMagick montage command failed: {e.stderr}")
+        return {"status": "error", "message": f"ImageMagick error: {e.stderr}"}
+    except FileNotFoundError as e:
+        logger.warning(f"{log_identifier} File not found: {e}")
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        logger.exception(f"{log_identifier} Unexpected error: {e}")
+        return {"status": "error", "message": f"An unexpected error occurred: {e}"}
+
+
+def _decode_ppm(ppm_bytes: bytes) -> np.ndarray:
+    """
+    Decode binary PPM (P6, 8-bit) output from ImageMagick into an HxWx3 uint8 array.
+
+    Args:
+        ppm_bytes: Raw "ppm:-" output
+
+    Returns:
+        RGB pixel array
+    """
+    header_fields: List[bytes] = []
+    position = 0
+    while len(header_fields) < 4:
+        while ppm_bytes[position:position + 1].isspace():
+            position += 1
+        if ppm_bytes[position:position + 1] == b"#":
+            position = ppm_bytes.index(b"\n", position) + 1
+            continue
+        end = position
+        while not ppm_bytes[end:end + 1].isspace():
+            end += 1
+        header_fields.append(ppm_bytes[position:end])
+        position = end
+    magic, width, height, max_value = header_fields
+    if magic != b"P6" or int(max_value) > 255:
+        raise ValueError(f"Unexpected PPM header: {b' '.join(header_fields)!r}")
+    width, height = int(width), int(height)
+    # Exactly one whitespace byte separates the header from the pixel data
+    pixels = np.frombuffer(ppm_bytes, dtype=np.uint8, count=width * height * 3, offset=position + 1)
+    return pixels.reshape(height, width, 3)
+
+
+def _dominant_colors(
+    pixels: np.ndarray, color_count: int, sample_size: int, iterations: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Find dominant colors with k-means over a random pixel subsample.
+
+    Args:
+        pixels: HxWx3 uint8 RGB array
+        color_count: Number of clusters
+        sample_size: Maximum number of pixels to cluster
+        iterations: Number of k-means iterations
+
+    Returns:
+        Clusters ordered by share, each with "hex", "rgb" and "fraction"
+    """
+    flat = pixels.reshape(-1, 3)
+    rng = np.random.default_rng(0)
+    if len(flat) > sample_size:
+        flat = flat[rng.choice(len(flat), size=sample_size, replace=False)]
+    samples = flat.astype(np.float32)
+    color_count = min(color_count, len(samples))
+
+    centers = samples[rng.choice(len(samples), size=color_count, replace=False)]
+    for _ in range(iterations):
+        distances = ((samples[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=color_count)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, samples)
+        occupied = counts > 0
+        centers[occupied] = sums[occupied] / counts[occupied, None]
+
+    fractions = counts / counts.sum()
+    order = np.argsort(-fractions)
+    colors = []
+    for index in order:
+        if counts[index] == 0:
+            continue
+        r, g, b = (int(round(v)) for v in centers[index])
+        colors.append({
+            "hex": f"#{r:02x}{g:02x}{b:02x}",
+            "rgb": [r, g, b],
+            "fraction": round(float(fractions[index]), 4),
+        })
+    return colors
+
+
+def _compute_image_statistics(
+    pixels: np.ndarray,
+    histogram_bins: int,
+    color_count: int,
+    sample_size: int,
+    blur_threshold: float,
+    clip_fraction_threshold: float,
+) -> Dict[str, Any]:
+    """
+    Compute histogram, dominant color, blur and exposure statistics in one pass over the pixels.
+
+    Args:
+        pixels: HxWx3 uint8 RGB array
+        histogram_bins: Number of bins per channel histogram
+        color_count: Number of dominant colors to report
+        sample_size: Pixel subsample size for k-means
+        blur_threshold: Laplacian variance below which the image counts as blurry
+        clip_fraction_threshold: Clipped pixel fraction above which exposure is flagged
+
+    Returns:
+        Dictionary of statistics
+    """
+    bin_index = (pixels.astype(np.uint16) * histogram_bins) >> 8
+    histograms = {
+        channel: np.bincount(bin_index[..., i].ravel(), minlength=histogram_bins).tolist()
+        for i, channel in enumerate(("red", "green", "blue"))
+    }
+
+    gray = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    laplacian = (
+        gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:]
+        - 4.0 * gray[1:-1, 1:-1]
+    )
+    blur_score = float(laplacian.var()) if laplacian.size else 0.0
+
+    pixel_count = gray.size
+    shadows_clipped = float(np.count_nonzero(gray <= 2) / pixel_count)
+    highlights_clipped = float(np.count_nonzero(gray >= 253) / pixel_count)
+    channel_clipped = (pixels == 255).reshape(-1, 3).mean(axis=0)
+    mean_brightness = float(gray.mean())
+
+    if highlights_clipped > clip_fraction_threshold or mean_brightness > 200:
+        exposure = "overexposed"
+    elif shadows_clipped > clip_fraction_threshold or mean_brightness < 50:
+        exposure = "underexposed"
+    else:
+        exposure = "normal"
+
+    return {
+        "analyzed_dimensions": {"width": int(pixels.shape[1]), "height": int(pixels.shape[0])},
+        "histograms": histograms,
+        "dominant_colors": _dominant_colors(pixels, color_count, sample_size),
+        "blur": {
+            "laplacian_variance": round(blur_score, 2),
+            "is_blurry": blur_score < blur_threshold,
+        },
+        "exposure": {
+            "mean_brightness": round(mean_brightness, 2),
+            "brightness_std": round(float(gray.std()), 2),
+            "shadows_clipped_fraction": round(shadows_clipped, 4),
+            "highlights_clipped_fraction": round(highlights_clipped, 4),
+            "channel_clipped_fraction": {
+                channel: round(float(value), 4)
+                for channel, value in zip(("red", "green", "blue"), channel_clipped)
+            },
+            "assessment": exposure,
+        },
+    }
+
+
+async def analyze_image(
+    image_filenames: List[str],
+    histogram_bins: int = 16,
+    dominant_color_count: int = 5,
+    tool_context: Optional[ToolContext] = None,
+    tool_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Compute image statistics for screening: histograms, dominant colors, blur and exposure.
+
+    Each image is decoded once by ImageMagick (bounded to an analysis size) into a
+    NumPy array and all statistics are computed with vectorized operations.
+
+    Args:
+        image_filenames: Input image filenames with optional versions (e.g., ["a.jpg", "b.png:2"])
+        histogram_bins: Bins per RGB channel histogram, 1-256 (default: 16)
+        dominant_color_count: Number of dominant colors to report (default: 5)
+        tool_context: Framework context for accessing artifact service
+        tool_config: Optional configuration:
+            - max_analysis_size: Longest edge images are reduced to before analysis (default: 1024)
+            - color_sample_size: Pixels sampled for dominant color k-means (default: 10000)
+            - blur_threshold: Laplacian variance below which an image is blurry (default: 100.0)
+            - clip_fraction_threshold: Clipped pixel fraction that flags exposure (default: 0.05)
+            - max_concurrent_images: Images analyzed (ImageMagick processes running) at
+                                     once (default: number of CPUs)
+
+    Returns:
+        Dictionary with status, message, and a per-image "results" list
+    """
+    log_identifier = f"[ImageMagick:analyze_image:{len(image_filenames)} images]"
+    logger.info(f"{log_identifier} Analyzing images")
+
+    if not tool_context:
+        logger.error(f"{log_identifier} ToolContext is missing.")
+        return {"status": "error", "message": "ToolContext is missing."}
+
+    if not image_filenames:
+        return {"status": "error", "message": "Must specify at least one image"}
+    if not 1 <= histogram_bins <= 256 or dominant_color_count < 1:
+        return {
+            "status": "error",
+            "message": "histogram_bins must be 1-256 and dominant_color_count at least 1"
+        }
+
+    current_tool_config = tool_config if tool_config is not None else {}
+    max_analysis_size = current_tool_config.get("max_analysis_size", 1024)
+    color_sample_size = current_tool_config.get("color_sample_size", 10000)
+    blur_threshold = current_tool_config.get("blur_threshold", 100.0)
+    clip_fraction_threshold = current_tool_config.get("clip_fraction_threshold", 0.05)
+    max_concurrent_images = current_tool_config.get("max_concurrent_images") or os.cpu_count() or 1
+
+    try:
+        # Extract invocation context
+        inv_context = tool_context._invocation_context
+        if not inv_context:
+            raise ValueError("InvocationContext is not available.")
+
+        app_name = getattr(inv_context, "app_name", None)
+        user_id = getattr(inv_context, "user_id", None)
+        session_id = get_original_session_id(inv_context)
+        artifact_service = getattr(inv_context, "artifact_service", None)
+
+        if not all([app_name, user_id, session_id, artifact_service]):
+            raise ValueError("Missing required context parts")
+
+        async def _analyze_one(image_filename: str) -> Dict[str, Any]:
+            try:
+                filename_base, version, image_bytes = await _load_image_artifact(
+                    artifact_service, app_name, user_id, session_id, image_filename
+                )
+
+                with tempfile.NamedTemporaryFile(delete=False, suffix=Path(filename_base).suffix) as tmp_input:
+                    tmp_input.write(image_bytes)
+                    tmp_input_path = tmp_input.name
+
+                try:
+                    # First frame only, oriented, reduced to the analysis size, as 8-bit sRGB
+                    cmd = [
+                        "convert",
+                        "-define", f"jpeg:size={max_analysis_size}x{max_analysis_size}",
+                        f"{tmp_input_path}[0]",
+                        "-auto-orient",
+                        "-resize", f"{max_analysis_size}x{max_analysis_size}>",
+                        "-colorspace", "sRGB",
+                        "-depth", "8",
+                        "ppm:-",
+                    ]
+                    logger.debug(f"{log_identifier} Running command: {' '.join(cmd)}")
+                    result = await _run_imagemagick(cmd, tool_config, log_identifier, text=False)
+                finally:
+                    if os.path.exists(tmp_input_path):
+                        os.unlink(tmp_input_path)
+
+                pixels = _decode_ppm(result.stdout)
+                statistics = await asyncio.to_thread(
+                    _compute_image_statistics,
+                    pixels,
+                    histogram_bins,
+                    dominant_color_count,
+                    color_sample_size,
+                    blur_threshold,
+                    clip_fraction_threshold,
+                )
+                return {
+                    "status": "success",
+                    "filename": filename_base,
+                    "version": version,
+                    **statistics,
+                }
+            except subprocess.TimeoutExpired as e:
+                logger.error(f"{log_identifier} ImageMagick command timed out for {image_filename}")
+                return {
+                    "status": "error",
+                    "filename": image_filename,
+                    "message": f"ImageMagick operation timed out after {e.timeout}s",
+                }
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode(errors="replace")
+                logger.error(f"{log_identifier} ImageMagick command failed for {image_filename}: {stderr}")
+                return {"status": "error", "filename": image_filename, "message": f"ImageMagick error: {stderr}"}
+            except FileNotFoundError as e:
+                logger.warning(f"{log_identifier} File not found: {e}")
+                return {"status": "error", "filename": image_filename, "message": str(e)}
+            except Exception as e:
+                # One undecodable or unexpected image must not fail the whole batch
+                logger.exception(f"{log_identifier} Unexpected error analyzing {image_filename}: {e}")
+                return {
+                    "status": "error",
+                    "filename": image_filename,
+                    "message": f"An unexpected error occurred: {e}",
+                }
+
+        # Each image runs its own convert process, so a long list must not fork them all at once
+        semaphore = asyncio.Semaphore(max(1, int(max_concurrent_images)))
+
+        async def _analyze_bounded(image_filename: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await _analyze_one(image_filename)
+
+        results = await asyncio.gather(*[_analyze_bounded(name) for name in image_filenames])
+
+        failed = sum(1 for r in results if r["status"] == "error")
+        logger.info(f"{log_identifier} Analysis completed: {len(results) - failed} succeeded, {failed} failed")
+        return {
+            "status": "success" if failed < len(results) else "error",
+            "message": f"Analyzed {len(results) - failed} of {len(results)} images",
+            "results": results,
+        }
+
+    except Exception as e:
+        logger.exception(f"{log_identifier} Unexpected error: {e}")
+        return {"status": "error", "message": f"An unexpected error occurred: {e}"}
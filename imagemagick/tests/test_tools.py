@@ -0,0 +1,358 @@
+import asyncio
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from imagemagick import tools
+from imagemagick.tools import (
+    _decode_ppm,
+    _dominant_colors,
+    _find_identical_artifact_version,
+    _run_single_flight,
+)
+
+
+class FakeArtifactService:
+    """In-memory artifact service counting loads."""
+
+    def __init__(self):
+        self.versions = {}
+        self.loads = 0
+
+    def add(self, filename, data):
+        self.versions.setdefault(filename, []).append(data)
+
+    async def list_versions(self, app_name, user_id, session_id, filename):
+        return list(range(len(self.versions.get(filename, []))))
+
+    async def load_artifact(self, app_name, user_id, session_id, filename, version):
+        if filename not in self.versions:
+            return None
+        self.loads += 1
+        return SimpleNamespace(inline_data=SimpleNamespace(data=self.versions[filename][version]))
+
+
+@pytest.fixture(autouse=True)
+def _reset_module_state():
+    tools._inflight_operations.clear()
+    tools._artifact_hash_index.clear()
+    yield
+    tools._inflight_operations.clear()
+    tools._artifact_hash_index.clear()
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _saver(saved, caller):
+    """Save callback recording which caller saved which output."""
+
+    async def save(output_bytes):
+        saved.append((caller, output_bytes))
+        return {"status": "success", "saved_by": caller}
+
+    return save
+
+
+def test_identical_concurrent_calls_share_one_render_and_save_separately():
+    renders = []
+    saved = []
+
+    async def render():
+        renders.append(1)
+        await asyncio.sleep(0.05)
+        return b"output"
+
+    async def run():
+        return await asyncio.gather(
+            *[_run_single_flight(("crop", 0), render, _saver(saved, caller), "[test]") for caller in range(3)]
+        )
+
+    results = asyncio.run(run())
+    assert len(renders) == 1
+    # Every caller saved the shared output under its own context
+    assert saved == [(0, b"output"), (1, b"output"), (2, b"output")]
+    assert [result["saved_by"] for result in results] == [0, 1, 2]
+    assert tools._inflight_operations == {}
+
+
+def test_different_keys_render_separately():
+    renders = []
+
+    async def render():
+        renders.append(1)
+        return b"output"
+
+    async def run():
+        await asyncio.gather(_run_single_flight(("crop", 0), render, _saver([], 0), "[test]"),
+                             _run_single_flight(("crop", 1), render, _saver([], 1), "[test]"))
+
+    asyncio.run(run())
+    assert len(renders) == 2
+
+
+def test_cancelling_one_waiter_keeps_the_shared_render():
+    saved = []
+
+    async def render():
+        await asyncio.sleep(0.05)
+        return b"output"
+
+    async def run():
+        first = asyncio.ensure_future(_run_single_flight(("resize", 0), render, _saver(saved, "first"), "[test]"))
+        second = asyncio.ensure_future(_run_single_flight(("resize", 0), render, _saver(saved, "second"), "[test]"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == {"status": "success", "saved_by": "second"}
+    # The cancelled caller's context is never used to save
+    assert saved == [("second", b"output")]
+
+
+def test_cancelling_the_last_waiter_cancels_the_render():
+    cancelled = []
+
+    async def render():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return b"output"
+
+    async def run():
+        waiter = asyncio.ensure_future(_run_single_flight(("convert", 0), render, _saver([], 0), "[test]"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert cancelled == [True]
+
+
+def test_call_arriving_after_the_last_waiter_cancelled_starts_a_new_render():
+    renders = []
+
+    async def render():
+        renders.append(1)
+        await asyncio.sleep(0.05)
+        return b"output"
+
+    async def run():
+        waiter = asyncio.ensure_future(_run_single_flight(("convert", 0), render, _saver([], 0), "[test]"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        # Arrives while the cancelled render is still unwinding
+        late = asyncio.ensure_future(_run_single_flight(("convert", 0), render, _saver([], "late"), "[test]"))
+        await asyncio.gather(waiter, return_exceptions=True)
+        return await late
+
+    assert asyncio.run(run()) == {"status": "success", "saved_by": "late"}
+    assert len(renders) == 2
+
+
+def test_identical_latest_version_is_found_and_indexed():
+    service = FakeArtifactService()
+    service.add("out.png", b"old")
+    service.add("out.png", b"new")
+
+    async def find(data):
+        return await _find_identical_artifact_version(service, "app", "user", "session", "out.png", _digest(data))
+
+    assert asyncio.run(find(b"new")) == 1
+    assert asyncio.run(find(b"new")) == 1
+    # The second lookup was answered from the hash index
+    assert service.loads == 1
+    # Only the latest version is compared
+    assert asyncio.run(find(b"old")) is None
+
+
+def test_stale_index_entry_is_rehashed():
+    service = FakeArtifactService()
+    service.add("out.png", b"first")
+
+    async def find(data):
+        return await _find_identical_artifact_version(service, "app", "user", "session", "out.png", _digest(data))
+
+    assert asyncio.run(find(b"first")) == 0
+    service.add("out.png", b"second")
+    assert asyncio.run(find(b"second")) == 1
+    assert service.loads == 2
+
+
+def test_hash_index_is_bounded_least_recently_used_first(monkeypatch):
+    monkeypatch.setattr(tools, "MAX_INDEXED_ARTIFACTS", 2)
+    service = FakeArtifactService()
+    for name in ("a.png", "b.png", "c.png"):
+        service.add(name, name.encode())
+
+    async def find(name):
+        return await _find_identical_artifact_version(service, "app", "user", "session", name, _digest(name.encode()))
+
+    asyncio.run(find("a.png"))
+    asyncio.run(find("b.png"))
+    asyncio.run(find("a.png"))  # b.png is now least recently used
+    asyncio.run(find("c.png"))
+    assert [key[3] for key in tools._artifact_hash_index] == ["a.png", "c.png"]
+
+    # An evicted entry is rehashed from the artifact on its next lookup
+    assert asyncio.run(find("b.png")) == 0
+    assert service.loads == 4
+
+
+def test_stored_content_hash_is_used_before_loading_the_artifact():
+    service = FakeArtifactService()
+    service.add("out.png", b"content")
+    service.add("out.png.metadata.json", json.dumps({"content_sha256": _digest(b"content")}).encode())
+
+    async def find(data):
+        return await _find_identical_artifact_version(service, "app", "user", "session", "out.png", _digest(data))
+
+    assert asyncio.run(find(b"content")) == 0
+    # Only the metadata was read, not the image
+    assert service.loads == 1
+    tools._artifact_hash_index.clear()
+    assert asyncio.run(find(b"other")) is None
+    assert service.loads == 2
+
+
+def test_missing_artifact_has_no_identical_version():
+    result = asyncio.run(
+        _find_identical_artifact_version(FakeArtifactService(), "app", "user", "session", "none.png", _digest(b""))
+    )
+    assert result is None
+
+
+def test_decode_ppm_with_comment():
+    pixels = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+    ppm = b"P6\n# written by ImageMagick\n3 2\n255\n" + pixels.tobytes()
+    assert np.array_equal(_decode_ppm(ppm), pixels)
+
+
+def test_decode_ppm_rejects_other_formats():
+    with pytest.raises(ValueError):
+        _decode_ppm(b"P5\n1 1\n255\n\x00")
+    with pytest.raises(ValueError):
+        _decode_ppm(b"P6\n1 1\n65535\n\x00\x00\x00\x00\x00\x00")
+
+
+def test_dominant_colors_are_ordered_by_share():
+    pixels = np.zeros((10, 10, 3), np.uint8)
+    pixels[:7] = [255, 0, 0]
+    pixels[7:] = [0, 0, 255]
+
+    colors = _dominant_colors(pixels, color_count=2, sample_size=1000)
+    assert [color["hex"] for color in colors] == ["#ff0000", "#0000ff"]
+    assert [color["fraction"] for color in colors] == [0.7, 0.3]
+    assert colors[0]["rgb"] == [255, 0, 0]
+
+
+def test_dominant_colors_of_a_single_color_image():
+    pixels = np.full((4, 4, 3), 17, np.uint8)
+    colors = _dominant_colors(pixels, color_count=5, sample_size=8)
+    assert [color["hex"] for color in colors] == ["#111111"]
+    assert colors[0]["fraction"] == 1.0
+
+
+def test_analyze_image_reports_unexpected_errors_per_image(monkeypatch):
+    monkeypatch.setattr(tools, "get_original_session_id", lambda context: "session")
+    service = FakeArtifactService()
+    service.add("broken.png", b"only version 0")
+    context = SimpleNamespace(
+        _invocation_context=SimpleNamespace(app_name="app", user_id="user", artifact_service=service)
+    )
+
+    # broken.png:3 makes the artifact service raise IndexError
+    result = asyncio.run(tools.analyze_image(["missing.png", "broken.png:3"], tool_context=context))
+    assert result["status"] == "error"
+    missing, broken = result["results"]
+    assert (missing["status"], missing["filename"]) == ("error", "missing.png")
+    assert "not found" in missing["message"]
+    assert (broken["status"], broken["filename"]) == ("error", "broken.png:3")
+    assert broken["message"].startswith("An unexpected error occurred")
+
+
+def test_analyze_image_bounds_concurrent_imagemagick_processes(monkeypatch):
+    monkeypatch.setattr(tools, "get_original_session_id", lambda context: "session")
+    service = FakeArtifactService()
+    for index in range(6):
+        service.add(f"image{index}.png", b"png bytes")
+    context = SimpleNamespace(
+        _invocation_context=SimpleNamespace(app_name="app", user_id="user", artifact_service=service)
+    )
+    running = 0
+    peak = 0
+
+    async def fake_run_imagemagick(cmd, tool_config, log_identifier, text=True):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return SimpleNamespace(stdout=b"P6\n1 1\n255\n\x10\x20\x30")
+
+    monkeypatch.setattr(tools, "_run_imagemagick", fake_run_imagemagick)
+
+    names = [f"image{index}.png" for index in range(6)]
+    result = asyncio.run(tools.analyze_image(names, tool_context=context, tool_config={"max_concurrent_images": 2}))
+    assert [r["status"] for r in result["results"]] == ["success"] * 6
+    assert peak == 2
+
+
+def test_contact_sheet_labels_escape_percent(monkeypatch):
+    monkeypatch.setattr(tools, "get_original_session_id", lambda context: "session")
+    service = FakeArtifactService()
+    service.add("100%_crop.png", b"png bytes")
+    context = SimpleNamespace(
+        _invocation_context=SimpleNamespace(app_name="app", user_id="user", artifact_service=service)
+    )
+    commands = []
+
+    async def fake_run_imagemagick(cmd, tool_config, log_identifier, text=True):
+        commands.append(cmd)
+        raise subprocess.CalledProcessError(1, cmd, stderr="stop here")
+
+    monkeypatch.setattr(tools, "_run_imagemagick", fake_run_imagemagick)
+
+    asyncio.run(tools.create_contact_sheet(["100%_crop.png"], tool_context=context))
+    (cmd,) = commands
+    assert cmd[cmd.index("-label") + 1] == "100%%_crop.png"
+
+
+def test_operation_key_includes_the_configured_timeout(monkeypatch):
+    monkeypatch.setattr(tools, "get_original_session_id", lambda context: "session")
+    service = FakeArtifactService()
+    service.add("photo.png", b"png bytes")
+    context = SimpleNamespace(
+        _invocation_context=SimpleNamespace(app_name="app", user_id="user", artifact_service=service)
+    )
+    keys = []
+
+    async def fake_single_flight(key, render, save, log_identifier):
+        keys.append(key)
+        return {"status": "success"}
+
+    monkeypatch.setattr(tools, "_run_single_flight", fake_single_flight)
+
+    async def crop(tool_config):
+        return await tools.crop_image("photo.png", 10, 10, tool_context=context, tool_config=tool_config)
+
+    asyncio.run(crop(None))
+    asyncio.run(crop({"operation_timeout_seconds": 60.0}))
+    asyncio.run(crop({"operation_timeout_seconds": 600.0}))
+    # A caller with a longer deadline never joins a render started under a shorter one
+    assert keys[0] == keys[1]
+    assert keys[2] != keys[0]
@@ -0,0 +1,144 @@
+import logging
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .backends import DetectionResult
+
+log = logging.getLogger(__name__)
+
+# Distinct box colors, picked per class index
+_PALETTE = np.array(
+    [
+        (255, 56, 56), (255, 157, 151), (255, 112, 31), (255, 178, 29), (207, 210, 49),
+        (72, 249, 10), (146, 204, 23), (61, 219, 134), (26, 147, 52), (0, 212, 187),
+        (44, 153, 168), (0, 194, 255), (52, 69, 147), (100, 115, 255), (0, 24, 236),
+        (132, 56, 255), (82, 0, 133), (203, 56, 255), (255, 149, 200), (255, 55, 199),
+    ],
+    dtype=np.uint8,
+)
+
+
+def draw_detections(
+    image: np.ndarray,
+    result: DetectionResult,
+    class_names: Dict[int, str],
+    class_ids: Optional[List[int]] = None,
+    thickness: Optional[int] = None,
+) -> Image.Image:
+    """
+    Draw bounding boxes and labels onto a decoded image.
+
+    Box coordinates are mapped from the result's original image size to the
+    size of ``image`` (which may be a reduced decode) in one vectorized step,
+    and the edges of all boxes are written with a single indexed assignment.
+    Only the labels go through PIL's text renderer.
+
+    Args:
+        image: HxWx3 RGB uint8 array to draw on (not modified)
+        result: Detections in original image coordinates
+        class_names: Mapping of class index to class name
+        class_ids: Only draw these classes (default: all)
+        thickness: Box line width in pixels (default: scaled to image size)
+
+    Returns:
+        Annotated RGB image
+    """
+    canvas = np.array(image, dtype=np.uint8, copy=True)
+    height, width = canvas.shape[:2]
+    if thickness is None:
+        thickness = max(2, round(max(height, width) / 400))
+
+    mask = np.ones(len(result), dtype=bool)
+    if class_ids is not None:
+        mask &= np.isin(result.cls, class_ids)
+    if not mask.any():
+        return Image.fromarray(canvas)
+
+    orig_height, orig_width = result.orig_shape
+    scale = np.array(
+        [width / orig_width, height / orig_height, width / orig_width, height / orig_height],
+        dtype=np.float32,
+    )
+    boxes = np.rint(result.xyxy[mask] * scale).astype(np.int64)
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width - 1)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height - 1)
+    classes = result.cls[mask]
+    scores = result.conf[mask]
+    colors = _PALETTE[classes % len(_PALETTE)]
+
+    rows, columns, edge_colors = _edge_pixels(boxes, colors, thickness, height, width)
+    canvas[rows, columns] = edge_colors
+
+    annotated = Image.fromarray(canvas)
+    draw = ImageDraw.Draw(annotated)
+    font = ImageFont.load_default()
+    for (x1, y1, _, _), class_index, score, color in zip(boxes, classes, scores, colors):
+        label = f"{class_names.get(int(class_index), int(class_index))} {score:.2f}"
+        left, top, right, bottom = draw.textbbox((0, 0), label, font=font)
+        text_width, text_height = right - left, bottom - top
+        label_top = y1 - text_height - 4 if y1 - text_height - 4 >= 0 else y1
+        fill = tuple(int(c) for c in color)
+        draw.rectangle([x1, label_top, x1 + text_width + 4, label_top + text_height + 4], fill=fill)
+        draw.text((x1 + 2, label_top + 2 - top), label, fill=(255, 255, 255), font=font)
+    return annotated
+
+
+def _ragged_arange(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Concatenate ``arange(start, start + length)`` for every start/length pair."""
+    ends = np.cumsum(lengths)
+    return np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)
+
+
+def _edge_pixels(
+    boxes: np.ndarray,
+    colors: np.ndarray,
+    thickness: int,
+    height: int,
+    width: int,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Row and column indices, with colors, of every edge pixel of every box.
+
+    Each box contributes four bands (top, bottom, left, right) of ``thickness``
+    pixels. Where boxes overlap, the pixel takes one of their colors.
+
+    Args:
+        boxes: (N, 4) integer x1, y1, x2, y2 boxes clipped to the image
+        colors: (N, 3) uint8 color per box
+        thickness: Band width in pixels
+        height: Image height
+        width: Image width
+
+    Returns:
+        Tuple of (rows, columns, colors) ready for fancy-index assignment
+    """
+    x1, y1, x2, y2 = boxes.T
+    # Bands as [top, bottom) x [left, right) rectangles, ordered box by box
+    top = np.stack([y1, np.maximum(y2 - thickness + 1, 0), y1, y1], axis=1).ravel()
+    bottom = np.stack([np.minimum(y1 + thickness, height), y2 + 1, y2 + 1, y2 + 1], axis=1).ravel()
+    left = np.stack([x1, x1, x1, np.maximum(x2 - thickness + 1, 0)], axis=1).ravel()
+    right = np.stack([x2 + 1, x2 + 1, np.minimum(x1 + thickness, width), x2 + 1], axis=1).ravel()
+    band_heights = np.maximum(bottom - top, 0)
+    band_widths = np.maximum(right - left, 0)
+
+    # One entry per band row, then one per pixel of that row
+    band_of_row = np.repeat(np.arange(len(top)), band_heights)
+    row_of_band = _ragged_arange(top, band_heights)
+    row_widths = band_widths[band_of_row]
+    rows = np.repeat(row_of_band, row_widths)
+    columns = _ragged_arange(left[band_of_row], row_widths)
+    edge_colors = np.repeat(colors, 4, axis=0)[np.repeat(band_of_row, row_widths)]
+    return rows, columns, edge_colors
+
+
+def encode_image(image: Image.Image, image_format: str = "JPEG", quality: int = 90) -> bytes:
+    """Encode an annotated image for saving as an artifact."""
+    buffer = BytesIO()
+    if image_format.upper() == "JPEG":
+        image.save(buffer, format="JPEG", quality=quality)
+    else:
+        image.save(buffer, format=image_format)
+    return buffer.getvalue()
@@ -0,0 +1,401 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+# Inference backends selectable through tool_config "backend"
+SUPPORTED_BACKENDS = ("torch", "onnx", "openvino")
+
+DEFAULT_EXPORT_DIR = "./model_exports"
+DEFAULT_IMAGE_SIZE = 640
+# Ultralytics defaults, kept identical so every backend returns comparable detections
+DEFAULT_IOU_THRESHOLD = 0.7
+DEFAULT_MAX_DETECTIONS = 300
+LETTERBOX_FILL = 114
+
+
+class DetectionResult:
+    """
+    Detections for one image, independent of the backend that produced them.
+
+    Attributes:
+        xyxy: (N, 4) float32 boxes in original image pixel coordinates
+        conf: (N,) float32 confidence scores
+        cls: (N,) int64 class indices
+        orig_shape: (height, width) of the original image
+    """
+
+    __slots__ = ("xyxy", "conf", "cls", "orig_shape")
+
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray, orig_shape: Tuple[int, int]):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.orig_shape = orig_shape
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Greedy non-maximum suppression.
+
+    Args:
+        boxes: (N, 4) xyxy boxes
+        scores: (N,) scores
+        iou_threshold: Boxes overlapping a kept box by more than this are suppressed
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def class_aware_nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    class_ids: np.ndarray,
+    iou_threshold: float,
+    max_detections: int = DEFAULT_MAX_DETECTIONS,
+) -> np.ndarray:
+    """
+    Non-maximum suppression that only suppresses boxes of the same class.
+
+    Boxes are offset by class index times the coordinate span so boxes of
+    different classes can never overlap, then a single NMS pass is run.
+
+    Returns:
+        Indices of kept boxes, highest score first
+    """
+    if not len(boxes):
+        return np.zeros(0, dtype=np.int64)
+    offset = class_ids.astype(np.float32)[:, None] * (float(boxes.max()) + 1.0)
+    return nms(boxes + offset, scores, iou_threshold)[:max_detections]
+
+
+def letterbox(image: Any, size: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Resize an image to fit a size x size square, padding the remainder.
+
+    Args:
+        image: PIL image or HxWx3 RGB uint8 array
+        size: Square model input size
+
+    Returns:
+        Tuple of (size x size x 3 RGB uint8 array, scale factor, (pad_x, pad_y))
+    """
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    width, height = image.size
+    scale = min(size / width, size / height)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    if (new_width, new_height) != (width, height):
+        image = image.resize((new_width, new_height), Image.BILINEAR)
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+    canvas = np.full((size, size, 3), LETTERBOX_FILL, dtype=np.uint8)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    canvas[top:top + new_height, left:left + new_width] = np.asarray(image)
+    return canvas, scale, (left, top)
+
+
+def _image_shape(image: Any) -> Tuple[int, int]:
+    """Return (height, width) of a PIL image or array."""
+    if isinstance(image, np.ndarray):
+        return image.shape[0], image.shape[1]
+    return image.size[1], image.size[0]
+
+
+class TorchBackend:
+    """PyTorch eager inference through ultralytics YOLO."""
+
+    name = "torch"
+
+    def __init__(self, model: Any):
+        self.model = model
+        self.names: Dict[int, str] = model.names
+
+    def predict(
+        self,
+        images: Sequence[Any],
+        conf: float,
+        classes: Optional[List[int]] = None,
+    ) -> List[DetectionResult]:
+        """Run inference on a batch of PIL images or HxWx3 RGB uint8 arrays."""
+        # Ultralytics reads arrays as OpenCV-style BGR; arrays here are RGB like PIL images
+        inputs = [
+            np.ascontiguousarray(image[..., ::-1]) if isinstance(image, np.ndarray) else image
+            for image in images
+        ]
+        results = self.model.predict(inputs, conf=conf, classes=classes, verbose=False)
+        converted = []
+        for result in results:
+            boxes = result.boxes
+            if boxes is None or len(boxes) == 0:
+                converted.append(DetectionResult(
+                    np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                    np.zeros(0, np.int64), tuple(result.orig_shape),
+                ))
+                continue
+            converted.append(DetectionResult(
+                boxes.xyxy.cpu().numpy().astype(np.float32),
+                boxes.conf.cpu().numpy().astype(np.float32),
+                boxes.cls.cpu().numpy().astype(np.int64),
+                tuple(result.orig_shape),
+            ))
+        return converted
+
+
+class _ExportedBackend(ABC):
+    """Shared pre/post-processing for exported YOLO graphs (letterbox in, NMS out)."""
+
+    name = "exported"
+
+    def __init__(self, names: Dict[int, str], image_size: int):
+        self.names = names
+        self.image_size = image_size
+
+    @abstractmethod
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        """Run the exported graph on an NCHW float32 batch; returns (B, 4 + classes, anchors)."""
+
+    def predict(
+        self,
+        images: Sequence[Any],
+        conf: float,
+        classes: Optional[List[int]] = None,
+    ) -> List[DetectionResult]:
+        """Run inference on a batch of images."""
+        letterboxed = [letterbox(image, self.image_size) for image in images]
+        batch = np.stack([canvas for canvas, _, _ in letterboxed]).transpose(0, 3, 1, 2)
+        batch = np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+        outputs = self._run(batch)
+
+        results = []
+        for image, prediction, (_, scale, (pad_x, pad_y)) in zip(images, outputs, letterboxed):
+            results.append(self._postprocess(prediction.T, conf, classes, scale, pad_x, pad_y, _image_shape(image)))
+        return results
+
+    @staticmethod
+    def _postprocess(
+        prediction: np.ndarray,
+        conf: float,
+        classes: Optional[List[int]],
+        scale: float,
+        pad_x: float,
+        pad_y: float,
+        orig_shape: Tuple[int, int],
+    ) -> DetectionResult:
+        """Decode (anchors, 4 + classes) raw output for one image into detections."""
+        class_scores = prediction[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+        mask = scores >= conf
+        if classes is not None:
+            mask &= np.isin(class_ids, classes)
+        boxes_xywh, scores, class_ids = prediction[mask, :4], scores[mask], class_ids[mask]
+
+        boxes = np.empty_like(boxes_xywh)
+        boxes[:, :2] = boxes_xywh[:, :2] - boxes_xywh[:, 2:] / 2
+        boxes[:, 2:] = boxes_xywh[:, :2] + boxes_xywh[:, 2:] / 2
+
+        keep = class_aware_nms(boxes, scores, class_ids, DEFAULT_IOU_THRESHOLD)
+        boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+
+        # Undo letterboxing back to original pixel coordinates
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / scale
+        height, width = orig_shape
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+        return DetectionResult(
+            boxes.astype(np.float32), scores.astype(np.float32), class_ids.astype(np.int64), orig_shape
+        )
+
+
+class OnnxRuntimeBackend(_ExportedBackend):
+    """CPU inference of an exported ONNX graph through ONNX Runtime."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str, names: Dict[int, str], image_size: int, intra_op_threads: Optional[int] = None):
+        super().__init__(names, image_size)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The 'onnx' backend requires onnxruntime. Install it with: pip install onnxruntime"
+            ) from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if intra_op_threads:
+            options.intra_op_num_threads = int(intra_op_threads)
+        self.ckpt_path = model_path
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVINOBackend(_ExportedBackend):
+    """CPU inference of an exported OpenVINO IR model."""
+
+    name = "openvino"
+
+    def __init__(self, model_path: str, names: Dict[int, str], image_size: int, intra_op_threads: Optional[int] = None):
+        super().__init__(names, image_size)
+        try:
+            import openvino as ov
+        except ImportError as e:
+            raise ImportError(
+                "The 'openvino' backend requires OpenVINO. Install it with: pip install openvino"
+            ) from e
+
+        config = {"PERFORMANCE_HINT": "THROUGHPUT"}
+        if intra_op_threads:
+            config["INFERENCE_NUM_THREADS"] = int(intra_op_threads)
+        self.ckpt_path = str(Path(model_path).with_suffix(".bin"))
+        core = ov.Core()
+        self.compiled_model = core.compile_model(core.read_model(model_path), "CPU", config)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        return self.compiled_model(batch)[0]
+
+
+def _file_digest(path: str) -> str:
+    """Short content hash used to tie an export to the exact checkpoint it came from."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def export_model(yolo_model: Any, backend: str, export_dir: str, image_size: int) -> Tuple[str, Dict[int, str]]:
+    """
+    Export a YOLO checkpoint for a backend once and cache it on disk.
+
+    The cache entry is named after the checkpoint's content hash, so a retrained
+    custom model with the same filename gets a fresh export.
+
+    Args:
+        yolo_model: Loaded ultralytics YOLO model
+        backend: "onnx" or "openvino"
+        export_dir: Directory holding cached exports
+        image_size: Square model input size
+
+    Returns:
+        Tuple of (path to the exported model file, class names)
+    """
+    checkpoint = str(yolo_model.ckpt_path)
+    stem = Path(checkpoint).stem
+    cache_name = f"{stem}-{_file_digest(checkpoint)}-{image_size}"
+    cache_dir = Path(export_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    if backend == "onnx":
+        target = cache_dir / f"{cache_name}.onnx"
+        model_file = target
+    elif backend == "openvino":
+        target = cache_dir / f"{cache_name}_openvino_model"
+        model_file = target / f"{stem}.xml"
+    else:
+        raise ValueError(f"Cannot export for backend '{backend}'")
+    names_file = cache_dir / f"{cache_name}.names.json"
+
+    if model_file.exists() and names_file.exists():
+        log.info(f"[ObjectDetection:export] Using cached {backend} export: {model_file}")
+        with open(names_file) as f:
+            names = {int(k): v for k, v in json.load(f).items()}
+        return str(model_file), names
+
+    log.info(f"[ObjectDetection:export] Exporting {checkpoint} to {backend} (imgsz={image_size})")
+    exported = yolo_model.export(format=backend, imgsz=image_size, dynamic=True, verbose=False)
+    if os.path.exists(target):
+        shutil.rmtree(target) if os.path.isdir(target) else os.unlink(target)
+    shutil.move(str(exported), str(target))
+    names = dict(yolo_model.names)
+    with open(names_file, "w") as f:
+        json.dump(names, f)
+    log.info(f"[ObjectDetection:export] Cached {backend} export at {model_file}")
+    return str(model_file), names
+
+
+def load_backend(
+    yolo_loader: Any,
+    model_name: str,
+    backend: str = "torch",
+    export_dir: str = DEFAULT_EXPORT_DIR,
+    image_size: int = DEFAULT_IMAGE_SIZE,
+    intra_op_threads: Optional[int] = None,
+    quantization: Optional[Dict[str, Any]] = None,
+    calibration_source: Optional[Callable[[], List[np.ndarray]]] = None,
+) -> Any:
+    """
+    Load a model for the requested inference backend (blocking).
+
+    Args:
+        yolo_loader: Callable that loads an ultralytics YOLO model from a name or path
+        model_name: Standard model name or path to a custom checkpoint
+        backend: One of SUPPORTED_BACKENDS
+        export_dir: Directory holding cached exports
+        image_size: Square model input size for exported backends
+        intra_op_threads: Intra-op thread count for exported backends
+        quantization: Optional int8 quantization settings for the onnx backend
+                      (see quantization.quantize_onnx_model)
+        calibration_source: Callable returning calibration images for static quantization
+
+    Returns:
+        A backend exposing ``names`` and ``predict(images, conf, classes)``
+    """
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported backend '{backend}'. Supported: {', '.join(SUPPORTED_BACKENDS)}")
+
+    yolo_model = yolo_loader(model_name)
+    if backend == "torch":
+        return TorchBackend(yolo_model)
+
+    model_file, names = export_model(yolo_model, backend, export_dir, image_size)
+    if backend == "onnx" and quantization and quantization.get("mode"):
+        from .quantization import load_or_evaluate_report, quantize_onnx_model
+
+        quantized_file = quantize_onnx_model(model_file, quantization, image_size, calibration_source)
+        quantized = OnnxRuntimeBackend(quantized_file, names, image_size, intra_op_threads)
+        quantized.quantization_report = load_or_evaluate_report(
+            quantized_file,
+            lambda: OnnxRuntimeBackend(model_file, names, image_size, intra_op_threads),
+            quantized,
+            quantization,
+        )
+        return quantized
+    if backend == "onnx":
+        return OnnxRuntimeBackend(model_file, names, image_size, intra_op_threads)
+    return OpenVINOBackend(model_file, names, image_size, intra_op_threads)
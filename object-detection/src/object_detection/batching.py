@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class BatcherClosedError(RuntimeError):
+    """Raised to callers whose image was queued or in flight when their batcher was closed."""
+
+
+class _PendingImage:
+    """An image waiting in the batching queue together with its caller's future."""
+
+    __slots__ = ("image", "future", "enqueued_at")
+
+    def __init__(self, image: Any, future: "asyncio.Future[Any]"):
+        self.image = image
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-image inference requests into batched predict calls.
+
+    Requests are queued and a background task takes up to ``max_batch_size``
+    images, waiting at most ``max_wait_ms`` after the first one arrives, runs
+    one batched predict in a worker thread and scatters the per-image results
+    back to the awaiting callers.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "default",
+        stats_log_interval_seconds: float = 60.0,
+        run_blocking: Optional[Callable[..., Awaitable[Any]]] = None,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            predict_batch: Blocking function mapping a list of images to a list of results
+            max_batch_size: Maximum number of images per predict call
+            max_wait_ms: Latency budget for filling a batch after its first image arrives
+            name: Name used in log messages
+            stats_log_interval_seconds: How often to log throughput at INFO level
+            run_blocking: Coroutine function used to run predict_batch off the event
+                loop (default: asyncio.to_thread)
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+        self.stats_log_interval_seconds = stats_log_interval_seconds
+        self.run_blocking = run_blocking or asyncio.to_thread
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._batches = 0
+        self._images = 0
+        self._inference_seconds = 0.0
+        self._queue_wait_seconds = 0.0
+        self._started_at = time.perf_counter()
+        self._last_stats_log = self._started_at
+
+    async def submit(self, image: Any) -> Any:
+        """
+        Queue one image and wait for its inference result.
+
+        Args:
+            image: Image accepted by predict_batch
+
+        Returns:
+            The result for this image
+        """
+        if self._worker is None or self._worker.done():
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.ensure_future(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingImage(image, future))
+        return await future
+
+    def close(self) -> None:
+        """
+        Stop the background task.
+
+        Callers still waiting, whether queued or part of the batch being run,
+        get a BatcherClosedError. Safe to call from a thread other than the one
+        running the batcher's event loop.
+        """
+        loop = self._loop
+        if loop is not None and loop.is_running() and _running_loop() is not loop:
+            loop.call_soon_threadsafe(self._close)
+        else:
+            self._close()
+
+    def _close(self) -> None:
+        """Cancel the worker and fail queued callers; runs on the batcher's loop."""
+        if self._worker is not None and not self._worker.done():
+            # The worker fails the futures of the batch it holds as it unwinds
+            self._worker.cancel()
+        if self._queue is not None:
+            while not self._queue.empty():
+                _fail_pending(self._queue.get_nowait(), self.name)
+
+    async def _collect_batch(self, batch: List[_PendingImage]) -> None:
+        """
+        Wait for a first image, then fill the batch until it is full or the budget expires.
+
+        Images are appended to ``batch`` as they are taken off the queue, so the
+        caller still holds them if this is cancelled part-way.
+        """
+        batch.append(await self._queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        # Pick up anything that arrived while the last wait was resolving
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        batch[:] = [item for item in batch if not item.future.done()]
+
+    async def _run(self) -> None:
+        """Background loop: collect, predict, scatter."""
+        batch: List[_PendingImage] = []
+        try:
+            while True:
+                batch = []
+                await self._collect_batch(batch)
+                if batch:
+                    await self._run_batch(batch)
+        except asyncio.CancelledError:
+            # Closed while collecting or predicting: nobody else will resolve these futures
+            for item in batch:
+                _fail_pending(item, self.name)
+            raise
+
+    async def _run_batch(self, batch: List[_PendingImage]) -> None:
+        """Predict one batch and scatter the results to the waiting callers."""
+        batch_started = time.perf_counter()
+        try:
+            results = await self.run_blocking(
+                self.predict_batch, [item.image for item in batch]
+            )
+        except Exception as e:
+            log.error(f"[MicroBatcher:{self.name}] Batched predict failed: {e}")
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        batch_finished = time.perf_counter()
+        for item, result in zip(batch, results):
+            if not item.future.done():
+                item.future.set_result(result)
+
+        self._batches += 1
+        self._images += len(batch)
+        self._inference_seconds += batch_finished - batch_started
+        self._queue_wait_seconds += sum(batch_started - item.enqueued_at for item in batch)
+        log.debug(
+            f"[MicroBatcher:{self.name}] Ran batch of {len(batch)} in "
+            f"{(batch_finished - batch_started) * 1000:.1f} ms"
+        )
+        if batch_finished - self._last_stats_log >= self.stats_log_interval_seconds:
+            self._last_stats_log = batch_finished
+            stats = self.get_stats()
+            log.info(
+                f"[MicroBatcher:{self.name}] {stats['images_processed']} images in "
+                f"{stats['batches_run']} batches, avg batch {stats['average_batch_size']}, "
+                f"{stats['inference_images_per_second']} images/s"
+            )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return throughput and latency statistics for this batcher."""
+        elapsed = time.perf_counter() - self._started_at
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000.0,
+            "batches_run": self._batches,
+            "images_processed": self._images,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "average_batch_size": round(self._images / self._batches, 2) if self._batches else 0.0,
+            "average_queue_wait_ms": (
+                round(self._queue_wait_seconds / self._images * 1000.0, 2) if self._images else 0.0
+            ),
+            "inference_images_per_second": (
+                round(self._images / self._inference_seconds, 2) if self._inference_seconds else 0.0
+            ),
+            "overall_images_per_second": round(self._images / elapsed, 2) if elapsed else 0.0,
+        }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Return the event loop running in this thread, if any."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _fail_pending(item: _PendingImage, name: str) -> None:
+    """Fail a waiting caller because its batcher was closed."""
+    if not item.future.done():
+        item.future.set_exception(BatcherClosedError(f"Batcher {name} was closed"))
+
+
+# Batchers shared across tool calls, keyed by model and predict parameters
+# together with the batching settings and the runner they were created with
+_batchers: Dict[Tuple[Any, ...], MicroBatcher] = {}
+
+
+def get_batcher(
+    key: Any,
+    predict_batch: Callable[[List[Any]], List[Any]],
+    max_batch_size: int = 16,
+    max_wait_ms: float = 10.0,
+    run_blocking: Optional[Callable[..., Awaitable[Any]]] = None,
+) -> MicroBatcher:
+    """
+    Get the batcher for a key and batching settings, creating it on first use.
+
+    Callers with the same key but a different batch size, latency budget or
+    runner get their own batcher, so no caller runs with another's settings.
+    run_blocking should therefore be a stable callable (such as a shared
+    executor's bound ``run`` method) rather than a new closure per call.
+
+    Args:
+        key: Hashable key identifying the model and predict parameters
+        predict_batch: Blocking function mapping a list of images to a list of results
+        max_batch_size: Maximum number of images per predict call
+        max_wait_ms: Latency budget for filling a batch
+        run_blocking: Coroutine function used to run predict_batch off the event loop
+
+    Returns:
+        The shared MicroBatcher for the key and settings
+    """
+    batcher_key = (key, max(1, int(max_batch_size)), float(max_wait_ms), run_blocking)
+    batcher = _batchers.get(batcher_key)
+    if batcher is None:
+        batcher = MicroBatcher(
+            predict_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name=str(key),
+            run_blocking=run_blocking,
+        )
+        _batchers[batcher_key] = batcher
+    return batcher
+
+
+def get_batching_stats() -> List[Dict[str, Any]]:
+    """Return throughput statistics for every active batcher."""
+    return [batcher.get_stats() for batcher in _batchers.values()]
+
+
+def remove_batchers(predicate: Callable[[Any], bool]) -> int:
+    """
+    Close and drop every batcher whose key matches the predicate.
+
+    Args:
+        predicate: Function called with each key passed to get_batcher
+
+    Returns:
+        Number of batchers removed
+    """
+    keys = [batcher_key for batcher_key in _batchers if predicate(batcher_key[0])]
+    for key in keys:
+        _batchers.pop(key).close()
+    return len(keys)
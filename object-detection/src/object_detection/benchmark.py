@@ -0,0 +1,432 @@
+"""
+Object Detection Benchmarks
+
+Sizes the object detection agent across model sizes, batch sizes, concurrent
+callers and inference backends, and writes a machine-readable JSON report.
+
+Each (model, backend) pair runs in a fresh subprocess so cold-start time and
+peak RSS are measured from a clean process. Within it:
+  - cold start: first end-to-end detect_objects_in_image call (model download,
+    load and first inference) through a mock artifact service
+  - batch sweep: p50/p95 latency and images/s of predict at each batch size
+  - concurrency: p50/p95 latency and images/s of N callers invoking the tool at once
+
+Usage:
+    python -m object_detection.benchmark --models yolo11n.pt yolo11s.pt yolo11m.pt \\
+        --backends torch onnx openvino --batch-sizes 1 4 8 16 32 --concurrency 1 4 16
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+from .backends import DEFAULT_EXPORT_DIR, DEFAULT_IMAGE_SIZE, SUPPORTED_BACKENDS
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MODELS = ["yolo11n.pt", "yolo11s.pt", "yolo11m.pt"]
+DEFAULT_BATCH_SIZES = [1, 2, 4, 8, 16, 32]
+DEFAULT_CONCURRENCY = [1, 4, 16]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(percent / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _latency_summary(latencies_ms: List[float], images: int) -> Dict[str, Any]:
+    total_seconds = sum(latencies_ms) / 1000.0
+    return {
+        "latency_ms_p50": round(statistics.median(latencies_ms), 2),
+        "latency_ms_p95": round(_percentile(latencies_ms, 95), 2),
+        "images_per_second": round(images / total_seconds, 2) if total_seconds else 0.0,
+    }
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def load_benchmark_images(image_paths: Optional[List[str]] = None) -> List[Image.Image]:
+    """Load the given images, or the sample images bundled with ultralytics."""
+    if not image_paths:
+        from ultralytics.utils import ASSETS
+
+        image_paths = sorted(str(p) for p in Path(ASSETS).glob("*.jpg"))
+    images = []
+    for path in image_paths:
+        with Image.open(path) as image:
+            images.append(image.convert("RGB"))
+    return images
+
+
+class MockArtifactService:
+    """In-memory artifact service with the methods the detection tools call."""
+
+    def __init__(self):
+        self._artifacts: Dict[str, List[SimpleNamespace]] = {}
+
+    def add(self, filename: str, data: bytes, mime_type: str = "image/jpeg") -> None:
+        part = SimpleNamespace(inline_data=SimpleNamespace(data=data, mime_type=mime_type))
+        self._artifacts.setdefault(filename, []).append(part)
+
+    async def list_versions(self, app_name: str, user_id: str, session_id: str, filename: str) -> List[int]:
+        return list(range(len(self._artifacts.get(filename, []))))
+
+    async def load_artifact(
+        self, app_name: str, user_id: str, session_id: str, filename: str, version: Optional[int] = None
+    ) -> Optional[SimpleNamespace]:
+        versions = self._artifacts.get(filename, [])
+        if not versions:
+            return None
+        return versions[-1 if version is None else version]
+
+    async def save_artifact(self, app_name: str, user_id: str, session_id: str, filename: str, artifact: Any) -> int:
+        data = artifact.inline_data.data if hasattr(artifact, "inline_data") else bytes(artifact)
+        self.add(filename, data)
+        return len(self._artifacts[filename]) - 1
+
+    async def list_artifact_keys(self, app_name: str, user_id: str, session_id: str) -> List[str]:
+        return list(self._artifacts)
+
+
+class MockToolContext:
+    """Minimal ToolContext exposing an invocation context backed by MockArtifactService."""
+
+    def __init__(self, artifact_service: MockArtifactService):
+        self._invocation_context = SimpleNamespace(
+            app_name="benchmark_app",
+            user_id="benchmark_user",
+            session_id="benchmark_session",
+            session=SimpleNamespace(id="benchmark_session"),
+            artifact_service=artifact_service,
+        )
+        self.state: Dict[str, Any] = {}
+
+
+def _time_predict(model: Any, batch: List[Any], iterations: int, warmup: int, conf: float) -> Dict[str, Any]:
+    """Time repeated predict calls on one batch."""
+    for _ in range(max(0, warmup)):
+        model.predict(batch, conf=conf)
+    latencies_ms = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        model.predict(batch, conf=conf)
+        latencies_ms.append((time.perf_counter() - started) * 1000.0)
+    return {"batch_size": len(batch), **_latency_summary(latencies_ms, len(batch) * iterations)}
+
+
+async def _benchmark_concurrency(
+    tool_context: MockToolContext,
+    image_names: List[str],
+    callers: int,
+    requests_per_caller: int,
+    tool_config: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Run N callers invoking detect_objects_in_image at the same time."""
+    from .tools import detect_objects_in_image
+
+    latencies_ms: List[float] = []
+    errors = 0
+
+    async def caller(caller_index: int) -> None:
+        nonlocal errors
+        for request_index in range(requests_per_caller):
+            name = image_names[(caller_index + request_index) % len(image_names)]
+            started = time.perf_counter()
+            result = await detect_objects_in_image(
+                name, ["person"], tool_context=tool_context, tool_config=tool_config
+            )
+            latencies_ms.append((time.perf_counter() - started) * 1000.0)
+            if result.get("status") != "success":
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[caller(i) for i in range(callers)])
+    wall_seconds = time.perf_counter() - started
+    requests = callers * requests_per_caller
+    return {
+        "callers": callers,
+        "requests": requests,
+        "errors": errors,
+        "latency_ms_p50": round(statistics.median(latencies_ms), 2),
+        "latency_ms_p95": round(_percentile(latencies_ms, 95), 2),
+        "images_per_second": round(requests / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+
+async def benchmark_configuration(
+    model_name: str,
+    backend: str,
+    images: List[Image.Image],
+    batch_sizes: List[int],
+    concurrency: List[int],
+    iterations: int = 20,
+    warmup: int = 2,
+    requests_per_caller: int = 5,
+    confidence_threshold: float = 0.25,
+    export_dir: str = DEFAULT_EXPORT_DIR,
+    image_size: int = DEFAULT_IMAGE_SIZE,
+    intra_op_threads: Optional[int] = None,
+    micro_batching: bool = False,
+) -> Dict[str, Any]:
+    """
+    Benchmark one model and backend in the current process.
+
+    Run this in a fresh process for meaningful cold-start and peak RSS figures.
+
+    Args:
+        model_name: Standard model name or path to a custom checkpoint
+        backend: One of SUPPORTED_BACKENDS
+        images: Images to run
+        batch_sizes: Batch sizes for the predict sweep
+        concurrency: Numbers of concurrent tool callers
+        iterations: Timed predict calls per batch size
+        warmup: Untimed predict calls before each batch size
+        requests_per_caller: Tool calls made by each concurrent caller
+        confidence_threshold: Minimum confidence score
+        export_dir: Directory holding cached exports
+        image_size: Model input size for exported backends
+        intra_op_threads: Intra-op threads for exported backends
+        micro_batching: Enable micro-batching for the concurrency runs
+
+    Returns:
+        Dictionary of measurements for this configuration
+    """
+    from .tools import _get_yolo_model, detect_objects_in_image
+
+    tool_config = {
+        "model_name": model_name,
+        "backend": backend,
+        "export_dir": export_dir,
+        "image_size": image_size,
+        "intra_op_threads": intra_op_threads,
+        "confidence_threshold": confidence_threshold,
+        "micro_batching": {"enabled": micro_batching},
+    }
+
+    artifact_service = MockArtifactService()
+    image_names = []
+    for index, image in enumerate(images):
+        buffer = BytesIO()
+        image.save(buffer, format="JPEG", quality=90)
+        image_names.append(f"benchmark_{index}.jpg")
+        artifact_service.add(image_names[-1], buffer.getvalue())
+    tool_context = MockToolContext(artifact_service)
+
+    rss_before_mb = _peak_rss_mb()
+    started = time.perf_counter()
+    cold_result = await detect_objects_in_image(
+        image_names[0], ["person"], tool_context=tool_context, tool_config=tool_config
+    )
+    cold_start_seconds = time.perf_counter() - started
+    if cold_result.get("status") != "success":
+        raise RuntimeError(f"Cold-start call failed: {cold_result.get('message')}")
+
+    model = await _get_yolo_model(tool_config)
+    started = time.perf_counter()
+    await detect_objects_in_image(
+        image_names[0], ["person"], tool_context=tool_context, tool_config=tool_config
+    )
+    warm_call_ms = (time.perf_counter() - started) * 1000.0
+
+    batch_results = []
+    for batch_size in batch_sizes:
+        batch = [images[i % len(images)] for i in range(batch_size)]
+        batch_results.append(
+            await asyncio.to_thread(_time_predict, model, batch, iterations, warmup, confidence_threshold)
+        )
+
+    concurrency_results = []
+    for callers in concurrency:
+        concurrency_results.append(
+            await _benchmark_concurrency(
+                tool_context, image_names, callers, requests_per_caller, tool_config
+            )
+        )
+
+    detection_counts = [len(result) for result in model.predict(images, conf=confidence_threshold)]
+    return {
+        "model_name": model_name,
+        "backend": backend,
+        "micro_batching": micro_batching,
+        "cold_start_seconds": round(cold_start_seconds, 3),
+        "warm_call_ms": round(warm_call_ms, 2),
+        "batch_sizes": batch_results,
+        "concurrency": concurrency_results,
+        "detection_counts": detection_counts,
+        "rss_before_load_mb": rss_before_mb,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_isolated(model_name: str, backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Benchmark one configuration in a fresh subprocess and return its JSON result."""
+    command = [
+        sys.executable, "-m", "object_detection.benchmark", "--worker",
+        "--models", model_name, "--backends", backend,
+        "--batch-sizes", *[str(b) for b in args.batch_sizes],
+        "--concurrency", *[str(c) for c in args.concurrency],
+        "--iterations", str(args.iterations),
+        "--warmup", str(args.warmup),
+        "--requests-per-caller", str(args.requests_per_caller),
+        "--image-size", str(args.image_size),
+        "--export-dir", args.export_dir,
+    ]
+    if args.images:
+        command += ["--images", *args.images]
+    if args.intra_op_threads is not None:
+        command += ["--intra-op-threads", str(args.intra_op_threads)]
+    if args.micro_batching:
+        command.append("--micro-batching")
+
+    completed = subprocess.run(command, capture_output=True, text=True)
+    if completed.returncode != 0:
+        stderr_tail = completed.stderr.strip().splitlines()[-1:] or ["no output"]
+        raise RuntimeError(f"worker exited with {completed.returncode}: {stderr_tail[0]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Benchmark every model and backend combination.
+
+    A configuration that fails (for example because its runtime is not
+    installed) is reported with an error instead of aborting the suite.
+
+    Returns:
+        Report with one entry per configuration, plus throughput relative to
+        the torch backend of the same model
+    """
+    report: Dict[str, Any] = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "settings": {
+            "batch_sizes": args.batch_sizes,
+            "concurrency": args.concurrency,
+            "iterations": args.iterations,
+            "requests_per_caller": args.requests_per_caller,
+            "image_size": args.image_size,
+            "micro_batching": args.micro_batching,
+            "isolated": not args.no_isolate,
+        },
+        "results": [],
+    }
+    for model_name in args.models:
+        for backend in args.backends:
+            log.info(f"[ObjectDetection:benchmark] Benchmarking {model_name} on {backend}")
+            try:
+                if args.no_isolate:
+                    entry = asyncio.run(_benchmark_from_args(model_name, backend, args))
+                else:
+                    entry = _run_isolated(model_name, backend, args)
+            except Exception as e:
+                log.error(f"[ObjectDetection:benchmark] {model_name} on {backend} failed: {e}")
+                entry = {"model_name": model_name, "backend": backend, "error": str(e)}
+            report["results"].append(entry)
+
+    baselines = {
+        entry["model_name"]: entry
+        for entry in report["results"]
+        if entry["backend"] == "torch" and "error" not in entry
+    }
+    for entry in report["results"]:
+        baseline = baselines.get(entry["model_name"])
+        if "error" in entry or baseline is None:
+            continue
+        baseline_batches = {b["batch_size"]: b for b in baseline["batch_sizes"]}
+        for batch in entry["batch_sizes"]:
+            reference = baseline_batches.get(batch["batch_size"])
+            if reference and reference["images_per_second"]:
+                batch["speedup_vs_torch"] = round(
+                    batch["images_per_second"] / reference["images_per_second"], 2
+                )
+        entry["detection_count_delta_vs_torch"] = [
+            count - reference
+            for count, reference in zip(entry["detection_counts"], baseline["detection_counts"])
+        ]
+    return report
+
+
+async def _benchmark_from_args(model_name: str, backend: str, args: argparse.Namespace) -> Dict[str, Any]:
+    return await benchmark_configuration(
+        model_name,
+        backend,
+        load_benchmark_images(args.images),
+        batch_sizes=args.batch_sizes,
+        concurrency=args.concurrency,
+        iterations=args.iterations,
+        warmup=args.warmup,
+        requests_per_caller=args.requests_per_caller,
+        export_dir=args.export_dir,
+        image_size=args.image_size,
+        intra_op_threads=args.intra_op_threads,
+        micro_batching=args.micro_batching,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the object detection agent")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS, help="Model names or checkpoint paths")
+    parser.add_argument("--backends", nargs="+", default=list(SUPPORTED_BACKENDS), choices=SUPPORTED_BACKENDS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--images", nargs="*", help="Image files (default: ultralytics sample images)")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--requests-per-caller", type=int, default=5)
+    parser.add_argument("--image-size", type=int, default=DEFAULT_IMAGE_SIZE)
+    parser.add_argument("--intra-op-threads", type=int, default=None)
+    parser.add_argument("--export-dir", default=DEFAULT_EXPORT_DIR)
+    parser.add_argument("--micro-batching", action="store_true", help="Enable micro-batching for concurrency runs")
+    parser.add_argument("--no-isolate", action="store_true", help="Run all configurations in this process")
+    parser.add_argument("--output", default="benchmark_report.json", help="JSON report path")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        # Subprocess mode: benchmark a single configuration and print its JSON result
+        logging.basicConfig(level=logging.WARNING)
+        result = asyncio.run(_benchmark_from_args(args.models[0], args.backends[0], args))
+        print(json.dumps(result))
+        return
+
+    logging.basicConfig(level=logging.INFO)
+    report = run_suite(args)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for entry in report["results"]:
+        name = f"{entry['model_name']} / {entry['backend']}"
+        if "error" in entry:
+            print(f"{name:>28}: error: {entry['error']}")
+            continue
+        best = max(entry["batch_sizes"], key=lambda b: b["images_per_second"])
+        print(
+            f"{name:>28}: cold start {entry['cold_start_seconds']}s, "
+            f"peak RSS {entry['peak_rss_mb']} MB, best {best['images_per_second']} images/s "
+            f"at batch {best['batch_size']}"
+        )
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
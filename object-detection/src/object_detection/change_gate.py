@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Hashable, Optional
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_THUMBNAIL_SIZE = 64
+DEFAULT_PIXEL_THRESHOLD = 12
+DEFAULT_MIN_CHANGED_FRACTION = 0.005
+DEFAULT_MAX_REUSE = 30
+MAX_TRACKED_STREAMS = 1024
+
+
+class ChangeGate:
+    """
+    Skips inference on images that barely differ from the last analyzed one.
+
+    Each image is reduced to a small grayscale thumbnail with a box filter,
+    which averages away sensor noise and JPEG artifacts. When the fraction of
+    thumbnail pixels that moved by more than ``pixel_threshold`` grey levels
+    stays below ``min_changed_fraction``, the reference result is reused.
+    The reference is the last image that actually ran through the model, so
+    slow drift cannot accumulate across many reused frames. After ``max_reuse``
+    consecutive reuses the model runs again anyway.
+
+    Concurrent calls on one stream hold ``exclusive()`` from the check until
+    the reference is updated, so each frame is compared against a reference
+    and result that belong together.
+    """
+
+    def __init__(
+        self,
+        thumbnail_size: int = DEFAULT_THUMBNAIL_SIZE,
+        pixel_threshold: float = DEFAULT_PIXEL_THRESHOLD,
+        min_changed_fraction: float = DEFAULT_MIN_CHANGED_FRACTION,
+        max_reuse: int = DEFAULT_MAX_REUSE,
+    ):
+        self.thumbnail_size = max(8, int(thumbnail_size))
+        self.pixel_threshold = pixel_threshold
+        self.min_changed_fraction = min_changed_fraction
+        self.max_reuse = max_reuse
+        self.reference: Optional[np.ndarray] = None
+        self.reference_result: Any = None
+        self.reuses = 0
+        self.last_changed_fraction: Optional[float] = None
+        # Held from the check until the reference is updated; a thread lock and a
+        # concurrent future so callers on different event loops can wait for it
+        self._lock = threading.Lock()
+        self._busy: Optional[Future] = None
+
+    @classmethod
+    def from_config(cls, gate_config: Dict[str, Any]) -> "ChangeGate":
+        """Build a gate from the "change_gate" tool config section."""
+        return cls(
+            thumbnail_size=gate_config.get("thumbnail_size", DEFAULT_THUMBNAIL_SIZE),
+            pixel_threshold=gate_config.get("pixel_threshold", DEFAULT_PIXEL_THRESHOLD),
+            min_changed_fraction=gate_config.get("min_changed_fraction", DEFAULT_MIN_CHANGED_FRACTION),
+            max_reuse=gate_config.get("max_reuse", DEFAULT_MAX_REUSE),
+        )
+
+    def settings(self) -> tuple:
+        return (self.thumbnail_size, self.pixel_threshold, self.min_changed_fraction, self.max_reuse)
+
+    @asynccontextmanager
+    async def exclusive(self) -> AsyncIterator["ChangeGate"]:
+        """Hold the gate so no other call checks or updates it in the meantime."""
+        while True:
+            with self._lock:
+                if self._busy is None:
+                    self._busy = Future()
+                    break
+                busy = self._busy
+            await asyncio.shield(asyncio.wrap_future(busy))
+        try:
+            yield self
+        finally:
+            with self._lock:
+                busy, self._busy = self._busy, None
+            busy.set_result(None)
+
+    def signature(self, image: np.ndarray) -> np.ndarray:
+        """Downscaled grayscale thumbnail of an RGB uint8 array."""
+        thumbnail = Image.fromarray(image).convert("L").resize(
+            (self.thumbnail_size, self.thumbnail_size), Image.BOX
+        )
+        return np.asarray(thumbnail, dtype=np.int16)
+
+    def is_unchanged(self, signature: np.ndarray) -> bool:
+        """
+        Whether an image can reuse the reference result; counts the reuse if so.
+
+        Args:
+            signature: Thumbnail from signature()
+        """
+        if self.reference is None or self.reuses >= self.max_reuse:
+            return False
+        changed = float(np.mean(np.abs(signature - self.reference) > self.pixel_threshold))
+        self.last_changed_fraction = changed
+        if changed >= self.min_changed_fraction:
+            return False
+        self.reuses += 1
+        return True
+
+    def set_reference(self, signature: np.ndarray, result: Any = None) -> None:
+        """Make an image that ran through the model the new reference."""
+        self.reference = signature
+        self.reference_result = result
+        self.reuses = 0
+
+
+# Gates of single-image streams (e.g. successive versions of one camera snapshot)
+_gates: "OrderedDict[Hashable, ChangeGate]" = OrderedDict()
+_gates_lock = threading.Lock()
+
+
+def get_change_gate(stream_key: Hashable, gate_config: Dict[str, Any]) -> ChangeGate:
+    """
+    Return the process-wide gate of one image stream, creating it on first use.
+
+    At most MAX_TRACKED_STREAMS streams are tracked; the least recently used
+    one is forgotten first. A gate whose settings changed starts over.
+    """
+    configured = ChangeGate.from_config(gate_config)
+    with _gates_lock:
+        gate = _gates.get(stream_key)
+        if gate is None or gate.settings() != configured.settings():
+            gate = configured
+            _gates[stream_key] = gate
+        _gates.move_to_end(stream_key)
+        while len(_gates) > MAX_TRACKED_STREAMS:
+            _gates.popitem(last=False)
+        return gate
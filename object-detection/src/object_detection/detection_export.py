@@ -0,0 +1,155 @@
+import json
+import os
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backends import DetectionResult
+
+# Box layouts selectable through the tools' "output_format" argument
+OUTPUT_FORMATS = ("nested", "columnar")
+
+# Artifact formats for saved detections, chosen by file extension
+ARTIFACT_MIME_TYPES = {
+    ".jsonl": "application/x-ndjson",
+    ".npz": "application/octet-stream",
+}
+
+DEFAULT_COORDINATE_DECIMALS = 1
+DEFAULT_CONFIDENCE_DECIMALS = 3
+
+# (image filename, image version, detections) of one analyzed image
+DetectionRecord = Tuple[str, int, Optional[DetectionResult]]
+
+
+def validate_output_format(output_format: str) -> None:
+    """Raise ValueError for an unknown output_format."""
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"Unsupported output_format '{output_format}'. Supported: {', '.join(OUTPUT_FORMATS)}"
+        )
+
+
+def artifact_mime_type(filename: str) -> str:
+    """
+    Return the MIME type of a detections artifact, validating its extension.
+
+    Raises:
+        ValueError: If the extension is neither .jsonl nor .npz
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in ARTIFACT_MIME_TYPES:
+        raise ValueError(
+            f"Detections artifact '{filename}' must end with one of: {', '.join(ARTIFACT_MIME_TYPES)}"
+        )
+    return ARTIFACT_MIME_TYPES[extension]
+
+
+def columnar_boxes(
+    result: DetectionResult,
+    mask: np.ndarray,
+    coordinate_decimals: int = DEFAULT_COORDINATE_DECIMALS,
+    confidence_decimals: int = DEFAULT_CONFIDENCE_DECIMALS,
+) -> Dict[str, List[float]]:
+    """
+    Selected boxes as parallel, rounded arrays.
+
+    Returns:
+        {"x1": [...], "y1": [...], "x2": [...], "y2": [...], "confidence": [...]}
+    """
+    xyxy = np.round(result.xyxy[mask].astype(np.float64), coordinate_decimals).T.tolist()
+    columns = dict(zip(("x1", "y1", "x2", "y2"), xyxy))
+    columns["confidence"] = np.round(result.conf[mask].astype(np.float64), confidence_decimals).tolist()
+    return columns
+
+
+def _selected(result: Optional[DetectionResult], class_ids: Sequence[int]) -> np.ndarray:
+    """Boolean mask of the detections whose class was requested."""
+    if result is None or not len(result):
+        return np.zeros(0, dtype=bool)
+    return np.isin(result.cls, list(class_ids))
+
+
+def encode_jsonl(
+    records: Sequence[DetectionRecord],
+    class_names: Dict[int, str],
+    class_ids: Sequence[int],
+) -> Tuple[bytes, int]:
+    """
+    Encode detections as JSON Lines, one box per line.
+
+    Returns:
+        Tuple of (encoded bytes, number of boxes)
+    """
+    lines = []
+    for filename, version, result in records:
+        mask = _selected(result, class_ids)
+        if not mask.any():
+            continue
+        # Rounded in float64 so the float32 values are written without representation noise
+        rows = np.column_stack((
+            np.round(result.xyxy[mask].astype(np.float64), 2),
+            np.round(result.conf[mask].astype(np.float64), 4),
+        )).tolist()
+        for (x1, y1, x2, y2, confidence), class_index in zip(rows, result.cls[mask].tolist()):
+            lines.append(json.dumps({
+                "image_filename": filename,
+                "image_version": version,
+                "class": class_names.get(class_index, str(class_index)),
+                "class_id": class_index,
+                "x1": x1, "y1": y1, "x2": x2, "y2": y2,
+                "confidence": confidence,
+            }))
+    return ("\n".join(lines) + "\n" if lines else "").encode("utf-8"), len(lines)
+
+
+def encode_npz(
+    records: Sequence[DetectionRecord],
+    class_names: Dict[int, str],
+    class_ids: Sequence[int],
+) -> Tuple[bytes, int]:
+    """
+    Encode detections as a compressed NumPy archive.
+
+    Arrays: ``xyxy`` (N, 4) float32, ``confidence`` (N,) float32, ``class_id``
+    (N,) int64 and ``image_index`` (N,) int32 into ``image_filenames`` /
+    ``image_versions``; ``class_names`` is indexed by class id.
+
+    Returns:
+        Tuple of (encoded bytes, number of boxes)
+    """
+    xyxy, confidence, class_id, image_index = [], [], [], []
+    for index, (_, _, result) in enumerate(records):
+        mask = _selected(result, class_ids)
+        if not mask.any():
+            continue
+        xyxy.append(result.xyxy[mask])
+        confidence.append(result.conf[mask])
+        class_id.append(result.cls[mask])
+        image_index.append(np.full(int(mask.sum()), index, dtype=np.int32))
+
+    buffer = BytesIO()
+    np.savez_compressed(
+        buffer,
+        xyxy=np.concatenate(xyxy).astype(np.float32) if xyxy else np.zeros((0, 4), np.float32),
+        confidence=np.concatenate(confidence).astype(np.float32) if confidence else np.zeros(0, np.float32),
+        class_id=np.concatenate(class_id).astype(np.int64) if class_id else np.zeros(0, np.int64),
+        image_index=np.concatenate(image_index) if image_index else np.zeros(0, np.int32),
+        image_filenames=np.array([filename for filename, _, _ in records]),
+        image_versions=np.array([version for _, version, _ in records], dtype=np.int64),
+        class_names=np.array([class_names.get(i, str(i)) for i in range(max(class_names, default=-1) + 1)]),
+    )
+    return buffer.getvalue(), int(sum(len(c) for c in confidence))
+
+
+def encode_detections(
+    filename: str,
+    records: Sequence[DetectionRecord],
+    class_names: Dict[int, str],
+    class_ids: Sequence[int],
+) -> Tuple[bytes, int]:
+    """Encode detections in the format given by the artifact filename's extension."""
+    if artifact_mime_type(filename) == ARTIFACT_MIME_TYPES[".npz"]:
+        return encode_npz(records, class_names, class_ids)
+    return encode_jsonl(records, class_names, class_ids)
@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class InferenceQueueFullError(RuntimeError):
+    """Raised when the inference executor already holds its maximum number of queued jobs."""
+
+
+def _configure_worker_thread(threads_per_worker: Optional[int], cpu_affinity: Optional[List[int]]) -> None:
+    """Thread initializer: pin the worker to CPUs and set torch's intra-op thread count."""
+    if cpu_affinity and hasattr(os, "sched_setaffinity"):
+        try:
+            # On Linux, pid 0 means the calling thread
+            os.sched_setaffinity(0, set(cpu_affinity))
+        except OSError as e:
+            log.warning(f"[InferenceExecutor] Could not set CPU affinity {cpu_affinity}: {e}")
+    if threads_per_worker:
+        try:
+            import torch
+
+            torch.set_num_threads(int(threads_per_worker))
+        except ImportError:
+            pass
+
+
+class InferenceExecutor:
+    """
+    Dedicated thread pool for model inference.
+
+    Keeps predict calls out of the default asyncio executor, where they would
+    compete with every other plugin's blocking calls, and bounds how many run
+    at once (workers) and how many may wait (max_queue). Queue wait and worker
+    utilization are tracked for tuning.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        threads_per_worker: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        cpu_affinity: Optional[List[int]] = None,
+    ):
+        """
+        Initialize the executor.
+
+        Args:
+            workers: Number of predict calls that may run concurrently
+            threads_per_worker: torch.set_num_threads value applied in each worker
+                (torch's intra-op pool is process-wide, so the last value applied wins)
+            max_queue: Maximum jobs waiting for a worker; further jobs are rejected
+            cpu_affinity: Optional CPU ids the worker threads are pinned to (Linux only)
+        """
+        self.workers = max(1, int(workers))
+        self.threads_per_worker = threads_per_worker
+        self.max_queue = max_queue
+        self.cpu_affinity = list(cpu_affinity) if cpu_affinity else None
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="od-inference",
+            initializer=_configure_worker_thread,
+            initargs=(threads_per_worker, self.cpu_affinity),
+        )
+
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._queue_wait_seconds = 0.0
+        self._max_queue_wait_seconds = 0.0
+        self._busy_seconds = 0.0
+        self._started_at = time.perf_counter()
+
+    async def run(
+        self,
+        function: Callable[..., Any],
+        *args: Any,
+        stage_timings: Optional[Dict[str, float]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Run a blocking inference function on a worker thread.
+
+        Args:
+            function: Blocking function to run
+            stage_timings: Optional dictionary to which "queue_wait" and "inference"
+                seconds of this call are added
+
+        Raises:
+            InferenceQueueFullError: If max_queue jobs are already waiting
+        """
+        with self._lock:
+            if self.max_queue is not None and self._queued >= self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFullError(
+                    f"Inference queue is full ({self._queued} waiting); try again later."
+                )
+            self._queued += 1
+            self._submitted += 1
+        enqueued_at = time.perf_counter()
+
+        def _job() -> Any:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                wait = started - enqueued_at
+                self._queue_wait_seconds += wait
+                self._max_queue_wait_seconds = max(self._max_queue_wait_seconds, wait)
+            succeeded = False
+            try:
+                result = function(*args, **kwargs)
+                succeeded = True
+                return result
+            finally:
+                finished = time.perf_counter()
+                if stage_timings is not None:
+                    stage_timings["queue_wait"] = stage_timings.get("queue_wait", 0.0) + wait
+                    stage_timings["inference"] = stage_timings.get("inference", 0.0) + finished - started
+                with self._lock:
+                    self._running -= 1
+                    self._busy_seconds += finished - started
+                    if succeeded:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        job = self._pool.submit(_job)
+        # A job cancelled before a worker picked it up (its caller was cancelled or
+        # timed out) never runs _job, so its queue slot is given back here
+        job.add_done_callback(self._release_unstarted)
+        return await asyncio.wrap_future(job)
+
+    def _release_unstarted(self, job: "Future[Any]") -> None:
+        if job.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def shutdown(self) -> None:
+        """Stop accepting work; running jobs finish in the background."""
+        self._pool.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue, wait-time and utilization statistics."""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started_at
+            started_jobs = self._completed + self._failed + self._running
+            return {
+                "workers": self.workers,
+                "threads_per_worker": self.threads_per_worker,
+                "max_queue": self.max_queue,
+                "cpu_affinity": self.cpu_affinity,
+                "queued": self._queued,
+                "running": self._running,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "average_queue_wait_ms": (
+                    round(self._queue_wait_seconds / started_jobs * 1000.0, 2) if started_jobs else 0.0
+                ),
+                "max_queue_wait_ms": round(self._max_queue_wait_seconds * 1000.0, 2),
+                "utilization": round(self._busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0,
+            }
+
+
+# Executors shared by every agent in the process, one per distinct settings
+_executors: Dict[Tuple[Any, ...], InferenceExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_inference_executor(executor_config: Optional[Dict[str, Any]] = None) -> InferenceExecutor:
+    """
+    Get the process-wide inference executor for a set of settings, creating it on first use.
+
+    Tools whose "inference_executor" sections are identical share one executor;
+    a section with different settings gets its own, so neither replaces the other.
+
+    Args:
+        executor_config: The "inference_executor" tool config section:
+            workers (default 1), threads_per_worker, max_queue, cpu_affinity
+
+    Returns:
+        The shared InferenceExecutor for these settings
+    """
+    executor_config = executor_config or {}
+    cpu_affinity = executor_config.get("cpu_affinity")
+    settings = (
+        max(1, int(executor_config.get("workers", 1))),
+        executor_config.get("threads_per_worker"),
+        executor_config.get("max_queue"),
+        tuple(cpu_affinity) if cpu_affinity else None,
+    )
+    with _executors_lock:
+        executor = _executors.get(settings)
+        if executor is None:
+            executor = InferenceExecutor(*settings)
+            _executors[settings] = executor
+            log.info(
+                f"[InferenceExecutor] Started with {executor.workers} workers, "
+                f"threads_per_worker={executor.threads_per_worker}, max_queue={executor.max_queue}"
+            )
+        return executor
+
+
+def get_inference_executor_stats() -> List[Dict[str, Any]]:
+    """Return statistics of every started inference executor (empty if none has started)."""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return [executor.get_stats() for executor in executors]
+
+
+def shutdown_inference_executor() -> None:
+    """Shut down every inference executor; the next request starts new ones."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
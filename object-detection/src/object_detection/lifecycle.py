@@ -0,0 +1,210 @@
+"""
+Object Detection Agent Lifecycle Functions
+
+Preloads and warms up detection models when the agent starts, so the first
+tool call does not pay for model download, load and first-inference warm-up.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .backends import DEFAULT_IMAGE_SIZE, LETTERBOX_FILL
+
+log = logging.getLogger(__name__)
+
+# Readiness of the preloaded models, also stored in the agent-specific state
+_readiness: Dict[str, Any] = {"ready": False, "models": []}
+
+
+def get_readiness() -> Dict[str, Any]:
+    """Return whether preloading finished and the load and warm-up time of each model."""
+    return dict(_readiness)
+
+
+def _set_state(host_component: Any, key: str, value: Any) -> None:
+    if hasattr(host_component, "set_agent_specific_state"):
+        host_component.set_agent_specific_state(key, value)
+
+
+async def _warm_up_model(model_config: Dict[str, Any], batch_size: int, runs: int) -> Dict[str, Any]:
+    """Load one model through the registry and run dummy batches through it."""
+    from .tools import _model_key, _run_inference, _use_yolo_model
+
+    image_size = model_config.get("image_size", DEFAULT_IMAGE_SIZE)
+    dummy_batch = [
+        np.full((image_size, image_size, 3), LETTERBOX_FILL, dtype=np.uint8)
+        for _ in range(max(1, batch_size))
+    ]
+    warmup_ms = []
+    started = time.perf_counter()
+    async with _use_yolo_model(model_config) as model:
+        load_seconds = time.perf_counter() - started
+        for _ in range(max(1, runs)):
+            run_started = time.perf_counter()
+            await _run_inference(
+                model_config,
+                model.predict,
+                dummy_batch,
+                conf=model_config.get("confidence_threshold", 0.25),
+            )
+            warmup_ms.append(round((time.perf_counter() - run_started) * 1000.0, 2))
+
+    result = {
+        "model_key": _model_key(model_config),
+        "load_seconds": round(load_seconds, 3),
+        "warmup_ms": warmup_ms,
+    }
+    if getattr(model, "quantization_report", None):
+        result["quantization_report"] = model.quantization_report
+    return result
+
+
+async def _preload(
+    host_component: Any, model_configs: List[Dict[str, Any]], batch_size: int, runs: int
+) -> None:
+    """Load and warm up every configured model, recording readiness."""
+    started = time.perf_counter()
+    results = []
+    for model_config in model_configs:
+        try:
+            result = await _warm_up_model(model_config, batch_size, runs)
+            log.info(
+                f"[ObjectDetection:init] Model {result['model_key']} ready: loaded in "
+                f"{result['load_seconds']}s, warm-up runs {result['warmup_ms']} ms"
+            )
+        except Exception as e:
+            log.error(
+                f"[ObjectDetection:init] Failed to preload model "
+                f"{model_config.get('model_name')}: {e}"
+            )
+            result = {"model_key": model_config.get("model_name"), "error": str(e)}
+        results.append(result)
+
+    _readiness.update(
+        {
+            "ready": all("error" not in result for result in results),
+            "models": results,
+            "total_seconds": round(time.perf_counter() - started, 3),
+        }
+    )
+    _set_state(host_component, "object_detection_readiness", get_readiness())
+    log.info(
+        f"[ObjectDetection:init] Preloading finished in {_readiness['total_seconds']}s, "
+        f"ready: {_readiness['ready']}"
+    )
+
+
+def _host_loop(host_component: Any) -> Optional[asyncio.AbstractEventLoop]:
+    """Return the host component's event loop if it is already running."""
+    get_async_loop = getattr(host_component, "get_async_loop", None)
+    loop = get_async_loop() if callable(get_async_loop) else None
+    return loop if loop is not None and loop.is_running() else None
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Return the event loop running in this thread, if any."""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def init_function(host_component: Any, config: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Preload and warm up the configured detection models when the agent starts.
+
+    Models are loaded into the same process-wide registry the tools use, so
+    each entry must use the same model_name and backend settings as the tool
+    config it should serve.
+
+    Args:
+        host_component: The agent host component
+        config: Configuration dictionary with optional parameters:
+            - models: List of tool-config-style dictionaries (model_name, backend,
+                      export_dir, image_size, intra_op_threads, inference_executor, ...)
+                      (default: one entry built from this config's own keys)
+            - warmup_batch_size: Images in each dummy warm-up batch (default: 1)
+            - warmup_runs: Number of warm-up batches per model (default: 1)
+            - background: Preload without blocking agent startup (default: False)
+            - max_resident_models: Maximum models kept loaded per process (default: 2)
+            - max_model_memory_mb: Optional cap on estimated memory of loaded models
+            - model_idle_ttl_seconds: Unload a model after this many idle seconds; it is
+                                      reloaded on the next request (default: never)
+            - metrics_port: Serve /metrics (Prometheus text) and /metrics.json on
+                            this port (default: disabled)
+            - metrics_host: Host for the metrics endpoint (default: 127.0.0.1)
+    """
+    current_config = config if config is not None else {}
+    model_configs = current_config.get("models") or [current_config]
+    batch_size = current_config.get("warmup_batch_size", 1)
+    runs = current_config.get("warmup_runs", 1)
+
+    # The registry is shared by every tool in the process, so its limits are
+    # set here once rather than by whichever tool call happens to run last
+    from .tools import configure_model_registry
+
+    configure_model_registry(current_config)
+
+    if current_config.get("metrics_port"):
+        from .metrics import start_metrics_server
+
+        start_metrics_server(
+            int(current_config["metrics_port"]), current_config.get("metrics_host", "127.0.0.1")
+        )
+
+    log.info(f"[ObjectDetection:init] Preloading {len(model_configs)} model(s)")
+    _set_state(host_component, "object_detection_readiness", get_readiness())
+
+    background = current_config.get("background", False)
+    preload = _preload(host_component, model_configs, batch_size, runs)
+
+    # Preload on the host's loop when it has one, so models, batchers and the
+    # idle reaper live on the loop the tools run on
+    host_loop = _host_loop(host_component)
+    if host_loop is not None:
+        future = asyncio.run_coroutine_threadsafe(preload, host_loop)
+        if background:
+            return
+        if _running_loop() is host_loop:
+            log.warning(
+                "[ObjectDetection:init] Called on the host event loop; preloading in "
+                "the background instead of blocking it"
+            )
+            return
+        future.result()
+        return
+
+    # No loop running yet: use a private loop in a thread. The registry
+    # coordinates loads with thread-safe locks, so this is safe to share
+    worker = threading.Thread(
+        target=asyncio.run, args=(preload,), name="od-preload", daemon=True
+    )
+    worker.start()
+    if not background:
+        worker.join()
+
+
+def cleanup_function(host_component: Any, config: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Log pipeline, model and executor statistics and release background resources.
+
+    Args:
+        host_component: The agent host component
+        config: Configuration dictionary (not currently used)
+    """
+    from .executor import get_inference_executor_stats, shutdown_inference_executor
+    from .metrics import metrics, stop_metrics_server
+    from .tools import get_model_registry_stats
+
+    log.info(f"[ObjectDetection:cleanup] Pipeline metrics: {metrics.snapshot()}")
+    log.info(f"[ObjectDetection:cleanup] Model registry: {get_model_registry_stats()}")
+    for executor_stats in get_inference_executor_stats():
+        log.info(f"[ObjectDetection:cleanup] Inference executor: {executor_stats}")
+    shutdown_inference_executor()
+    stop_metrics_server()
+    _readiness.update({"ready": False})
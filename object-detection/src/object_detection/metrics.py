@@ -0,0 +1,246 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@contextmanager
+def stage(timings: Optional[Dict[str, float]], name: str) -> Iterator[None]:
+    """Add the duration of the block to timings[name] (no-op when timings is None)."""
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+class _StageHistogram:
+    """Cumulative latency histogram of one pipeline stage."""
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(STAGE_BUCKETS)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for index, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+
+
+class DetectionMetrics:
+    """
+    Process-wide counters and per-stage timings of the detection pipeline.
+
+    Tools record one entry per request with the time spent in each stage
+    (version lookup, artifact load, decode, queue wait, inference,
+    post-processing), plus images processed, boxes returned and result-cache
+    hits. Everything is available as a snapshot dictionary or as Prometheus
+    text exposition.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, _StageHistogram] = {}
+        self._requests: Dict[Tuple[str, str], int] = {}
+        self._counters: Dict[str, int] = {
+            "images_processed": 0,
+            "boxes_returned": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "change_gate_reuses": 0,
+        }
+        self._started_at = time.time()
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        """Increase a named counter."""
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def record_request(
+        self,
+        tool: str,
+        status: str,
+        timings: Dict[str, float],
+        images: int = 0,
+        boxes: int = 0,
+    ) -> None:
+        """
+        Record one finished tool call.
+
+        Args:
+            tool: Tool name
+            status: "success" or "error"
+            timings: Seconds spent per stage
+            images: Images (or frames) run through the model
+            boxes: Boxes returned to the caller
+        """
+        with self._lock:
+            self._requests[(tool, status)] = self._requests.get((tool, status), 0) + 1
+            self._counters["images_processed"] += images
+            self._counters["boxes_returned"] += boxes
+            for name, seconds in timings.items():
+                self._stages.setdefault(name, _StageHistogram()).observe(seconds)
+
+    def reset(self) -> None:
+        """Clear every counter and histogram."""
+        self.__init__()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return counters and per-stage timing summaries as a dictionary."""
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self._started_at, 1),
+                "requests": [
+                    {"tool": tool, "status": status, "count": count}
+                    for (tool, status), count in sorted(self._requests.items())
+                ],
+                **dict(self._counters),
+                "stages": {
+                    name: {
+                        "count": histogram.count,
+                        "total_ms": round(histogram.total * 1000.0, 2),
+                        "average_ms": round(histogram.total / histogram.count * 1000.0, 2),
+                        "max_ms": round(histogram.max * 1000.0, 2),
+                    }
+                    for name, histogram in self._stages.items()
+                    if histogram.count
+                },
+            }
+
+    def prometheus_text(self, extra_gauges: Optional[Dict[str, float]] = None) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            lines += [
+                "# HELP object_detection_requests_total Detection tool calls by tool and status.",
+                "# TYPE object_detection_requests_total counter",
+            ]
+            for (tool, status), count in sorted(self._requests.items()):
+                lines.append(f'object_detection_requests_total{{tool="{tool}",status="{status}"}} {count}')
+
+            for name, value in sorted(self._counters.items()):
+                metric = f"object_detection_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+
+            lines += [
+                "# HELP object_detection_stage_seconds Time spent per pipeline stage.",
+                "# TYPE object_detection_stage_seconds histogram",
+            ]
+            for name, histogram in sorted(self._stages.items()):
+                for bound, count in zip(STAGE_BUCKETS, histogram.buckets):
+                    lines.append(f'object_detection_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'object_detection_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'object_detection_stage_seconds_sum{{stage="{name}"}} {histogram.total:.6f}')
+                lines.append(f'object_detection_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+
+        for name, value in sorted((extra_gauges or {}).items()):
+            metric = f"object_detection_{name}"
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+# Metrics shared by every tool in the process
+metrics = DetectionMetrics()
+
+
+def _runtime_gauges() -> Dict[str, float]:
+    """Current values from the executor, model registry and result cache."""
+    from .executor import get_inference_executor_stats
+    from .tools import get_model_registry_stats, get_result_cache_stats
+
+    gauges: Dict[str, float] = {}
+    executor_stats = get_inference_executor_stats()
+    if executor_stats:
+        workers = sum(stats["workers"] for stats in executor_stats)
+        gauges["executor_queued"] = sum(stats["queued"] for stats in executor_stats)
+        gauges["executor_running"] = sum(stats["running"] for stats in executor_stats)
+        gauges["executor_utilization"] = round(
+            sum(stats["utilization"] * stats["workers"] for stats in executor_stats) / workers, 3
+        )
+    registry_stats = get_model_registry_stats()
+    gauges["resident_models"] = len(registry_stats["resident_models"])
+    gauges["resident_model_mb"] = registry_stats["resident_mb"]
+    gauges["result_cache_entries"] = sum(stats["entries"] for stats in get_result_cache_stats())
+    return gauges
+
+
+def get_metrics_snapshot() -> Dict[str, Any]:
+    """Return pipeline metrics together with executor, registry and cache gauges."""
+    return {**metrics.snapshot(), "gauges": _runtime_gauges()}
+
+
+def get_prometheus_metrics() -> str:
+    """Return pipeline metrics in the Prometheus text exposition format."""
+    return metrics.prometheus_text(_runtime_gauges())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.startswith("/metrics.json"):
+            body = json.dumps(get_metrics_snapshot()).encode("utf-8")
+            content_type = "application/json"
+        elif self.path.startswith("/metrics"):
+            body = get_prometheus_metrics().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log.debug(f"[ObjectDetection:metrics] {format % args}")
+
+
+_metrics_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a background thread.
+
+    Args:
+        port: Port to bind
+        host: Host to bind (default: 127.0.0.1)
+
+    Returns:
+        The running server
+    """
+    global _metrics_server
+    if _metrics_server is None:
+        _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(
+            target=_metrics_server.serve_forever, name="od-metrics", daemon=True
+        ).start()
+        log.info(f"[ObjectDetection:metrics] Serving metrics on http://{host}:{port}/metrics")
+    return _metrics_server
+
+
+def stop_metrics_server() -> None:
+    """Stop the metrics HTTP server if it is running."""
+    global _metrics_server
+    if _metrics_server is not None:
+        _metrics_server.shutdown()
+        _metrics_server.server_close()
+        _metrics_server = None
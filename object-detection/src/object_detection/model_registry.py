@@ -0,0 +1,476 @@
+import asyncio
+import ctypes
+import gc
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+def _estimate_model_bytes(model: Any) -> int:
+    """
+    Estimate the resident size of a loaded model.
+
+    Uses parameter and buffer sizes of the underlying torch module when available,
+    falling back to the size of the checkpoint file. Models running in other
+    processes (a detection process pool) report the resident size of those
+    processes themselves.
+    """
+    resident_bytes = getattr(model, "resident_bytes", None)
+    if callable(resident_bytes):
+        try:
+            return int(resident_bytes())
+        except Exception:
+            return 0
+    module = getattr(model, "model", None)
+    if module is not None and hasattr(module, "parameters"):
+        try:
+            total = sum(p.numel() * p.element_size() for p in module.parameters())
+            total += sum(b.numel() * b.element_size() for b in module.buffers())
+            if total:
+                return total
+        except Exception:
+            pass
+    checkpoint = getattr(model, "ckpt_path", None)
+    if checkpoint and os.path.exists(checkpoint):
+        return os.path.getsize(checkpoint)
+    return 0
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None if it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+def _release_freed_memory() -> None:
+    """Collect garbage, empty torch caches and return freed heap pages to the OS."""
+    gc.collect()
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+    try:
+        # glibc keeps freed arenas mapped; malloc_trim hands them back so RSS drops
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class _ResidentModel:
+    """A loaded model together with its bookkeeping."""
+
+    __slots__ = ("model", "size_bytes", "load_seconds", "loaded_at", "last_used", "in_use")
+
+    def __init__(self, model: Any, size_bytes: int, load_seconds: float):
+        self.model = model
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+        # Number of acquire() blocks currently using the model
+        self.in_use = 0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models keyed by model name or resolved path.
+
+    Each key has its own load lock so different models load concurrently while
+    concurrent requests for the same model wait for a single load. Resident
+    models are bounded by count and, optionally, estimated memory, with the
+    least recently used model evicted first. With an idle TTL, models unused
+    for longer than the TTL are unloaded in the background and reloaded
+    transparently on their next request. Models held through acquire() are
+    never evicted for count, memory or idle time until they are released.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        max_resident_models: int = 2,
+        max_memory_mb: Optional[float] = None,
+        idle_ttl_seconds: Optional[float] = None,
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            loader: Blocking function that loads a model from its name or path,
+                accepting optional keyword load options
+            max_resident_models: Maximum number of models kept loaded
+            max_memory_mb: Optional cap on the estimated memory of loaded models
+            idle_ttl_seconds: Optional idle time after which a model is unloaded
+        """
+        self.loader = loader
+        self.max_resident_models = max(1, int(max_resident_models))
+        self.max_memory_mb = max_memory_mb
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._reaper: Optional[asyncio.Task] = None
+
+        # Guards the resident models and loads in progress. A threading lock and
+        # concurrent futures (rather than asyncio primitives) keep the registry
+        # usable from any event loop or thread, e.g. a preload on a private loop
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[str, _ResidentModel]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._eviction_listeners: List[Callable[[str], None]] = []
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._idle_unloads = 0
+        self._reclaimed_bytes = 0
+        self._stats_lock = threading.Lock()
+        self._load_seconds: Dict[str, List[float]] = {}
+
+    def configure(
+        self,
+        max_resident_models: int = 2,
+        max_memory_mb: Optional[float] = None,
+        idle_ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Replace the residency limits; they take effect on the next load.
+
+        Every limit is set, so passing None removes a memory cap or idle TTL
+        set earlier.
+
+        Args:
+            max_resident_models: Maximum number of models kept loaded
+            max_memory_mb: Optional cap on the estimated memory of loaded models
+            idle_ttl_seconds: Optional idle time after which a model is unloaded
+        """
+        self.max_resident_models = max(1, int(max_resident_models))
+        self.max_memory_mb = max_memory_mb
+        self.idle_ttl_seconds = idle_ttl_seconds
+
+    @staticmethod
+    def resolve_key(model_name: str, variant: Optional[str] = None) -> str:
+        """
+        Build the registry key for a model.
+
+        Local model files are keyed by absolute path so different spellings share
+        one entry; a variant (such as an inference backend) gets its own entry.
+        """
+        key = os.path.realpath(model_name) if os.path.exists(model_name) else model_name
+        return f"{key}@{variant}" if variant else key
+
+    def add_eviction_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback invoked with the key of every evicted model."""
+        self._eviction_listeners.append(listener)
+
+    async def get(
+        self,
+        model_name: str,
+        variant: Optional[str] = None,
+        load_options: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """
+        Return the loaded model for a name or path, loading it if needed.
+
+        Args:
+            model_name: Standard model name (e.g., "yolo11n.pt") or path to a custom model
+            variant: Optional variant kept as a separate entry (e.g., an inference backend)
+            load_options: Keyword arguments passed to the loader on first load
+
+        Returns:
+            The loaded model
+        """
+        _, resident = await self._get_resident(model_name, variant, load_options)
+        return resident.model
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        model_name: str,
+        variant: Optional[str] = None,
+        load_options: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Use a model for the duration of a block, loading it if needed.
+
+        While any block holds the model it is skipped by LRU, memory-cap and
+        idle eviction, and its idle time starts when the last holder releases it.
+
+        Args:
+            model_name: Standard model name or path to a custom model
+            variant: Optional variant kept as a separate entry
+            load_options: Keyword arguments passed to the loader on first load
+
+        Yields:
+            The loaded model
+        """
+        key, resident = await self._get_resident(model_name, variant, load_options, hold=True)
+        try:
+            yield resident.model
+        finally:
+            with self._lock:
+                resident.in_use -= 1
+                resident.last_used = time.monotonic()
+                released = not resident.in_use
+                still_resident = self._models.get(key) is resident
+            if released:
+                if still_resident:
+                    # Evictions skipped while the model was held can happen now
+                    self._enforce_limits()
+                elif resident.model is not None:
+                    # Evicted while in use; nothing is running on it any more
+                    self._dispose(key, resident, "released after eviction")
+
+    async def _get_resident(
+        self,
+        model_name: str,
+        variant: Optional[str],
+        load_options: Optional[Dict[str, Any]],
+        hold: bool = False,
+    ) -> Tuple[str, _ResidentModel]:
+        """
+        Return the registry key and resident entry of a model, loading it if needed.
+
+        Concurrent callers of a model being loaded wait for that load instead of
+        starting their own. With ``hold`` the entry is marked in use before it
+        can be evicted.
+        """
+        key = self.resolve_key(model_name, variant)
+        self._ensure_reaper()
+        while True:
+            with self._lock:
+                resident = self._models.get(key)
+                if resident is not None:
+                    self._hits += 1
+                    resident.last_used = time.monotonic()
+                    resident.in_use += hold
+                    self._models.move_to_end(key)
+                    return key, resident
+                load = self._loading.get(key)
+                if load is None:
+                    load = self._loading[key] = Future()
+                    break
+            # Another caller, possibly on another loop or thread, is loading it.
+            # Shielded so a cancelled waiter does not cancel the shared load
+            await asyncio.shield(asyncio.wrap_future(load))
+
+        try:
+            self._misses += 1
+            log.info(f"[ModelRegistry] Loading model: {key}")
+            started = time.perf_counter()
+            model = await asyncio.to_thread(self.loader, model_name, **(load_options or {}))
+            load_seconds = time.perf_counter() - started
+            size_bytes = _estimate_model_bytes(model)
+
+            resident = _ResidentModel(model, size_bytes, load_seconds)
+            resident.in_use += hold
+            with self._lock:
+                self._models[key] = resident
+                self._load_seconds.setdefault(key, []).append(load_seconds)
+        finally:
+            # Waiters re-check the registry; after a failed load the next one retries
+            with self._lock:
+                self._loading.pop(key, None)
+            load.set_result(None)
+        log.info(
+            f"[ModelRegistry] Loaded model {key} in {load_seconds:.2f}s "
+            f"(~{size_bytes / (1024 * 1024):.1f} MB)"
+        )
+        self._enforce_limits(keep=key)
+        return key, resident
+
+    def _enforce_limits(self, keep: Optional[str] = None) -> None:
+        """
+        Evict least recently used models until the count and memory caps are met.
+
+        Models in use are skipped; the registry stays over its limits until they
+        are released.
+        """
+        max_bytes = self.max_memory_mb * 1024 * 1024 if self.max_memory_mb else None
+        while len(self._models) > 1:
+            over_count = len(self._models) > self.max_resident_models
+            over_memory = max_bytes is not None and self.resident_bytes() > max_bytes
+            if not (over_count or over_memory):
+                break
+            with self._lock:
+                candidate = next(
+                    (
+                        key
+                        for key, resident in self._models.items()
+                        if key != keep and not resident.in_use
+                    ),
+                    None,
+                )
+            if candidate is None:
+                log.debug("[ModelRegistry] Over residency limits, but every other model is in use")
+                break
+            self.evict(candidate, reason="memory cap" if over_memory and not over_count else "LRU")
+
+    def _ensure_reaper(self) -> None:
+        """Start the idle-unload task on the current event loop if a TTL is set."""
+        if not self.idle_ttl_seconds or (self._reaper is not None and not self._reaper.done()):
+            return
+        self._reaper = asyncio.ensure_future(self._reap_idle_models())
+
+    async def _reap_idle_models(self) -> None:
+        """Background loop unloading models idle for longer than the TTL."""
+        while self.idle_ttl_seconds:
+            await asyncio.sleep(max(1.0, min(self.idle_ttl_seconds / 2, 60.0)))
+            self.evict_idle()
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """
+        Unload every model idle for longer than the TTL.
+
+        Models in use or being loaded are skipped.
+
+        Returns:
+            Keys of the unloaded models
+        """
+        if not self.idle_ttl_seconds:
+            return []
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle_keys = [
+                key
+                for key, resident in self._models.items()
+                if now - resident.last_used > self.idle_ttl_seconds
+                and not resident.in_use
+                and key not in self._loading
+            ]
+        for key in idle_keys:
+            if self.evict(key, reason=f"idle > {self.idle_ttl_seconds:g}s"):
+                self._idle_unloads += 1
+        return idle_keys
+
+    def evict(self, key: str, reason: str = "manual") -> bool:
+        """
+        Drop a model from the registry.
+
+        Closing the model and returning its memory to the OS can block for
+        seconds (worker processes are joined), so on an event loop they run in a
+        worker thread. A model still held through acquire() is closed only when
+        its last holder releases it, so requests in flight are not cut off.
+
+        Args:
+            key: Registry key of the model
+            reason: Reason recorded in the log
+
+        Returns:
+            True if a model was evicted
+        """
+        with self._lock:
+            resident = self._models.pop(key, None)
+            if resident is None:
+                return False
+            self._evictions += 1
+            in_use = resident.in_use
+        for listener in self._eviction_listeners:
+            try:
+                listener(key)
+            except Exception as e:
+                log.warning(f"[ModelRegistry] Eviction listener failed for {key}: {e}")
+
+        if in_use:
+            log.info(
+                f"[ModelRegistry] Evicted model {key} ({reason}); closing it once "
+                f"{in_use} call(s) using it finish"
+            )
+            return True
+        self._dispose(key, resident, reason)
+        return True
+
+    def _dispose(self, key: str, resident: _ResidentModel, reason: str) -> None:
+        """Close an evicted model and reclaim its memory, off the event loop if one is running."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self._close_and_reclaim(key, resident, reason)
+        else:
+            loop.run_in_executor(None, self._close_and_reclaim, key, resident, reason)
+
+    def _close_and_reclaim(self, key: str, resident: _ResidentModel, reason: str) -> None:
+        """Blocking part of an eviction: close the model and return freed memory to the OS."""
+        rss_before = _current_rss_bytes()
+        model, resident.model = resident.model, None
+
+        # Backends holding outside resources (such as worker processes) release them here
+        close = getattr(model, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                log.warning(f"[ModelRegistry] Failed to close model {key}: {e}")
+
+        # Drop the last registry reference before collecting so the model can be freed
+        del model, close
+        _release_freed_memory()
+        rss_after = _current_rss_bytes()
+        if rss_before is not None and rss_after is not None:
+            reclaimed = max(0, rss_before - rss_after)
+            with self._stats_lock:
+                self._reclaimed_bytes += reclaimed
+            reclaimed_text = f", reclaimed {reclaimed / (1024 * 1024):.1f} MB RSS"
+        else:
+            reclaimed_text = ""
+        log.info(
+            f"[ModelRegistry] Evicted model {key} ({reason}, "
+            f"~{resident.size_bytes / (1024 * 1024):.1f} MB{reclaimed_text})"
+        )
+
+    def resident_bytes(self) -> int:
+        """Total estimated size of resident models."""
+        with self._lock:
+            return sum(resident.size_bytes for resident in self._models.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return residency, hit/miss and load-time statistics."""
+        with self._lock:
+            residents = list(self._models.items())
+        return {
+            "max_resident_models": self.max_resident_models,
+            "max_memory_mb": self.max_memory_mb,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "resident_models": [
+                {
+                    "key": key,
+                    "size_mb": round(resident.size_bytes / (1024 * 1024), 2),
+                    "load_seconds": round(resident.load_seconds, 3),
+                    "loaded_at": resident.loaded_at,
+                    "idle_seconds": round(time.monotonic() - resident.last_used, 1),
+                    "in_use": resident.in_use,
+                }
+                for key, resident in residents
+            ],
+            "resident_mb": round(self.resident_bytes() / (1024 * 1024), 2),
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "idle_unloads": self._idle_unloads,
+            "reclaimed_mb": round(self._reclaimed_bytes / (1024 * 1024), 2),
+            "load_seconds": {
+                key: {
+                    "loads": len(times),
+                    "last": round(times[-1], 3),
+                    "average": round(sum(times) / len(times), 3),
+                }
+                for key, times in self._load_seconds.items()
+            },
+        }
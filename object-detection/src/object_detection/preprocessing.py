@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .backends import DetectionResult
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DECODE_WORKERS = 4
+# File extensions treated as still images when listing artifacts or directories
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".gif", ".tif", ".tiff")
+
+
+class PreparedImage:
+    """
+    A decoded image ready for inference.
+
+    Attributes:
+        array: HxWx3 RGB uint8 array, possibly smaller than the original
+        original_size: (width, height) of the encoded image
+    """
+
+    __slots__ = ("array", "original_size")
+
+    def __init__(self, array: np.ndarray, original_size: Tuple[int, int]):
+        self.array = array
+        self.original_size = original_size
+
+    @property
+    def was_reduced(self) -> bool:
+        return (self.array.shape[1], self.array.shape[0]) != self.original_size
+
+
+def decode_image(image_bytes: bytes, target_size: Optional[int] = None) -> PreparedImage:
+    """
+    Decode an encoded image to an RGB array, shrinking it to the model resolution.
+
+    For JPEGs, ``draft()`` makes libjpeg decode at 1/2, 1/4 or 1/8 scale, so a
+    large photo is never fully decoded when the model only sees ~640 px. The
+    result is then resized so its longest side equals target_size, which is
+    what letterboxing would do inside predict anyway.
+
+    Args:
+        image_bytes: Encoded image
+        target_size: Longest side of the returned array; None keeps full resolution
+
+    Returns:
+        The prepared image
+    """
+    with Image.open(BytesIO(image_bytes)) as image:
+        original_size = image.size
+        width, height = original_size
+        if target_size and max(width, height) > target_size:
+            scale = target_size / max(width, height)
+            new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            # draft() only reduces to a size >= the requested one; no-op for non-JPEG
+            image.draft("RGB", new_size)
+            decoded = image.convert("RGB")
+            if decoded.size != new_size:
+                decoded = decoded.resize(new_size, Image.BILINEAR)
+        else:
+            decoded = image.convert("RGB")
+    return PreparedImage(np.asarray(decoded), original_size)
+
+
+def restore_coordinates(result: DetectionResult, prepared: PreparedImage) -> DetectionResult:
+    """Scale detections on a reduced image back to the original image's pixel coordinates."""
+    width, height = prepared.original_size
+    if not prepared.was_reduced:
+        return result
+    scale_x = width / prepared.array.shape[1]
+    scale_y = height / prepared.array.shape[0]
+    xyxy = result.xyxy * np.array([scale_x, scale_y, scale_x, scale_y], dtype=np.float32)
+    return DetectionResult(xyxy.astype(np.float32), result.conf, result.cls, (height, width))
+
+
+# Decoding runs in its own small pools so it neither blocks the event loop nor
+# queues behind inference jobs in the default executor. Tools asking for
+# different decode_workers each get their own pool rather than replacing another's
+_decode_executors: Dict[int, ThreadPoolExecutor] = {}
+_decode_executors_lock = threading.Lock()
+
+
+def _get_decode_executor(workers: Optional[int] = None) -> ThreadPoolExecutor:
+    """Return the decode pool for a worker count, creating it on first use."""
+    workers = max(1, int(workers)) if workers else DEFAULT_DECODE_WORKERS
+    with _decode_executors_lock:
+        executor = _decode_executors.get(workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="od-decode")
+            _decode_executors[workers] = executor
+        return executor
+
+
+async def decode_image_async(
+    image_bytes: bytes,
+    target_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> PreparedImage:
+    """
+    Decode an image in the decode worker pool.
+
+    Args:
+        image_bytes: Encoded image
+        target_size: Longest side of the returned array; None keeps full resolution
+        workers: Size of the decode pool (default: 4)
+
+    Returns:
+        The prepared image
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_decode_executor(workers), decode_image, image_bytes, target_size
+    )
@@ -0,0 +1,437 @@
+"""
+Multi-process detection workers.
+
+Each worker process loads its own copy of the model, so inference and the
+GIL-bound pre/post-processing of one request do not hold back the others.
+Images are handed to workers through shared memory and only the small
+detection arrays come back through the pipe.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .backends import DetectionResult, load_backend
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PROCESS_WORKERS = 2
+DEFAULT_READY_TIMEOUT_SECONDS = 600.0
+RESTART_BACKOFF_SECONDS = 1.0
+MAX_RESTART_BACKOFF_SECONDS = 30.0
+DEFAULT_MAX_RESTARTS = 5
+
+# (offset, shape, dtype) of each image inside a shared memory block
+ImageLayout = List[Tuple[int, Tuple[int, ...], str]]
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised for a request whose worker process died before answering."""
+
+
+class ProcessPoolFailedError(WorkerCrashedError):
+    """Raised for requests to a pool whose workers all exhausted their restarts."""
+
+
+def _process_rss_bytes(pid: int) -> Optional[int]:
+    """Resident set size of another process, or None if it cannot be read."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+def _pack_images(images: Sequence[Any]) -> Tuple[shared_memory.SharedMemory, ImageLayout]:
+    """Copy images into one new shared memory block and describe where each one lives."""
+    arrays = [
+        np.ascontiguousarray(image if isinstance(image, np.ndarray) else np.asarray(image.convert("RGB")))
+        for image in images
+    ]
+    block = shared_memory.SharedMemory(create=True, size=max(1, sum(array.nbytes for array in arrays)))
+    layout: ImageLayout = []
+    offset = 0
+    for array in arrays:
+        np.ndarray(array.shape, array.dtype, buffer=block.buf, offset=offset)[...] = array
+        layout.append((offset, array.shape, array.dtype.str))
+        offset += array.nbytes
+    return block, layout
+
+
+def _worker_main(
+    model_name: str,
+    load_options: Dict[str, Any],
+    threads: Optional[int],
+    conn: Any,
+) -> None:
+    """Worker process: load the model, then answer predict requests until told to stop."""
+    if threads:
+        try:
+            import torch
+
+            torch.set_num_threads(int(threads))
+        except ImportError:
+            pass
+    try:
+        from ultralytics import YOLO
+
+        model = load_backend(YOLO, model_name, **load_options)
+    except Exception as e:
+        conn.send(("failed", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", {"pid": os.getpid(), "names": dict(model.names)}))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        job_id, block_name, layout, conf, classes = message
+        block = shared_memory.SharedMemory(name=block_name)
+        try:
+            images = [
+                np.ndarray(shape, np.dtype(dtype), buffer=block.buf, offset=offset)
+                for offset, shape, dtype in layout
+            ]
+            results = model.predict(images, conf=conf, classes=classes)
+            images = None
+            payload = [(r.xyxy, r.conf, r.cls, tuple(r.orig_shape)) for r in results]
+            conn.send((job_id, True, payload))
+        except Exception as e:
+            images = None
+            conn.send((job_id, False, f"{type(e).__name__}: {e}"))
+        finally:
+            try:
+                block.close()
+            except BufferError:
+                # A backend still references the buffer; it is released once collected
+                pass
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.process: Optional[Any] = None
+        self.conn: Optional[Any] = None
+        self.pid: Optional[int] = None
+        self.ready = False
+        self.pending: Dict[int, Future] = {}
+        self.send_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0
+        self.consecutive_crashes = 0
+        self.gave_up = False
+        self.restart_timer: Optional[threading.Timer] = None
+
+
+class DetectionProcessPool:
+    """
+    A pool of worker processes that each hold their own copy of a model.
+
+    The pool exposes the same ``names`` and ``predict(images, conf, classes)``
+    interface as the in-process backends, so it is cached by the model registry
+    and used by the tools like any other model. Requests go to the ready worker
+    with the fewest requests in flight. A worker that dies is restarted (with
+    backoff if it keeps dying), and requests it was handling are retried once
+    on another worker. A worker that dies ``max_restarts`` times in a row is
+    given up on; once every worker has been given up on, the pool is failed and
+    requests raise ProcessPoolFailedError instead of waiting.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        load_options: Optional[Dict[str, Any]] = None,
+        workers: int = DEFAULT_PROCESS_WORKERS,
+        threads_per_worker: Optional[int] = None,
+        ready_timeout: float = DEFAULT_READY_TIMEOUT_SECONDS,
+        max_restarts: int = DEFAULT_MAX_RESTARTS,
+    ):
+        """
+        Start the worker processes and wait until one has loaded the model.
+
+        Args:
+            model_name: Standard model name or path to a custom checkpoint
+            load_options: Keyword arguments for load_backend in each worker
+            workers: Number of worker processes
+            threads_per_worker: torch intra-op threads per worker
+                (default: CPU count divided by workers)
+            ready_timeout: Seconds to wait for a worker to become ready
+            max_restarts: Consecutive crashes after which a worker is not restarted
+        """
+        # Callables cannot be sent to another process; workers quantize from
+        # calibration_dir or reuse an already cached quantized model
+        self.load_options = {
+            key: value for key, value in (load_options or {}).items() if key != "calibration_source"
+        }
+        self.model_name = model_name
+        self.workers = max(1, int(workers))
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+        self.ready_timeout = ready_timeout
+        self.max_restarts = max(0, int(max_restarts))
+        self.names: Dict[int, str] = {}
+        self.ckpt_path = None
+
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ready_changed = threading.Condition(self._lock)
+        self._job_ids = itertools.count()
+        self._closed = False
+        self._failed = False
+        self._workers = [_Worker(worker_id) for worker_id in range(self.workers)]
+        for worker in self._workers:
+            self._start(worker)
+
+        with self._ready_changed:
+            self._ready_changed.wait_for(
+                lambda: any(w.ready for w in self._workers) or self._all_failed(), ready_timeout
+            )
+            started = any(w.ready for w in self._workers)
+        if not started:
+            self.close()
+            raise RuntimeError(f"No detection worker could load model '{model_name}'.")
+        log.info(
+            f"[ProcessPool] Started {self.workers} worker processes for {model_name} "
+            f"({self.threads_per_worker} threads each)"
+        )
+
+    def _all_failed(self) -> bool:
+        return all(worker.consecutive_crashes > 0 for worker in self._workers)
+
+    @property
+    def failed(self) -> bool:
+        """Whether every worker exhausted its restarts, so the pool cannot serve requests."""
+        return self._failed
+
+    def _start(self, worker: _Worker) -> None:
+        """Spawn the worker process and the thread that reads its replies."""
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.model_name, self.load_options, self.threads_per_worker, child_conn),
+            name=f"od-detect-{worker.worker_id}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker.process, worker.conn = process, parent_conn
+        threading.Thread(
+            target=self._read_replies,
+            args=(worker, parent_conn, process),
+            name=f"od-detect-reader-{worker.worker_id}",
+            daemon=True,
+        ).start()
+
+    def _read_replies(self, worker: _Worker, conn: Any, process: Any) -> None:
+        """Resolve request futures from a worker's replies until its pipe closes."""
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "ready":
+                with self._ready_changed:
+                    worker.pid = message[1]["pid"]
+                    worker.ready = True
+                    self.names = message[1]["names"]
+                    self._ready_changed.notify_all()
+                continue
+            if message[0] == "failed":
+                log.error(f"[ProcessPool] Worker {worker.worker_id} failed to load model: {message[1]}")
+                break
+            job_id, succeeded, payload = message
+            with self._lock:
+                future = worker.pending.pop(job_id, None)
+                worker.consecutive_crashes = 0
+                if succeeded:
+                    worker.completed += 1
+                else:
+                    worker.failed += 1
+            if future is None:
+                continue
+            if succeeded:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"Detection worker error: {payload}"))
+        conn.close()
+        self._handle_exit(worker, process)
+
+    def _handle_exit(self, worker: _Worker, process: Any) -> None:
+        """Fail the requests of a worker that exited and restart it unless the pool is closed."""
+        process.join(timeout=5)
+        with self._ready_changed:
+            worker.ready = False
+            pending = list(worker.pending.values())
+            worker.pending.clear()
+            worker.consecutive_crashes += 1
+            self._ready_changed.notify_all()
+        for future in pending:
+            future.set_exception(
+                WorkerCrashedError(
+                    f"Detection worker {worker.worker_id} (pid {process.pid}) exited "
+                    f"with code {process.exitcode}"
+                )
+            )
+        if self._closed:
+            return
+
+        if worker.consecutive_crashes > self.max_restarts:
+            with self._ready_changed:
+                worker.gave_up = True
+                self._failed = all(w.gave_up for w in self._workers)
+                self._ready_changed.notify_all()
+            log.error(
+                f"[ProcessPool] Worker {worker.worker_id} (pid {process.pid}) exited with code "
+                f"{process.exitcode} after {self.max_restarts} restarts; not restarting it"
+            )
+            if self._failed:
+                log.error(f"[ProcessPool] Every worker for {self.model_name} failed; the pool is unusable")
+            return
+
+        backoff = min(
+            MAX_RESTART_BACKOFF_SECONDS,
+            RESTART_BACKOFF_SECONDS * 2 ** (worker.consecutive_crashes - 1),
+        )
+        log.warning(
+            f"[ProcessPool] Worker {worker.worker_id} (pid {process.pid}) exited with code "
+            f"{process.exitcode}; {len(pending)} request(s) affected, restarting in {backoff:g}s"
+        )
+        # Wait on a timer so this reader thread ends now instead of sleeping through the backoff
+        worker.restart_timer = threading.Timer(backoff, self._restart, args=(worker,))
+        worker.restart_timer.daemon = True
+        worker.restart_timer.start()
+
+    def _restart(self, worker: _Worker) -> None:
+        """Start a crashed worker again once its backoff has passed, unless the pool was closed."""
+        with self._lock:
+            if self._closed:
+                return
+            worker.restarts += 1
+        self._start(worker)
+
+    def _submit(self, block_name: str, layout: ImageLayout, conf: float, classes: Optional[List[int]]) -> Future:
+        """Send a request to the least busy ready worker."""
+        future: Future = Future()
+        job_id = next(self._job_ids)
+        with self._ready_changed:
+            if not self._ready_changed.wait_for(
+                lambda: self._closed or self._failed or any(w.ready for w in self._workers),
+                self.ready_timeout,
+            ) or self._closed:
+                raise WorkerCrashedError("No detection worker is available.")
+            if self._failed and not any(w.ready for w in self._workers):
+                raise ProcessPoolFailedError(
+                    f"Every detection worker for model '{self.model_name}' failed "
+                    f"{self.max_restarts + 1} times in a row."
+                )
+            worker = min((w for w in self._workers if w.ready), key=lambda w: len(w.pending))
+            worker.pending[job_id] = future
+            conn = worker.conn
+        try:
+            with worker.send_lock:
+                conn.send((job_id, block_name, layout, conf, classes))
+        except (OSError, ValueError) as e:
+            with self._lock:
+                worker.pending.pop(job_id, None)
+            raise WorkerCrashedError(f"Could not reach detection worker {worker.worker_id}: {e}") from e
+        return future
+
+    def predict(
+        self,
+        images: Sequence[Any],
+        conf: float,
+        classes: Optional[List[int]] = None,
+    ) -> List[DetectionResult]:
+        """Run inference on a batch of images in a worker process (blocking)."""
+        block, layout = _pack_images(images)
+        try:
+            for attempt in range(2):
+                try:
+                    payload = self._submit(block.name, layout, conf, classes).result()
+                    break
+                except WorkerCrashedError as e:
+                    if attempt or isinstance(e, ProcessPoolFailedError):
+                        raise
+                    log.warning(f"[ProcessPool] {e}; retrying on another worker")
+        finally:
+            block.close()
+            block.unlink()
+        return [DetectionResult(xyxy, scores, cls, orig_shape) for xyxy, scores, cls, orig_shape in payload]
+
+    def close(self) -> None:
+        """Stop every worker process."""
+        with self._ready_changed:
+            self._closed = True
+            self._ready_changed.notify_all()
+        for worker in self._workers:
+            if worker.restart_timer is not None:
+                worker.restart_timer.cancel()
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except (OSError, ValueError, AttributeError):
+                pass
+        for worker in self._workers:
+            if worker.process is None:
+                continue
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        log.info(f"[ProcessPool] Stopped worker processes for {self.model_name}")
+
+    def resident_bytes(self) -> int:
+        """
+        Estimate the memory held by the worker processes.
+
+        Sums the resident size of every ready worker. A worker still loading
+        (or restarting) is counted at the size of the largest ready one, since
+        each holds its own copy of the same model.
+        """
+        with self._lock:
+            pids = [worker.pid if worker.ready else None for worker in self._workers]
+        sizes = [_process_rss_bytes(pid) for pid in pids if pid is not None]
+        sizes = [size for size in sizes if size]
+        if not sizes:
+            return 0
+        return sum(sizes) + max(sizes) * (len(pids) - len(sizes))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return per-worker state, load and restart counts."""
+        with self._lock:
+            return {
+                "model_name": self.model_name,
+                "failed": self._failed,
+                "threads_per_worker": self.threads_per_worker,
+                "workers": [
+                    {
+                        "worker_id": worker.worker_id,
+                        "pid": worker.pid,
+                        "ready": worker.ready,
+                        "in_flight": len(worker.pending),
+                        "completed": worker.completed,
+                        "failed": worker.failed,
+                        "restarts": worker.restarts,
+                        "gave_up": worker.gave_up,
+                    }
+                    for worker in self._workers
+                ],
+            }
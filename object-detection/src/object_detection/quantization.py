@@ -0,0 +1,413 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .backends import DetectionResult, letterbox
+from .preprocessing import IMAGE_EXTENSIONS, decode_image
+
+log = logging.getLogger(__name__)
+
+# int8 quantization modes selectable through tool_config "quantization.mode"
+QUANTIZATION_MODES = ("dynamic", "static")
+
+DEFAULT_CALIBRATION_IMAGES = 64
+DEFAULT_VALIDATION_IMAGES = 50
+DEFAULT_MATCH_IOU = 0.5
+
+# Accuracy reports of every quantized model built or loaded in this process
+_reports: Dict[str, Dict[str, Any]] = {}
+
+
+def get_quantization_reports() -> Dict[str, Dict[str, Any]]:
+    """Return the accuracy report of each quantized model, keyed by model file."""
+    return dict(_reports)
+
+
+def quantization_variant(backend: str, quantization_config: Optional[Dict[str, Any]]) -> str:
+    """
+    Registry variant of a backend with the configured quantization applied.
+
+    Statically quantized models get a short tag of their calibration source,
+    so models calibrated on different image sets are kept (and cached) apart.
+
+    Raises:
+        ValueError: If the mode is unknown or the backend cannot be quantized
+    """
+    mode = (quantization_config or {}).get("mode")
+    if not mode:
+        return backend
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(
+            f"Unsupported quantization mode '{mode}'. Supported: {', '.join(QUANTIZATION_MODES)}"
+        )
+    if backend != "onnx":
+        raise ValueError("int8 quantization requires the 'onnx' backend.")
+    if mode == "static":
+        return f"{backend}-int8-static-{calibration_tag(quantization_config)}"
+    return f"{backend}-int8-dynamic"
+
+
+def calibration_tag(quantization_config: Dict[str, Any]) -> str:
+    """Short hash identifying the calibration images of a static quantization config."""
+    source = {
+        "artifacts": sorted(quantization_config.get("calibration_artifacts") or []),
+        "dir": quantization_config.get("calibration_dir"),
+        "images": quantization_config.get("calibration_images", DEFAULT_CALIBRATION_IMAGES),
+        "exclude": sorted(quantization_config.get("exclude_nodes") or []),
+    }
+    return hashlib.sha256(json.dumps(source, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+
+
+def _image_files(directory: str, limit: int) -> List[Path]:
+    """First ``limit`` image files of a directory, in name order."""
+    files = sorted(
+        path for path in Path(directory).iterdir() if path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    return files[:limit]
+
+
+def load_image_dir(directory: str, limit: int, target_size: Optional[int] = None) -> List[np.ndarray]:
+    """
+    Decode up to ``limit`` images of a local directory to RGB arrays.
+
+    Args:
+        directory: Directory holding the images
+        limit: Maximum number of images
+        target_size: Longest side of the decoded arrays (default: full resolution)
+
+    Returns:
+        HxWx3 RGB uint8 arrays
+    """
+    return [decode_image(path.read_bytes(), target_size).array for path in _image_files(directory, limit)]
+
+
+class _CalibrationReader:
+    """Feeds letterboxed calibration images to the ONNX Runtime calibrator one at a time."""
+
+    def __init__(self, input_name: str, images: Sequence[np.ndarray], image_size: int):
+        self.input_name = input_name
+        self.images = images
+        self.image_size = image_size
+        self._next = 0
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        if self._next >= len(self.images):
+            return None
+        canvas, _, _ = letterbox(self.images[self._next], self.image_size)
+        self._next += 1
+        batch = np.ascontiguousarray(canvas.transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+        return {self.input_name: batch}
+
+    def rewind(self) -> None:
+        self._next = 0
+
+
+def quantize_onnx_model(
+    model_file: str,
+    quantization_config: Dict[str, Any],
+    image_size: int,
+    calibration_source: Optional[Callable[[], List[np.ndarray]]] = None,
+) -> str:
+    """
+    Quantize an exported ONNX model to int8 once and cache it next to the float model.
+
+    Dynamic mode quantizes weights ahead of time and activations on the fly.
+    Static mode also fixes activation ranges from calibration images, which is
+    faster at inference time but needs representative images.
+
+    Args:
+        model_file: Path to the float ONNX export
+        quantization_config: The tool config "quantization" section
+        image_size: Square model input size
+        calibration_source: Callable returning RGB arrays to calibrate on (static mode);
+                            only called when no cached model exists
+
+    Returns:
+        Path to the quantized model
+    """
+    mode = quantization_config["mode"]
+    source = Path(model_file)
+    suffix = f"int8-{mode}" if mode == "dynamic" else f"int8-static-{calibration_tag(quantization_config)}"
+    target = source.with_name(f"{source.stem}.{suffix}.onnx")
+    if target.exists():
+        log.info(f"[ObjectDetection:quantize] Using cached {mode} int8 model: {target}")
+        return str(target)
+
+    try:
+        from onnxruntime.quantization import (
+            CalibrationMethod,
+            QuantFormat,
+            QuantType,
+            quantize_dynamic,
+            quantize_static,
+        )
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+    except ImportError as e:
+        raise ImportError(
+            "int8 quantization requires onnxruntime. Install it with: pip install onnxruntime"
+        ) from e
+
+    # Shape inference and graph folding first, as recommended before quantizing
+    prepared = source.with_name(f"{source.stem}.preprocessed.onnx")
+    partial = target.with_name(f"{target.name}.partial")
+    exclude_nodes = list(quantization_config.get("exclude_nodes") or [])
+    started = time.perf_counter()
+    try:
+        quant_pre_process(str(source), str(prepared))
+        if mode == "dynamic":
+            quantize_dynamic(
+                str(prepared),
+                str(partial),
+                weight_type=QuantType.QInt8,
+                nodes_to_exclude=exclude_nodes,
+            )
+        else:
+            images = calibration_source() if calibration_source is not None else []
+            if not images:
+                raise ValueError(
+                    "Static quantization needs calibration images: set quantization "
+                    "'calibration_artifacts' or 'calibration_dir'."
+                )
+            import onnxruntime as ort
+
+            input_name = ort.InferenceSession(
+                str(prepared), providers=["CPUExecutionProvider"]
+            ).get_inputs()[0].name
+            reader = _CalibrationReader(input_name, images, image_size)
+            log.info(f"[ObjectDetection:quantize] Calibrating on {len(images)} image(s)")
+            quantize_static(
+                str(prepared),
+                str(partial),
+                reader,
+                quant_format=QuantFormat.QDQ,
+                activation_type=QuantType.QUInt8,
+                weight_type=QuantType.QInt8,
+                per_channel=True,
+                calibrate_method=CalibrationMethod.MinMax,
+                nodes_to_exclude=exclude_nodes,
+            )
+        os.replace(partial, target)
+    finally:
+        for leftover in (prepared, partial):
+            if leftover.exists():
+                leftover.unlink()
+
+    log.info(
+        f"[ObjectDetection:quantize] Cached {mode} int8 model at {target} "
+        f"({source.stat().st_size / 1e6:.1f} MB -> {target.stat().st_size / 1e6:.1f} MB, "
+        f"{time.perf_counter() - started:.1f}s)"
+    )
+    return str(target)
+
+
+def _box_iou(boxes: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes."""
+    top_left = np.maximum(boxes[:, None, :2], others[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], others[None, :, 2:])
+    inter = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    area = np.clip(boxes[:, 2:] - boxes[:, :2], 0, None).prod(axis=1)
+    other_area = np.clip(others[:, 2:] - others[:, :2], 0, None).prod(axis=1)
+    return inter / (area[:, None] + other_area[None, :] - inter + 1e-9)
+
+
+def match_detections(
+    reference: Sequence[DetectionResult],
+    candidate: Sequence[DetectionResult],
+    iou_threshold: float = DEFAULT_MATCH_IOU,
+) -> Dict[str, Any]:
+    """
+    Match candidate detections to reference detections of the same class.
+
+    Candidates are matched greedily in descending confidence order to the
+    unmatched reference box of the same class with the highest IoU.
+
+    Args:
+        reference: Per-image reference detections (ground truth or float model output)
+        candidate: Per-image detections to score, in the same image order
+        iou_threshold: Minimum IoU for a match
+
+    Returns:
+        Dictionary with box counts, precision, recall, f1, mean IoU of matches and
+        mean absolute confidence difference of matches
+    """
+    matched = reference_total = candidate_total = 0
+    ious: List[float] = []
+    confidence_deltas: List[float] = []
+    for ref, cand in zip(reference, candidate):
+        reference_total += len(ref)
+        candidate_total += len(cand)
+        if not len(ref) or not len(cand):
+            continue
+        iou = _box_iou(cand.xyxy, ref.xyxy)
+        iou[cand.cls[:, None] != ref.cls[None, :]] = 0.0
+        taken = np.zeros(len(ref), dtype=bool)
+        for index in np.argsort(-cand.conf):
+            row = np.where(taken, 0.0, iou[index])
+            best = int(row.argmax())
+            if row[best] >= iou_threshold:
+                taken[best] = True
+                matched += 1
+                ious.append(float(row[best]))
+                confidence_deltas.append(abs(float(cand.conf[index]) - float(ref.conf[best])))
+
+    precision = matched / candidate_total if candidate_total else 1.0
+    recall = matched / reference_total if reference_total else 1.0
+    return {
+        "reference_boxes": reference_total,
+        "candidate_boxes": candidate_total,
+        "matched_boxes": matched,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1": round(2 * precision * recall / (precision + recall), 4) if precision + recall else 0.0,
+        "mean_iou": round(float(np.mean(ious)), 4) if ious else None,
+        "mean_confidence_delta": round(float(np.mean(confidence_deltas)), 4) if confidence_deltas else None,
+    }
+
+
+def load_yolo_labels(label_file: Path, orig_shape: Sequence[int]) -> Optional[DetectionResult]:
+    """
+    Read a YOLO-format label file ("class cx cy w h" normalized per line).
+
+    Returns:
+        Ground-truth boxes in pixel coordinates, or None if the file does not exist
+    """
+    if not label_file.exists():
+        return None
+    rows = np.loadtxt(label_file, dtype=np.float32, ndmin=2).reshape(-1, 5)
+    height, width = orig_shape
+    centers, sizes = rows[:, 1:3], rows[:, 3:5]
+    xyxy = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+    xyxy *= np.array([width, height, width, height], dtype=np.float32)
+    return DetectionResult(
+        xyxy.astype(np.float32), np.ones(len(rows), np.float32), rows[:, 0].astype(np.int64),
+        (height, width),
+    )
+
+
+def _timed_predict(backend: Any, images: Sequence[np.ndarray], conf: float) -> Any:
+    """Predict image by image, returning (results, mean milliseconds per image)."""
+    results = []
+    started = time.perf_counter()
+    for image in images:
+        results.extend(backend.predict([image], conf=conf))
+    return results, (time.perf_counter() - started) * 1000.0 / max(1, len(images))
+
+
+def evaluate_quantized_model(
+    float_backend: Any,
+    quantized_backend: Any,
+    validation_dir: str,
+    max_images: int = DEFAULT_VALIDATION_IMAGES,
+    conf: float = 0.25,
+) -> Dict[str, Any]:
+    """
+    Compare a quantized model against its float model on a local validation set.
+
+    Quantized detections are always scored against the float model's detections
+    (how much the output changed). When YOLO-format label files are present
+    (``<image>.txt`` next to the image or in a sibling ``labels`` directory),
+    both models are also scored against the labels and the accuracy delta is
+    reported.
+
+    Args:
+        float_backend: Backend running the float model
+        quantized_backend: Backend running the quantized model
+        validation_dir: Directory of validation images
+        max_images: Maximum validation images
+        conf: Confidence threshold for both models
+
+    Returns:
+        The accuracy and latency report
+    """
+    files = _image_files(validation_dir, max_images)
+    if not files:
+        raise ValueError(f"No validation images found in '{validation_dir}'.")
+    images = [decode_image(path.read_bytes()).array for path in files]
+
+    float_results, float_ms = _timed_predict(float_backend, images, conf)
+    quantized_results, quantized_ms = _timed_predict(quantized_backend, images, conf)
+    report: Dict[str, Any] = {
+        "validation_images": len(images),
+        "float_ms_per_image": round(float_ms, 2),
+        "quantized_ms_per_image": round(quantized_ms, 2),
+        "speedup": round(float_ms / quantized_ms, 2) if quantized_ms else None,
+        "agreement_with_float": match_detections(float_results, quantized_results),
+    }
+
+    labels = []
+    for path, image in zip(files, images):
+        label = load_yolo_labels(path.with_suffix(".txt"), image.shape[:2])
+        if label is None:
+            label = load_yolo_labels(path.parent.parent / "labels" / f"{path.stem}.txt", image.shape[:2])
+        labels.append(label)
+    labelled = [index for index, label in enumerate(labels) if label is not None]
+    if labelled:
+        ground_truth = [labels[index] for index in labelled]
+        float_scores = match_detections(ground_truth, [float_results[index] for index in labelled])
+        quantized_scores = match_detections(ground_truth, [quantized_results[index] for index in labelled])
+        report["labelled_images"] = len(labelled)
+        report["float_vs_labels"] = float_scores
+        report["quantized_vs_labels"] = quantized_scores
+        report["accuracy_delta"] = {
+            metric: round(quantized_scores[metric] - float_scores[metric], 4)
+            for metric in ("precision", "recall", "f1")
+        }
+    return report
+
+
+def load_or_evaluate_report(
+    quantized_file: str,
+    float_backend_factory: Callable[[], Any],
+    quantized_backend: Any,
+    quantization_config: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Return the cached accuracy report of a quantized model, evaluating it if missing.
+
+    The report is written next to the quantized model so the validation run only
+    happens once per model and validation set. Returns None when no validation_dir
+    is configured.
+    """
+    validation_dir = quantization_config.get("validation_dir")
+    if not validation_dir:
+        return None
+    max_images = quantization_config.get("validation_images", DEFAULT_VALIDATION_IMAGES)
+    report_file = Path(f"{quantized_file}.report.json")
+    source = {"validation_dir": os.path.realpath(validation_dir), "max_images": max_images}
+
+    report = None
+    if report_file.exists():
+        with open(report_file) as f:
+            cached = json.load(f)
+        if cached.get("source") == source:
+            report = cached
+
+    if report is None:
+        log.info(f"[ObjectDetection:quantize] Evaluating {quantized_file} on {validation_dir}")
+        report = {
+            "source": source,
+            "mode": quantization_config["mode"],
+            **evaluate_quantized_model(
+                float_backend_factory(),
+                quantized_backend,
+                validation_dir,
+                max_images,
+                quantization_config.get("validation_confidence", 0.25),
+            ),
+        }
+        with open(report_file, "w") as f:
+            json.dump(report, f, indent=2)
+
+    _reports[quantized_file] = report
+    log.info(
+        f"[ObjectDetection:quantize] {Path(quantized_file).name}: "
+        f"{report['speedup']}x speedup, agreement with float model "
+        f"{report['agreement_with_float']}, accuracy delta {report.get('accuracy_delta', 'n/a (no labels)')}"
+    )
+    return report
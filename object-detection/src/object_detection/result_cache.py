@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .backends import DetectionResult
+
+log = logging.getLogger(__name__)
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """SHA-256 of the encoded image bytes, used as the image part of cache keys."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class DetectionCache:
+    """
+    LRU cache of raw detection results.
+
+    Entries hold the full detection output for an image (every class, box and
+    confidence above the threshold), so later requests for any subset of classes,
+    with or without bounding boxes, are answered without running inference.
+    Keys combine the image content hash, the model key and the inference
+    parameters. When ``persist_dir`` is set, entries are also written as ``.npz``
+    files and reloaded on a memory miss, so they survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 1024, persist_dir: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of results kept in memory
+            persist_dir: Optional directory for on-disk persistence
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.persist_dir = persist_dir
+        self._entries: "OrderedDict[str, DetectionResult]" = OrderedDict()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(image_sha256: str, model_key: str, confidence_threshold: float, image_size: Any = None) -> str:
+        """
+        Build the cache key for one image and set of inference parameters.
+
+        Args:
+            image_sha256: Content hash of the encoded image
+            model_key: Model registry key (model path and backend)
+            confidence_threshold: Confidence threshold used for inference
+            image_size: Model input size, which changes exported-backend results
+        """
+        parameters = f"{model_key}|conf={float(confidence_threshold)!r}|imgsz={image_size}"
+        return f"{image_sha256}-{hashlib.sha256(parameters.encode('utf-8')).hexdigest()[:16]}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.persist_dir, f"{key}.npz")
+
+    async def get(self, key: str) -> Optional[DetectionResult]:
+        """
+        Return the cached result for a key, or None.
+
+        Checks memory first, then the persistence directory if configured; the
+        file is read in a worker thread.
+        """
+        result = self._entries.get(key)
+        if result is not None:
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return result
+
+        if self.persist_dir:
+            result = await asyncio.to_thread(self._load, key)
+            if result is not None:
+                self._disk_hits += 1
+                self._store(key, result)
+                return result
+
+        self._misses += 1
+        return None
+
+    def _load(self, key: str) -> Optional[DetectionResult]:
+        """Read one persisted entry, or None if it is missing or unreadable."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return DetectionResult(
+                    data["xyxy"], data["conf"], data["cls"], tuple(int(v) for v in data["orig_shape"])
+                )
+        except Exception as e:
+            log.warning(f"[DetectionCache] Ignoring unreadable cache file {path}: {e}")
+            return None
+
+    async def put(self, key: str, result: DetectionResult) -> None:
+        """Store a result in memory and, if configured, on disk in a worker thread."""
+        self._store(key, result)
+        if self.persist_dir:
+            await asyncio.to_thread(self._persist, key, result)
+
+    def _persist(self, key: str, result: DetectionResult) -> None:
+        """Write one entry as an .npz file, atomically replacing any previous one."""
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            np.savez(
+                temp_path,
+                xyxy=result.xyxy,
+                conf=result.conf,
+                cls=result.cls,
+                orig_shape=np.asarray(result.orig_shape, dtype=np.int64),
+            )
+            os.replace(temp_path, path)
+        except OSError as e:
+            log.warning(f"[DetectionCache] Could not persist cache entry {key}: {e}")
+
+    def _store(self, key: str, result: DetectionResult) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        self._enforce_limit()
+
+    def _enforce_limit(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self) -> None:
+        """Drop every in-memory entry; persisted files are kept."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss statistics."""
+        lookups = self._hits + self._disk_hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "persist_dir": self.persist_dir,
+            "hits": self._hits,
+            "disk_hits": self._disk_hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "hit_rate": round((self._hits + self._disk_hits) / lookups, 3) if lookups else 0.0,
+        }
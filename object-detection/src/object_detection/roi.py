@@ -0,0 +1,144 @@
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .backends import LETTERBOX_FILL, DetectionResult
+
+
+class RoiCrop:
+    """
+    One image cropped to a region of interest.
+
+    Attributes:
+        array: Cropped HxWx3 RGB uint8 array passed to the model
+        offset: (x, y) of the crop's top-left corner in the uncropped array
+        full_shape: (height, width) of the uncropped array
+        mask: Boolean HxW polygon mask of the crop, or None for a box region
+    """
+
+    __slots__ = ("array", "offset", "full_shape", "mask")
+
+    def __init__(
+        self,
+        array: np.ndarray,
+        offset: Tuple[int, int],
+        full_shape: Tuple[int, int],
+        mask: Optional[np.ndarray],
+    ):
+        self.array = array
+        self.offset = offset
+        self.full_shape = full_shape
+        self.mask = mask
+
+    def restore(self, result: DetectionResult) -> DetectionResult:
+        """
+        Map detections on the crop back to the uncropped array.
+
+        For polygon regions, detections whose box center lies outside the polygon
+        are dropped.
+        """
+        offset_x, offset_y = self.offset
+        xyxy = result.xyxy
+        keep = np.ones(len(result), dtype=bool)
+        if self.mask is not None and len(result):
+            height, width = self.mask.shape
+            centers_x = ((xyxy[:, 0] + xyxy[:, 2]) / 2).astype(np.int64).clip(0, width - 1)
+            centers_y = ((xyxy[:, 1] + xyxy[:, 3]) / 2).astype(np.int64).clip(0, height - 1)
+            keep = self.mask[centers_y, centers_x]
+        shifted = xyxy[keep] + np.array([offset_x, offset_y, offset_x, offset_y], dtype=np.float32)
+        return DetectionResult(
+            shifted.astype(np.float32), result.conf[keep], result.cls[keep], self.full_shape
+        )
+
+
+class RegionOfInterest:
+    """
+    A box or polygon region of an image that detection is limited to.
+
+    Points are given in pixels of the original image, or as fractions of its
+    width and height when ``normalized`` is set, and are scaled to whatever
+    resolution the image was decoded at.
+    """
+
+    def __init__(self, points: np.ndarray, is_polygon: bool, normalized: bool = False):
+        self.points = points
+        self.is_polygon = is_polygon
+        self.normalized = normalized
+
+    @classmethod
+    def from_config(cls, roi_config: Optional[Dict[str, Any]]) -> Optional["RegionOfInterest"]:
+        """
+        Build a region from the "region_of_interest" tool config section.
+
+        Args:
+            roi_config: {"box": [x1, y1, x2, y2]} or {"polygon": [[x, y], ...]},
+                        with optional "normalized": true for 0-1 coordinates
+
+        Returns:
+            The region, or None if no region is configured
+
+        Raises:
+            ValueError: If the region is malformed
+        """
+        if not roi_config:
+            return None
+        normalized = bool(roi_config.get("normalized", False))
+        if roi_config.get("box") is not None:
+            box = [float(value) for value in roi_config["box"]]
+            if len(box) != 4 or box[2] <= box[0] or box[3] <= box[1]:
+                raise ValueError("region_of_interest.box must be [x1, y1, x2, y2] with x2 > x1 and y2 > y1.")
+            x1, y1, x2, y2 = box
+            points = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float64)
+            return cls(points, is_polygon=False, normalized=normalized)
+        if roi_config.get("polygon") is not None:
+            points = np.asarray(roi_config["polygon"], dtype=np.float64)
+            if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+                raise ValueError("region_of_interest.polygon must be a list of at least three [x, y] points.")
+            return cls(points, is_polygon=True, normalized=normalized)
+        raise ValueError("region_of_interest needs either 'box' or 'polygon'.")
+
+    def describe(self) -> str:
+        """Stable text form of the region, used in cache keys."""
+        kind = "polygon" if self.is_polygon else "box"
+        return f"{kind}{'-norm' if self.normalized else ''}:{np.round(self.points, 4).tolist()}"
+
+    def crop(self, array: np.ndarray, original_size: Tuple[int, int]) -> RoiCrop:
+        """
+        Crop a decoded image to the region's bounding box, masking pixels outside a polygon.
+
+        Args:
+            array: HxWx3 RGB uint8 array, possibly a reduced decode of the original
+            original_size: (width, height) of the original image
+
+        Returns:
+            The cropped image with what is needed to map detections back
+
+        Raises:
+            ValueError: If the region does not overlap the image
+        """
+        height, width = array.shape[:2]
+        if self.normalized:
+            scale = np.array([width, height], dtype=np.float64)
+        else:
+            scale = np.array([width / original_size[0], height / original_size[1]], dtype=np.float64)
+        points = self.points * scale
+
+        left = max(0, math.floor(points[:, 0].min()))
+        top = max(0, math.floor(points[:, 1].min()))
+        right = min(width, math.ceil(points[:, 0].max()))
+        bottom = min(height, math.ceil(points[:, 1].max()))
+        if right <= left or bottom <= top:
+            raise ValueError("region_of_interest does not overlap the image.")
+
+        cropped = array[top:bottom, left:right]
+        mask = None
+        if self.is_polygon:
+            canvas = Image.new("L", (right - left, bottom - top), 0)
+            local = [(float(x), float(y)) for x, y in points - np.array([left, top])]
+            ImageDraw.Draw(canvas).polygon(local, fill=1)
+            mask = np.asarray(canvas, dtype=bool)
+            # Outside pixels get the letterbox fill so the model sees a neutral background
+            cropped = np.where(mask[..., None], cropped, np.uint8(LETTERBOX_FILL))
+        return RoiCrop(np.ascontiguousarray(cropped, dtype=np.uint8), (left, top), (height, width), mask)
@@ -0,0 +1,180 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .backends import DetectionResult, class_aware_nms
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TILE_SIZE = 640
+DEFAULT_TILE_OVERLAP = 0.2
+DEFAULT_MERGE_IOU_THRESHOLD = 0.5
+DEFAULT_SLICED_MAX_DETECTIONS = 1000
+
+
+def tile_windows(
+    width: int, height: int, tile_size: int, overlap: float
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Compute overlapping tile windows covering an image.
+
+    Tiles advance by tile_size * (1 - overlap); the last tile in each row and
+    column is aligned to the image edge so every pixel is covered and no tile
+    is smaller than necessary.
+
+    Args:
+        width: Image width in pixels
+        height: Image height in pixels
+        tile_size: Tile edge length in pixels
+        overlap: Fraction of the tile shared with its neighbour (0 <= overlap < 1)
+
+    Returns:
+        List of (left, top, right, bottom) windows
+    """
+    if tile_size < 32:
+        raise ValueError(f"tile_size must be at least 32 pixels, got {tile_size}.")
+    if not 0.0 <= overlap < 1.0:
+        raise ValueError(f"overlap must be in [0, 1), got {overlap}.")
+    step = max(1, int(round(tile_size * (1.0 - overlap))))
+
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (left, top, min(left + tile_size, width), min(top + tile_size, height))
+        for top in starts(height)
+        for left in starts(width)
+    ]
+
+
+def merge_detections(
+    results: List[DetectionResult],
+    offsets: List[Tuple[int, int]],
+    orig_shape: Tuple[int, int],
+    iou_threshold: float = DEFAULT_MERGE_IOU_THRESHOLD,
+    max_detections: int = DEFAULT_SLICED_MAX_DETECTIONS,
+) -> DetectionResult:
+    """
+    Shift per-tile detections into image coordinates and merge them with class-aware NMS.
+
+    Args:
+        results: Detections per tile (or for the full image, with a (0, 0) offset)
+        offsets: (left, top) of each tile in the original image
+        orig_shape: (height, width) of the original image
+        iou_threshold: IoU above which same-class boxes from overlapping tiles are merged
+        max_detections: Maximum detections kept after merging
+
+    Returns:
+        Merged detections for the original image
+    """
+    non_empty = [(result, offset) for result, offset in zip(results, offsets) if len(result)]
+    if not non_empty:
+        return DetectionResult(
+            np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64), orig_shape
+        )
+
+    boxes = np.concatenate(
+        [result.xyxy + np.array([left, top, left, top], np.float32) for result, (left, top) in non_empty]
+    )
+    scores = np.concatenate([result.conf for result, _ in non_empty])
+    class_ids = np.concatenate([result.cls for result, _ in non_empty])
+
+    keep = class_aware_nms(boxes, scores, class_ids, iou_threshold, max_detections)
+    return DetectionResult(boxes[keep], scores[keep], class_ids[keep], orig_shape)
+
+
+def sliced_predict(
+    model: Any,
+    image: Any,
+    conf: float,
+    classes: Optional[List[int]] = None,
+    tile_size: int = DEFAULT_TILE_SIZE,
+    overlap: float = DEFAULT_TILE_OVERLAP,
+    include_full_image: bool = True,
+    iou_threshold: float = DEFAULT_MERGE_IOU_THRESHOLD,
+    max_detections: int = DEFAULT_SLICED_MAX_DETECTIONS,
+) -> DetectionResult:
+    """
+    Run inference on overlapping tiles of a high-resolution image as one batch.
+
+    Small objects that would shrink to a few pixels when the whole frame is
+    letterboxed to the model input size keep their resolution inside a tile.
+    The optional full-image pass still finds large objects that span tiles.
+
+    Args:
+        model: Detection backend with predict(images, conf, classes)
+        image: PIL image or HxWx3 RGB array to analyze
+        conf: Minimum confidence score
+        classes: Optional class indices to keep
+        tile_size: Tile edge length in pixels
+        overlap: Fraction of each tile shared with its neighbour
+        include_full_image: Also run the whole image in the same batch
+        iou_threshold: IoU used to merge duplicates across tiles
+        max_detections: Maximum detections kept after merging
+
+    Returns:
+        Merged detections in original image coordinates
+    """
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    width, height = image.size
+    windows = tile_windows(width, height, tile_size, overlap)
+
+    inputs = [image.crop(window) for window in windows]
+    offsets = [(left, top) for left, top, _, _ in windows]
+    if include_full_image and len(windows) > 1:
+        inputs.append(image)
+        offsets.append((0, 0))
+
+    log.debug(
+        f"[ObjectDetection:slicing] {width}x{height} image -> {len(windows)} tiles of "
+        f"{tile_size}px (overlap {overlap}), full image pass: {include_full_image}"
+    )
+    results = model.predict(inputs, conf=conf, classes=classes)
+    return merge_detections(results, offsets, (height, width), iou_threshold, max_detections)
+
+
+def predict_images(
+    model: Any,
+    images: List[Any],
+    conf: float,
+    classes: Optional[List[int]],
+    slicing_config: Dict[str, Any],
+) -> List[DetectionResult]:
+    """
+    Run inference on a batch of images, slicing them when sliced inference is enabled.
+
+    Args:
+        model: Detection backend
+        images: Images to analyze
+        conf: Minimum confidence score
+        classes: Optional class indices to keep
+        slicing_config: The "sliced_inference" tool config section
+
+    Returns:
+        Detections per image
+    """
+    if not slicing_config.get("enabled", False):
+        return model.predict(images, conf=conf, classes=classes)
+    return [
+        sliced_predict(
+            model,
+            image,
+            conf,
+            classes,
+            tile_size=slicing_config.get("tile_size", DEFAULT_TILE_SIZE),
+            overlap=slicing_config.get("overlap", DEFAULT_TILE_OVERLAP),
+            include_full_image=slicing_config.get("include_full_image", True),
+            iou_threshold=slicing_config.get("iou_threshold", DEFAULT_MERGE_IOU_THRESHOLD),
+            max_detections=slicing_config.get("max_detections", DEFAULT_SLICED_MAX_DETECTIONS),
+        )
+        for image in images
+    ]
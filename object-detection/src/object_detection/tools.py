@@ -1,9 +1,12 @@
 import logging
 import asyncio
 import inspect
+import json
+import os
+from contextlib import AsyncExitStack
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
-from io import BytesIO
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.adk.tools import ToolContext
 from solace_agent_mesh.agent.utils.artifact_helpers import (
@@ -12,8 +15,37 @@ from solace_agent_mesh.agent.utils.artifact_helpers import (
 )
 from solace_agent_mesh.agent.utils.context_helpers import get_original_session_id
 
+try:
+    from solace_agent_mesh.common.data_parts import AgentProgressUpdateData
+except ImportError:  # SAM releases without structured progress signals
+    AgentProgressUpdateData = None
+
+import numpy as np
 from ultralytics import YOLO
-from PIL import Image
+
+from .annotation import draw_detections, encode_image
+from .batching import get_batcher, remove_batchers
+from .change_gate import ChangeGate, get_change_gate
+from .detection_export import (
+    DEFAULT_CONFIDENCE_DECIMALS,
+    DEFAULT_COORDINATE_DECIMALS,
+    DetectionRecord,
+    artifact_mime_type,
+    columnar_boxes,
+    encode_detections,
+    validate_output_format,
+)
+from .executor import InferenceExecutor, InferenceQueueFullError, get_inference_executor
+from .metrics import metrics, stage
+from .backends import DEFAULT_EXPORT_DIR, DEFAULT_IMAGE_SIZE, DetectionResult, load_backend
+from .model_registry import ModelRegistry
+from .process_pool import DEFAULT_MAX_RESTARTS, DEFAULT_PROCESS_WORKERS, DetectionProcessPool
+from .preprocessing import IMAGE_EXTENSIONS, PreparedImage, decode_image_async, restore_coordinates
+from .quantization import DEFAULT_CALIBRATION_IMAGES, load_image_dir, quantization_variant
+from .result_cache import DetectionCache, image_digest
+from .roi import RegionOfInterest, RoiCrop
+from .slicing import predict_images
+from .video import iter_frames, next_batch
 
 log = logging.getLogger(__name__)
 
@@ -31,28 +63,668 @@ COCO_CLASSES = [
     "clock", "vase", "scissors", "teddy bear", "hair drier", "toothbrush"
 ]
 
-# Module-level model cache
-_yolo_model = None
-_model_lock = asyncio.Lock()
+def _load_model(model_name: str, process_pool: Optional[Dict[str, Any]] = None, **options: Any) -> Any:
+    """Registry loader: an in-process backend, or a pool of worker processes if enabled."""
+    if process_pool and process_pool.get("enabled", False):
+        return DetectionProcessPool(
+            model_name,
+            options,
+            workers=process_pool.get("workers", DEFAULT_PROCESS_WORKERS),
+            threads_per_worker=process_pool.get("threads_per_worker"),
+            max_restarts=process_pool.get("max_restarts", DEFAULT_MAX_RESTARTS),
+        )
+    return load_backend(YOLO, model_name, **options)
+
+
+# Module-level model registry shared by every agent in the process
+_model_registry = ModelRegistry(_load_model)
+# Batchers hold a reference to their model, so drop them when the model is evicted
+_model_registry.add_eviction_listener(
+    lambda model_key: remove_batchers(lambda batcher_key: batcher_key[0] == model_key)
+)
+
+
+def _model_variant(tool_config: Dict[str, Any]) -> str:
+    """Inference backend configured for this tool, including quantization and process mode."""
+    variant = quantization_variant(tool_config.get("backend", "torch"), tool_config.get("quantization"))
+    process_pool = tool_config.get("process_pool") or {}
+    if process_pool.get("enabled", False):
+        variant += f"-processes{process_pool.get('workers', DEFAULT_PROCESS_WORKERS)}"
+    return variant
+
+
+def _model_key(tool_config: Dict[str, Any]) -> str:
+    """Registry key of the model and inference backend configured for this tool."""
+    return ModelRegistry.resolve_key(
+        tool_config.get("model_name", "yolo11m.pt"), _model_variant(tool_config)
+    )
+
+
+async def _load_calibration_artifacts(
+    tool_context: Any, filenames: List[str], image_size: int
+) -> List[np.ndarray]:
+    """Load and decode calibration image artifacts of the current session."""
+    inv_context = tool_context._invocation_context
+    artifact_service = getattr(inv_context, "artifact_service", None)
+    if artifact_service is None:
+        raise ValueError("Calibration artifacts need an artifact service.")
+    images = []
+    for filename in filenames:
+        _, _, image_bytes = await _load_image_artifact(
+            artifact_service,
+            getattr(inv_context, "app_name", None),
+            getattr(inv_context, "user_id", None),
+            get_original_session_id(inv_context),
+            filename,
+            "[ObjectDetection:calibration]",
+        )
+        images.append((await decode_image_async(image_bytes, image_size)).array)
+    return images
+
+
+def _calibration_source(
+    tool_config: Dict[str, Any], tool_context: Optional[Any]
+) -> Optional[Any]:
+    """
+    Build the callable that supplies static-quantization calibration images.
+
+    The model loader runs in a worker thread and only calls it when no cached
+    quantized model exists, so artifacts are loaded back on the event loop only
+    when calibration actually happens.
+    """
+    quantization_config = tool_config.get("quantization") or {}
+    if quantization_config.get("mode") != "static":
+        return None
+    limit = quantization_config.get("calibration_images", DEFAULT_CALIBRATION_IMAGES)
+    image_size = tool_config.get("image_size", DEFAULT_IMAGE_SIZE)
+    artifacts = (quantization_config.get("calibration_artifacts") or [])[:limit]
+    calibration_dir = quantization_config.get("calibration_dir")
+    loop = asyncio.get_running_loop()
+
+    def load_calibration_images() -> List[np.ndarray]:
+        if artifacts and tool_context is not None:
+            return asyncio.run_coroutine_threadsafe(
+                _load_calibration_artifacts(tool_context, artifacts, image_size), loop
+            ).result()
+        if calibration_dir:
+            return load_image_dir(calibration_dir, limit, image_size)
+        raise ValueError(
+            "Static quantization needs calibration images: set 'calibration_artifacts' "
+            "(loaded on the first tool call) or 'calibration_dir'."
+        )
+
+    return load_calibration_images
+
+
+def _model_request(
+    tool_config: Dict[str, Any], tool_context: Optional[Any] = None
+) -> Tuple[str, str, Dict[str, Any]]:
+    """Model name, registry variant and load options of the backend configured for this tool."""
+    _warn_registry_limits_in_tool_config(tool_config)
+    return (
+        tool_config.get("model_name", "yolo11m.pt"),
+        _model_variant(tool_config),
+        {
+            "backend": tool_config.get("backend", "torch"),
+            "export_dir": tool_config.get("export_dir", DEFAULT_EXPORT_DIR),
+            "image_size": tool_config.get("image_size", DEFAULT_IMAGE_SIZE),
+            "intra_op_threads": tool_config.get("intra_op_threads"),
+            "quantization": tool_config.get("quantization"),
+            "calibration_source": _calibration_source(tool_config, tool_context),
+            "process_pool": tool_config.get("process_pool"),
+        },
+    )
+
+
+# Registry limits are process-wide and set once by the agent init function
+_REGISTRY_LIMIT_KEYS = ("max_resident_models", "max_model_memory_mb", "model_idle_ttl_seconds")
+_warned_registry_limit_keys: set = set()
+
+
+def configure_model_registry(config: Dict[str, Any]) -> None:
+    """
+    Set the residency limits of the process-wide model registry.
+
+    Args:
+        config: Dictionary with optional max_resident_models (default: 2),
+            max_model_memory_mb and model_idle_ttl_seconds (default: no limit)
+    """
+    _model_registry.configure(
+        max_resident_models=config.get("max_resident_models", 2),
+        max_memory_mb=config.get("max_model_memory_mb"),
+        idle_ttl_seconds=config.get("model_idle_ttl_seconds"),
+    )
+
+
+def _warn_registry_limits_in_tool_config(tool_config: Dict[str, Any]) -> None:
+    """Warn once per key about registry limits set in a tool config, where they are ignored."""
+    for key in _REGISTRY_LIMIT_KEYS:
+        if key in tool_config and key not in _warned_registry_limit_keys:
+            _warned_registry_limit_keys.add(key)
+            log.warning(
+                f"[ObjectDetection] Ignoring {key} in tool_config; model registry limits "
+                f"are process-wide and set in the agent_init_function config"
+            )
+
+
+async def _get_yolo_model(tool_config: Dict[str, Any], tool_context: Optional[Any] = None):
+    """Return the detection backend configured for this tool, loading it on first use."""
+    model_name, variant, load_options = _model_request(tool_config, tool_context)
+    return await _model_registry.get(model_name, variant=variant, load_options=load_options)
+
+
+def _use_yolo_model(tool_config: Dict[str, Any], tool_context: Optional[Any] = None):
+    """
+    Hold the detection backend configured for this tool for the length of a tool call.
+
+    The model is not evicted while held, so long batch and video calls keep it
+    (and its batchers and worker processes) until they finish.
+    """
+    model_name, variant, load_options = _model_request(tool_config, tool_context)
+    return _model_registry.acquire(model_name, variant=variant, load_options=load_options)
+
+
+def get_model_registry_stats() -> Dict[str, Any]:
+    """Return residency, hit/miss and load-time statistics of the model registry."""
+    return _model_registry.get_stats()
+
+
+# Caches of raw detection results shared by every agent in the process, one per
+# distinct settings, so one tool's size or persistence never applies to another's
+_result_caches: Dict[Tuple[int, Optional[str]], DetectionCache] = {}
+
+
+def _get_result_cache(tool_config: Dict[str, Any]) -> Optional[DetectionCache]:
+    """Return the detection result cache for the tool config's settings if enabled, else None."""
+    cache_config = tool_config.get("result_cache", {})
+    if not cache_config.get("enabled", False):
+        return None
+    persist_dir = cache_config.get("persist_dir")
+    settings = (
+        max(1, int(cache_config.get("max_entries", 1024))),
+        os.path.abspath(persist_dir) if persist_dir else None,
+    )
+    cache = _result_caches.get(settings)
+    if cache is None:
+        cache = DetectionCache(*settings)
+        _result_caches[settings] = cache
+    return cache
+
+
+def _result_cache_key(
+    tool_config: Dict[str, Any],
+    image_bytes: bytes,
+    confidence_threshold: float,
+    full_resolution: bool = False,
+) -> str:
+    """Cache key for an image under the model and thresholds configured for this tool."""
+    model_key = _model_key(tool_config)
+    slicing_config = tool_config.get("sliced_inference", {})
+    if slicing_config.get("enabled", False):
+        # Sliced results differ from whole-image results, so they are cached separately
+        model_key += f"|sliced={sorted(slicing_config.items())}"
+    roi = RegionOfInterest.from_config(tool_config.get("region_of_interest"))
+    if roi is not None:
+        model_key += f"|roi={roi.describe()}"
+    # Shrink-on-load changes the pixels the model sees, so results decoded at
+    # different sizes are kept apart
+    target_size = None if full_resolution else _decode_target_size(tool_config)
+    model_key += f"|decode={target_size or 'full'}"
+    return DetectionCache.make_key(
+        image_digest(image_bytes),
+        model_key,
+        confidence_threshold,
+        tool_config.get("image_size", DEFAULT_IMAGE_SIZE),
+    )
+
+
+def get_result_cache_stats() -> List[Dict[str, Any]]:
+    """Return size and hit/miss statistics of every result cache (empty if none is enabled)."""
+    return [cache.get_stats() for cache in _result_caches.values()]
+
+
+def _get_tool_inference_executor(tool_config: Dict[str, Any]) -> InferenceExecutor:
+    """Get the shared inference executor for a tool's configuration."""
+    executor_config = tool_config.get("inference_executor") or {}
+    process_pool = tool_config.get("process_pool") or {}
+    if process_pool.get("enabled", False) and "workers" not in executor_config:
+        # Each executor thread waits on one worker process, so keep one per process
+        executor_config = {
+            **executor_config,
+            "workers": process_pool.get("workers", DEFAULT_PROCESS_WORKERS),
+        }
+    return get_inference_executor(executor_config)
+
+
+async def _run_inference(
+    tool_config: Dict[str, Any],
+    function: Any,
+    *args: Any,
+    stage_timings: Optional[Dict[str, float]] = None,
+    **kwargs: Any,
+) -> Any:
+    """Run a blocking inference call on the dedicated inference executor."""
+    executor = _get_tool_inference_executor(tool_config)
+    return await executor.run(function, *args, stage_timings=stage_timings, **kwargs)
+
+
+def _format_timings(timings: Dict[str, float]) -> str:
+    """Render stage timings as "stage=12.3ms" pairs for log lines."""
+    return ", ".join(f"{name}={seconds * 1000.0:.1f}ms" for name, seconds in timings.items())
+
+
+async def _prepare_image(
+    image_bytes: bytes,
+    tool_config: Dict[str, Any],
+    timings: Optional[Dict[str, float]] = None,
+    full_resolution: bool = False,
+) -> PreparedImage:
+    """
+    Decode an image off the event loop, reduced to the model input size.
+
+    Sliced inference and region-of-interest crops need the full resolution, so
+    shrink-on-load is skipped for them, as it is with ``full_resolution``.
+    """
+    preprocessing_config = tool_config.get("preprocessing", {})
+    target_size = None if full_resolution else _decode_target_size(tool_config)
+    with stage(timings, "decode"):
+        return await decode_image_async(
+            image_bytes, target_size, preprocessing_config.get("decode_workers")
+        )
+
+
+def _decode_target_size(tool_config: Dict[str, Any]) -> Optional[int]:
+    """Size images are shrunk to while decoding, or None to decode at full resolution."""
+    if (
+        tool_config.get("preprocessing", {}).get("shrink_on_load", True)
+        and not tool_config.get("sliced_inference", {}).get("enabled", False)
+        and not tool_config.get("region_of_interest")
+    ):
+        return tool_config.get("image_size", DEFAULT_IMAGE_SIZE)
+    return None
+
+
+def _crop_to_roi(
+    array: np.ndarray,
+    original_size: Tuple[int, int],
+    roi: Optional[RegionOfInterest],
+) -> Tuple[np.ndarray, Optional[RoiCrop]]:
+    """Return the model input for an image, cropped to the region of interest if one is set."""
+    if roi is None:
+        return array, None
+    crop = roi.crop(array, original_size)
+    return crop.array, crop
+
+
+def _restore_result(
+    result: DetectionResult,
+    crop: Optional[RoiCrop],
+    prepared: Optional[PreparedImage] = None,
+) -> DetectionResult:
+    """Map detections on a model input back to the original image."""
+    if crop is not None:
+        result = crop.restore(result)
+    if prepared is not None:
+        result = restore_coordinates(result, prepared)
+    return result
+
+
+def _split_by_change_gate(
+    gate: Optional[ChangeGate],
+    keys: List[Any],
+    inputs: List[np.ndarray],
+) -> Tuple[List[int], Dict[Any, Any]]:
+    """
+    Decide which images of an ordered sequence need inference.
+
+    Args:
+        gate: Change gate carried across the sequence, or None to run every image
+        keys: Identifier of each image, stored as the gate's reference result
+        inputs: Model inputs in sequence order
+
+    Returns:
+        Tuple of (positions of the inputs to run, key of each skipped image ->
+        key of the earlier image whose result it reuses)
+    """
+    if gate is None:
+        return list(range(len(inputs))), {}
+    to_run: List[int] = []
+    reused: Dict[Any, Any] = {}
+    for position, (key, array) in enumerate(zip(keys, inputs)):
+        signature = gate.signature(array)
+        if gate.is_unchanged(signature):
+            reused[key] = gate.reference_result
+        else:
+            gate.set_reference(signature, key)
+            to_run.append(position)
+    return to_run, reused
+
+
+def _normalize_objects_to_detect(objects_to_detect: list[str]) -> list[str]:
+    """Lower-case requested class names and reject any that are not COCO classes."""
+    normalized_objects = [obj.lower() for obj in objects_to_detect]
+    invalid_objects = [obj for obj in normalized_objects if obj not in COCO_CLASSES]
+
+    if invalid_objects:
+        raise ValueError(
+            f"Invalid COCO class names: {invalid_objects}. "
+            f"Valid classes are: {', '.join(COCO_CLASSES)}"
+        )
+    return normalized_objects
+
+
+async def _load_image_artifact(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    image_filename: str,
+    log_identifier: str,
+    timings: Optional[Dict[str, float]] = None,
+) -> Tuple[str, int, bytes]:
+    """
+    Resolve the version of an image artifact and load its bytes.
+
+    Args:
+        artifact_service: Artifact service from the invocation context
+        app_name: Application name
+        user_id: User identifier
+        session_id: Session identifier
+        image_filename: Filename with optional version (e.g., "photo.jpg" or "photo.jpg:2")
+        log_identifier: Prefix for log messages
+        timings: Optional dictionary receiving "version_lookup" and "artifact_load" seconds
+
+    Returns:
+        Tuple of (filename without version, loaded version, image bytes)
+    """
+    # Parse image filename and version
+    parts = image_filename.rsplit(":", 1)
+    filename_base_for_load = parts[0]
+    version_str = parts[1] if len(parts) > 1 else None
+    version_to_load = int(version_str) if version_str else None
+
+    # Get latest version if not specified
+    with stage(timings, "version_lookup"):
+        if version_to_load is None:
+            list_versions_method = getattr(artifact_service, "list_versions")
+            if inspect.iscoroutinefunction(list_versions_method):
+                versions = await list_versions_method(
+                    app_name=app_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                    filename=filename_base_for_load,
+                )
+            else:
+                versions = await asyncio.to_thread(
+                    list_versions_method,
+                    app_name=app_name,
+                    user_id=user_id,
+                    session_id=session_id,
+                    filename=filename_base_for_load,
+                )
+            if not versions:
+                raise FileNotFoundError(
+                    f"Image artifact '{filename_base_for_load}' not found."
+                )
+            version_to_load = max(versions)
+            log.debug(
+                f"{log_identifier} Using latest version for input: {version_to_load}"
+            )
+
+    # Load image artifact
+    with stage(timings, "artifact_load"):
+        load_artifact_method = getattr(artifact_service, "load_artifact")
+        if inspect.iscoroutinefunction(load_artifact_method):
+            image_artifact_part = await load_artifact_method(
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+                filename=filename_base_for_load,
+                version=version_to_load,
+            )
+        else:
+            image_artifact_part = await asyncio.to_thread(
+                load_artifact_method,
+                app_name=app_name,
+                user_id=user_id,
+                session_id=session_id,
+                filename=filename_base_for_load,
+                version=version_to_load,
+            )
+
+    if not image_artifact_part or not image_artifact_part.inline_data:
+        raise FileNotFoundError(
+            f"Content for image artifact '{filename_base_for_load}' v{version_to_load} not found."
+        )
+
+    image_bytes = image_artifact_part.inline_data.data
+    log.debug(f"{log_identifier} Loaded image artifact: {len(image_bytes)} bytes")
+    return filename_base_for_load, version_to_load, image_bytes
+
+
+async def _save_annotated_image(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    tool_context: Any,
+    output_filename: str,
+    prepared: PreparedImage,
+    result: Optional[DetectionResult],
+    class_names: Dict[int, str],
+    class_ids: List[int],
+    source_filename: str,
+    source_version: int,
+    log_identifier: str,
+) -> Tuple[str, int]:
+    """
+    Draw detections onto the decoded image and save it as one artifact.
+
+    Returns:
+        Tuple of (annotated artifact filename, saved version)
+    """
+    if result is None:
+        result = DetectionResult(
+            np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64),
+            (prepared.original_size[1], prepared.original_size[0]),
+        )
+    content_bytes = await asyncio.to_thread(
+        lambda: encode_image(draw_detections(prepared.array, result, class_names, class_ids))
+    )
+
+    timestamp = datetime.now(timezone.utc)
+    metadata_dict = {
+        "description": f"Detections drawn on {source_filename} v{source_version}",
+        "source_tool": "detect_objects_in_image",
+        "source_image": source_filename,
+        "source_image_version": source_version,
+        "classes": [class_names.get(index, str(index)) for index in class_ids],
+        "annotated_width": int(prepared.array.shape[1]),
+        "annotated_height": int(prepared.array.shape[0]),
+        "creation_timestamp_iso": timestamp.isoformat(),
+    }
+    save_result = await save_artifact_with_metadata(
+        artifact_service=artifact_service,
+        app_name=app_name,
+        user_id=user_id,
+        session_id=session_id,
+        filename=output_filename,
+        content_bytes=content_bytes,
+        mime_type="image/jpeg",
+        metadata_dict=metadata_dict,
+        timestamp=timestamp,
+        schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
+        tool_context=tool_context,
+    )
+    if save_result.get("status") == "error":
+        raise IOError(f"Failed to save annotated image: {save_result.get('message')}")
+    log.info(
+        f"{log_identifier} Annotated image saved as '{output_filename}' "
+        f"v{save_result['data_version']}"
+    )
+    return output_filename, save_result["data_version"]
+
+
+def _resolve_class_ids(
+    class_names: Dict[int, str], normalized_objects: list[str]
+) -> Dict[str, Optional[int]]:
+    """
+    Map requested class names to the model's class indices.
+
+    Args:
+        class_names: Mapping of class index to class name (model.names)
+        normalized_objects: Lower-cased class names requested by the caller
+
+    Returns:
+        Mapping of requested class name to class index (None if the model lacks the class)
+    """
+    index_by_name = {name.lower(): int(index) for index, name in class_names.items()}
+    return {obj: index_by_name.get(obj) for obj in normalized_objects}
+
+
+def _build_detections(
+    result: Optional[DetectionResult],
+    object_class_ids: Dict[str, Optional[int]],
+    return_bounding_boxes: bool,
+    output_format: str = "nested",
+    tool_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Convert one image's detections into the tool's detections structure.
+
+    Counts come from a single np.bincount over the class indices and boxes are
+    selected per requested class with a boolean mask, so the cost does not grow
+    with Python work per box on crowded scenes.
+
+    Args:
+        result: Detections for a single image (or None)
+        object_class_ids: Requested class names mapped to model class indices
+        return_bounding_boxes: Return boxes and confidences instead of counts
+        output_format: "nested" (one dictionary per box) or "columnar"
+                       (parallel, rounded x1/y1/x2/y2/confidence arrays per class)
+        tool_config: Tool config holding the columnar rounding settings
+
+    Returns:
+        Dictionary with "detections" and, when returning bounding boxes, "total_count"
+    """
+    has_boxes = result is not None and len(result) > 0
+
+    if not return_bounding_boxes:
+        counts = np.bincount(result.cls) if has_boxes else np.zeros(0, dtype=np.int64)
+        detections = {
+            obj: int(counts[index]) if index is not None and index < len(counts) else 0
+            for obj, index in object_class_ids.items()
+        }
+        return {"detections": detections}
+
+    if output_format == "columnar":
+        current_tool_config = tool_config or {}
+        detections = {}
+        for obj, index in object_class_ids.items():
+            if not has_boxes or index is None:
+                detections[obj] = {"x1": [], "y1": [], "x2": [], "y2": [], "confidence": []}
+                continue
+            detections[obj] = columnar_boxes(
+                result,
+                result.cls == index,
+                current_tool_config.get("coordinate_decimals", DEFAULT_COORDINATE_DECIMALS),
+                current_tool_config.get("confidence_decimals", DEFAULT_CONFIDENCE_DECIMALS),
+            )
+        return {
+            "detections": detections,
+            "total_count": {obj: len(columns["confidence"]) for obj, columns in detections.items()},
+        }
+
+    detections = {}
+    for obj, index in object_class_ids.items():
+        if not has_boxes or index is None:
+            detections[obj] = []
+            continue
+        mask = result.cls == index
+        rows = np.column_stack((result.xyxy[mask], result.conf[mask])).tolist()
+        detections[obj] = [
+            {
+                "bbox": {"x1": x1, "y1": y1, "x2": x2, "y2": y2},
+                "confidence": confidence,
+            }
+            for x1, y1, x2, y2, confidence in rows
+        ]
+
+    return {
+        "detections": detections,
+        # Add total_count summary when returning bounding boxes
+        "total_count": {obj: len(dets) for obj, dets in detections.items()},
+    }
 
 
-async def _get_yolo_model(tool_config: Dict[str, Any]):
-    """Lazy load YOLO model on first use with thread-safe caching."""
-    global _yolo_model
-    if _yolo_model is None:
-        async with _model_lock:
-            if _yolo_model is None:  # Double-check pattern
-                model_name = tool_config.get("model_name", "yolo11m.pt")
-                log.info(f"[ObjectDetection] Loading YOLO model: {model_name}")
-                _yolo_model = await asyncio.to_thread(YOLO, model_name)
-                log.info("[ObjectDetection] YOLO model loaded successfully")
-    return _yolo_model
+async def _save_detections_artifact(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    tool_context: Any,
+    output_filename: str,
+    records: List[DetectionRecord],
+    class_names: Dict[int, str],
+    class_ids: List[int],
+    source_tool: str,
+    log_identifier: str,
+) -> Dict[str, Any]:
+    """
+    Save the full detections of the requested classes as a JSON Lines or NPZ artifact.
+
+    Returns:
+        Dictionary with "detections_artifact_filename", "detections_artifact_version"
+        and "detections_artifact_boxes"
+    """
+    mime_type = artifact_mime_type(output_filename)
+    content_bytes, box_count = await asyncio.to_thread(
+        encode_detections, output_filename, records, class_names, class_ids
+    )
+
+    timestamp = datetime.now(timezone.utc)
+    metadata_dict = {
+        "description": f"Detections from {source_tool} for {len(records)} image(s)",
+        "source_tool": source_tool,
+        "source_images": [f"{filename}:{version}" for filename, version, _ in records],
+        "classes": [class_names.get(index, str(index)) for index in class_ids],
+        "box_count": box_count,
+        "creation_timestamp_iso": timestamp.isoformat(),
+    }
+    save_result = await save_artifact_with_metadata(
+        artifact_service=artifact_service,
+        app_name=app_name,
+        user_id=user_id,
+        session_id=session_id,
+        filename=output_filename,
+        content_bytes=content_bytes,
+        mime_type=mime_type,
+        metadata_dict=metadata_dict,
+        timestamp=timestamp,
+        schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
+        tool_context=tool_context,
+    )
+    if save_result.get("status") == "error":
+        raise IOError(f"Failed to save detections: {save_result.get('message')}")
+    log.info(
+        f"{log_identifier} Saved {box_count} detections as '{output_filename}' "
+        f"v{save_result['data_version']}"
+    )
+    return {
+        "detections_artifact_filename": output_filename,
+        "detections_artifact_version": save_result["data_version"],
+        "detections_artifact_boxes": box_count,
+    }
 
 
 async def detect_objects_in_image(
     image_filename: str,
     objects_to_detect: list[str],
     return_bounding_boxes: bool = False,
+    annotate_image: bool = False,
+    annotated_output_filename: Optional[str] = None,
+    output_format: str = "nested",
+    detections_artifact_filename: Optional[str] = None,
     tool_context: Optional[ToolContext] = None,
     tool_config: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
@@ -67,12 +739,90 @@ async def detect_objects_in_image(
         objects_to_detect: List of COCO class names to look for
         return_bounding_boxes: If True, returns bounding boxes and confidence scores for each detection.
                               If False (default), returns only counts (backward compatible).
+        annotate_image: If True, draws the detected boxes and labels onto the image decoded
+                        for inference and saves it as a new JPEG artifact in the same call.
+        annotated_output_filename: Filename for the annotated image
+                                   (default: "<image name>_annotated.jpg")
+        output_format: Layout of returned boxes: "nested" (default, one dictionary per box)
+                       or "columnar" (parallel rounded x1/y1/x2/y2/confidence arrays per
+                       class, much smaller on crowded images)
+        detections_artifact_filename: If set, saves every box of the requested classes as an
+                                      artifact (".jsonl" for JSON Lines, ".npz" for NumPy)
+                                      and returns only the per-class counts
         tool_context: Framework context for accessing artifact service
         tool_config: Optional configuration:
             - model_name: YOLO model to use (default: "yolo11m.pt")
                          Can be a standard model (yolo11n.pt, yolo11s.pt, yolo11m.pt, etc.)
                          or a path to a custom trained model
+            - backend: Inference backend - "torch" (default), "onnx" (ONNX Runtime)
+                      or "openvino"; exported backends are exported once and cached
+            - export_dir: Directory for cached ONNX/OpenVINO exports (default: "./model_exports")
+            - image_size: Model input size for exported backends (default: 640)
+            - intra_op_threads: Intra-op threads for exported backends (default: runtime default)
+            - quantization: Optional int8 quantization of the ONNX export (backend "onnx"):
+                - mode: "dynamic" or "static" (default: off)
+                - calibration_artifacts: Image artifacts to calibrate static mode on
+                - calibration_dir: Local calibration images, used when no artifacts are given
+                - calibration_images: Maximum calibration images (default: 64)
+                - exclude_nodes: ONNX node names kept in float (e.g., the detection head)
+                - validation_dir: Local validation images (optional YOLO .txt labels);
+                                  the accuracy delta to the float model is reported once
+                - validation_images: Maximum validation images (default: 50)
             - confidence_threshold: Minimum confidence score (default: 0.25)
+            - coordinate_decimals: Decimals kept for columnar box coordinates (default: 1)
+            - confidence_decimals: Decimals kept for columnar confidences (default: 3)
+            - result_cache: Optional cache of raw detections keyed by image content,
+                            model and thresholds; any class subset is served from it:
+                - enabled: Turn the cache on (default: False)
+                - max_entries: Maximum results kept in memory (default: 1024)
+                - persist_dir: Optional directory to persist results across restarts
+            - sliced_inference: Optional tiled inference for high-resolution images:
+                - enabled: Turn sliced inference on (default: False)
+                - tile_size: Tile edge length in pixels (default: 640)
+                - overlap: Fraction of each tile shared with its neighbours (default: 0.2)
+                - include_full_image: Also run the whole image in the same batch (default: True)
+                - iou_threshold: IoU for merging duplicates across tiles (default: 0.5)
+                - max_detections: Maximum detections kept after merging (default: 1000)
+            - preprocessing: Image decoding options:
+                - shrink_on_load: Decode images directly at model resolution (default: True)
+                - decode_workers: Threads in the image decode pool (default: 4)
+            - annotation: Options for annotate_image:
+                - full_resolution: Decode the image once at its original size, so the
+                                   annotation is drawn at full resolution and the model
+                                   input is built from the same array (default: False,
+                                   drawn on the decode reduced to model resolution)
+            - inference_executor: Dedicated thread pool that runs every predict call:
+                - workers: Concurrent predict calls (default: 1)
+                - threads_per_worker: torch.set_num_threads value (default: torch default)
+                - max_queue: Maximum predicts waiting for a worker before requests are
+                             rejected (default: unbounded)
+                - cpu_affinity: Optional list of CPU ids to pin inference threads to (Linux)
+            - process_pool: Optional worker processes that each hold their own model copy:
+                - enabled: Run inference in worker processes (default: False)
+                - workers: Number of worker processes (default: 2)
+                - threads_per_worker: torch threads per process (default: CPUs / workers)
+                - max_restarts: Consecutive crashes after which a worker is not restarted;
+                                once every worker has stopped, requests fail (default: 5)
+            - micro_batching: Optional batching of concurrent requests into one predict call:
+                - enabled: Turn micro-batching on (default: False)
+                - max_batch_size: Maximum images per batch (default: 16)
+                - max_wait_ms: Maximum time to wait for a batch to fill (default: 10)
+            - region_of_interest: Optional part of the image to run detection on; the
+                                  image is cropped to it before inference and boxes are
+                                  returned in original image coordinates:
+                - box: [x1, y1, x2, y2] rectangle
+                - polygon: [[x, y], ...] outline; pixels outside it are masked and boxes
+                           whose center falls outside it are dropped
+                - normalized: Coordinates are fractions of width/height (default: False,
+                              original image pixels)
+            - change_gate: Optional reuse of the previous result for unchanged images;
+                           successive versions of one artifact are compared:
+                - enabled: Turn the gate on (default: False)
+                - thumbnail_size: Edge of the grayscale thumbnail compared (default: 64)
+                - pixel_threshold: Grey-level difference that counts as changed (default: 12)
+                - min_changed_fraction: Fraction of changed thumbnail pixels needed to
+                                        run the model again (default: 0.005)
+                - max_reuse: Run the model after this many consecutive reuses (default: 30)
 
     Returns:
         Dictionary with status, message, and detections:
@@ -104,6 +854,19 @@ async def detect_objects_in_image(
                 },
                 "total_count": {"person": 3, "car": 2}
             }
+
+        When output_format="columnar", each class holds parallel arrays:
+            "detections": {
+                "person": {"x1": [100.5, ...], "y1": [50.2, ...], "x2": [300.8, ...],
+                           "y2": [400.1, ...], "confidence": [0.92, ...]}
+            }
+
+        When detections_artifact_filename is set, "detections" holds counts and the
+        result also contains "detections_artifact_filename", "detections_artifact_version"
+        and "detections_artifact_boxes".
+
+        When annotate_image=True, the result also contains
+        "annotated_image_filename" and "annotated_image_version".
     """
     log_identifier = f"[ObjectDetection:detect_objects_in_image:{image_filename}]"
 
@@ -111,6 +874,15 @@ async def detect_objects_in_image(
         log.error(f"{log_identifier} ToolContext is missing.")
         return {"status": "error", "message": "ToolContext is missing."}
 
+    # Per-stage timings and counts recorded in the plugin metrics when the call ends
+    timings: Dict[str, float] = {}
+    # Holds the model until the call ends so it is not evicted part-way
+    model_lease = AsyncExitStack()
+    # Holds this image stream's change gate while it is checked and updated
+    gate_hold = AsyncExitStack()
+    status = "error"
+    images_run = 0
+    boxes_returned = 0
     try:
         # Extract invocation context
         inv_context = tool_context._invocation_context
@@ -143,154 +915,159 @@ async def detect_objects_in_image(
         current_tool_config = tool_config if tool_config is not None else {}
         confidence_threshold = current_tool_config.get("confidence_threshold", 0.25)
 
-        # Validate objects_to_detect
-        normalized_objects = [obj.lower() for obj in objects_to_detect]
-        invalid_objects = [obj for obj in normalized_objects if obj not in COCO_CLASSES]
-
-        if invalid_objects:
-            raise ValueError(
-                f"Invalid COCO class names: {invalid_objects}. "
-                f"Valid classes are: {', '.join(COCO_CLASSES)}"
-            )
+        # Validate objects_to_detect and output options before any work is done
+        normalized_objects = _normalize_objects_to_detect(objects_to_detect)
+        validate_output_format(output_format)
+        if detections_artifact_filename:
+            artifact_mime_type(detections_artifact_filename)
 
         log.debug(f"{log_identifier} Looking for objects: {normalized_objects}")
 
-        # Parse image filename and version
-        parts = image_filename.rsplit(":", 1)
-        filename_base_for_load = parts[0]
-        version_str = parts[1] if len(parts) > 1 else None
-        version_to_load = int(version_str) if version_str else None
+        filename_base_for_load, version_to_load, image_bytes = await _load_image_artifact(
+            artifact_service, app_name, user_id, session_id, image_filename, log_identifier,
+            timings=timings,
+        )
 
-        # Get latest version if not specified
-        if version_to_load is None:
-            list_versions_method = getattr(artifact_service, "list_versions")
-            if inspect.iscoroutinefunction(list_versions_method):
-                versions = await list_versions_method(
-                    app_name=app_name,
-                    user_id=user_id,
-                    session_id=session_id,
-                    filename=filename_base_for_load,
-                )
-            else:
-                versions = await asyncio.to_thread(
-                    list_versions_method,
-                    app_name=app_name,
-                    user_id=user_id,
-                    session_id=session_id,
-                    filename=filename_base_for_load,
-                )
-            if not versions:
-                raise FileNotFoundError(
-                    f"Image artifact '{filename_base_for_load}' not found."
+        # Load YOLO model
+        model = await model_lease.enter_async_context(
+            _use_yolo_model(current_tool_config, tool_context)
+        )
+        object_class_ids = _resolve_class_ids(model.names, normalized_objects)
+        requested_class_ids = sorted(
+            {index for index in object_class_ids.values() if index is not None}
+        )
+
+        # A full-resolution annotation needs the original pixels; the model input is
+        # then built from that same decode rather than decoding the image twice
+        full_resolution = annotate_image and current_tool_config.get("annotation", {}).get(
+            "full_resolution", False
+        )
+
+        # Cached results hold every class, so any subset of classes can be served from them
+        result_cache = _get_result_cache(current_tool_config)
+        cache_key = None
+        cached_result = None
+        if result_cache is not None:
+            cache_key = _result_cache_key(
+                current_tool_config, image_bytes, confidence_threshold, full_resolution
+            )
+            cached_result = await result_cache.get(cache_key)
+            metrics.increment("cache_hits" if cached_result is not None else "cache_misses")
+
+        # Run inference
+        batching_config = current_tool_config.get("micro_batching", {})
+        slicing_config = current_tool_config.get("sliced_inference", {})
+        gate_config = current_tool_config.get("change_gate", {})
+        roi = RegionOfInterest.from_config(current_tool_config.get("region_of_interest"))
+        prepared = None
+        model_input = None
+        crop = None
+        gate = None
+        signature = None
+        reused_result = None
+        if cached_result is None:
+            prepared = await _prepare_image(
+                image_bytes, current_tool_config, timings, full_resolution=full_resolution
+            )
+            with stage(timings, "preprocess"):
+                model_input, crop = await asyncio.to_thread(
+                    _crop_to_roi, prepared.array, prepared.original_size, roi
                 )
-            version_to_load = max(versions)
+                if gate_config.get("enabled", False):
+                    # Successive versions of one artifact form a stream, e.g. a camera snapshot
+                    gate = get_change_gate(
+                        (
+                            app_name, user_id, session_id, filename_base_for_load,
+                            _model_key(current_tool_config), confidence_threshold,
+                            roi.describe() if roi is not None else None,
+                            tuple(requested_class_ids),
+                        ),
+                        gate_config,
+                    )
+                    # Held until this call's result becomes the reference, so a concurrent
+                    # call on the same stream never pairs its frame with another's result
+                    await gate_hold.enter_async_context(gate.exclusive())
+                    signature = await asyncio.to_thread(gate.signature, model_input)
+                    if gate.reference_result is not None and gate.is_unchanged(signature):
+                        reused_result = gate.reference_result
             log.debug(
-                f"{log_identifier} Using latest version for input: {version_to_load}"
+                f"{log_identifier} Decoded image {prepared.original_size} to "
+                f"{model_input.shape[1]}x{model_input.shape[0]} for inference"
             )
 
-        # Load image artifact
-        load_artifact_method = getattr(artifact_service, "load_artifact")
-        if inspect.iscoroutinefunction(load_artifact_method):
-            image_artifact_part = await load_artifact_method(
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id,
-                filename=filename_base_for_load,
-                version=version_to_load,
+        if cached_result is not None:
+            log.info(f"{log_identifier} Serving detections from the result cache.")
+            results = [cached_result]
+        elif reused_result is not None:
+            log.info(
+                f"{log_identifier} Image unchanged since the last analyzed version "
+                f"({gate.last_changed_fraction:.2%} changed); reusing its detections."
             )
+            metrics.increment("change_gate_reuses")
+            results = [reused_result]
+        elif batching_config.get("enabled", False) and not slicing_config.get("enabled", False):
+            # Share a batched forward pass with concurrent requests for the same model.
+            # Callers ask for different classes, so the batch runs over all classes
+            # and each caller's classes are selected while parsing.
+            log.info(f"{log_identifier} Queueing image for batched YOLO inference...")
+            batcher = get_batcher(
+                (_model_key(current_tool_config), confidence_threshold),
+                lambda images: model.predict(images, conf=confidence_threshold),
+                max_batch_size=batching_config.get("max_batch_size", 16),
+                max_wait_ms=batching_config.get("max_wait_ms", 10.0),
+                run_blocking=_get_tool_inference_executor(current_tool_config).run,
+            )
+            # Time spent waiting for the batch to fill is part of this stage
+            with stage(timings, "batched_inference"):
+                results = [await batcher.submit(model_input)]
+            images_run = 1
         else:
-            image_artifact_part = await asyncio.to_thread(
-                load_artifact_method,
-                app_name=app_name,
-                user_id=user_id,
-                session_id=session_id,
-                filename=filename_base_for_load,
-                version=version_to_load,
+            log.info(f"{log_identifier} Running YOLO inference...")
+            # Only the requested classes take part in NMS, unless the full output is cached
+            results = await _run_inference(
+                current_tool_config,
+                predict_images,
+                model,
+                [model_input],
+                confidence_threshold,
+                None if result_cache is not None else requested_class_ids,
+                slicing_config,
+                stage_timings=timings,
             )
-
-        if not image_artifact_part or not image_artifact_part.inline_data:
-            raise FileNotFoundError(
-                f"Content for image artifact '{filename_base_for_load}' v{version_to_load} not found."
+            images_run = 1
+
+        with stage(timings, "postprocess"):
+            if images_run and results:
+                results = [_restore_result(results[0], crop, prepared)]
+                if cache_key is not None:
+                    await result_cache.put(cache_key, results[0])
+                if gate is not None:
+                    gate.set_reference(signature, results[0])
+            await gate_hold.aclose()
+
+            # Parse results and count/extract detections; only counts are returned
+            # when the full detections go to an artifact
+            return_boxes = return_bounding_boxes and not detections_artifact_filename
+            built = _build_detections(
+                results[0] if results else None,  # First (and only) image result
+                object_class_ids,
+                return_boxes,
+                output_format,
+                current_tool_config,
             )
-
-        image_bytes = image_artifact_part.inline_data.data
-        log.debug(f"{log_identifier} Loaded image artifact: {len(image_bytes)} bytes")
-
-        # Convert to PIL Image
-        pil_image = Image.open(BytesIO(image_bytes))
-        log.debug(
-            f"{log_identifier} Converted to PIL Image: {pil_image.size}, mode: {pil_image.mode}"
-        )
-
-        # Load YOLO model
-        model = await _get_yolo_model(current_tool_config)
-
-        # Run inference
-        log.info(f"{log_identifier} Running YOLO inference...")
-        results = await asyncio.to_thread(
-            model.predict,
-            pil_image,
-            conf=confidence_threshold,
-            verbose=False
-        )
-
-        # Parse results and count/extract detections
-        if return_bounding_boxes:
-            # Initialize detections as lists for bounding box data
-            detections = {obj: [] for obj in normalized_objects}
-        else:
-            # Initialize detections as counts (backward compatible)
-            detections = {obj: 0 for obj in normalized_objects}
-
-        if results and len(results) > 0:
-            result = results[0]  # First (and only) image result
-
-            if result.boxes is not None and len(result.boxes) > 0:
-                # Get class indices
-                class_indices = result.boxes.cls.cpu().numpy()
-
-                if return_bounding_boxes:
-                    # Extract bounding boxes and confidence scores
-                    boxes_xyxy = result.boxes.xyxy.cpu().numpy()
-                    confidences = result.boxes.conf.cpu().numpy()
-
-                    for idx, class_idx in enumerate(class_indices):
-                        class_name = model.names[int(class_idx)]
-                        class_name_lower = class_name.lower()
-
-                        # Add detection with bbox and confidence if requested
-                        if class_name_lower in normalized_objects:
-                            bbox = boxes_xyxy[idx]
-                            detections[class_name_lower].append({
-                                "bbox": {
-                                    "x1": float(bbox[0]),
-                                    "y1": float(bbox[1]),
-                                    "x2": float(bbox[2]),
-                                    "y2": float(bbox[3])
-                                },
-                                "confidence": float(confidences[idx])
-                            })
-                else:
-                    # Just count detections (original behavior)
-                    for class_idx in class_indices:
-                        class_name = model.names[int(class_idx)]
-                        class_name_lower = class_name.lower()
-
-                        # Count if it's one of the requested objects
-                        if class_name_lower in normalized_objects:
-                            detections[class_name_lower] += 1
-
-                log.debug(f"{log_identifier} Raw detections: {detections}")
+        detections = built["detections"]
+        log.debug(f"{log_identifier} Raw detections: {detections}")
 
         # Calculate total count
-        if return_bounding_boxes:
-            total_count = sum(len(dets) for dets in detections.values())
-            count_summary = {obj: len(dets) for obj, dets in detections.items()}
+        if return_boxes:
+            total_count = sum(built["total_count"].values())
         else:
             total_count = sum(detections.values())
 
+        boxes_returned = total_count
         log.info(
-            f"{log_identifier} Detection completed. Found: {total_count} objects"
+            f"{log_identifier} Detection completed. Found: {total_count} objects "
+            f"({_format_timings(timings)})"
         )
 
         # Build return dictionary
@@ -299,13 +1076,55 @@ async def detect_objects_in_image(
             "message": "Detected objects in image successfully",
             "image_filename": filename_base_for_load,
             "image_version": version_to_load,
-            "detections": detections,
+            **built,
         }
 
-        # Add total_count summary when returning bounding boxes
-        if return_bounding_boxes:
-            result_dict["total_count"] = count_summary
+        if detections_artifact_filename:
+            result_dict.update(
+                await _save_detections_artifact(
+                    artifact_service,
+                    app_name,
+                    user_id,
+                    session_id,
+                    tool_context,
+                    detections_artifact_filename,
+                    [(filename_base_for_load, version_to_load, results[0] if results else None)],
+                    model.names,
+                    requested_class_ids,
+                    "detect_objects_in_image",
+                    log_identifier,
+                )
+            )
+
+        if annotate_image:
+            # Boxes are in original coordinates and are scaled to the decoded array
+            # while drawing. Only a cached result has no decode yet; it gets its one decode here
+            if prepared is None:
+                prepared = await _prepare_image(
+                    image_bytes, current_tool_config, timings, full_resolution=full_resolution
+                )
+            output_filename = annotated_output_filename or (
+                f"{os.path.splitext(filename_base_for_load)[0]}_annotated.jpg"
+            )
+            annotated_filename, annotated_version = await _save_annotated_image(
+                artifact_service,
+                app_name,
+                user_id,
+                session_id,
+                tool_context,
+                output_filename,
+                prepared,
+                results[0] if results else None,
+                model.names,
+                requested_class_ids,
+                filename_base_for_load,
+                version_to_load,
+                log_identifier,
+            )
+            result_dict["annotated_image_filename"] = annotated_filename
+            result_dict["annotated_image_version"] = annotated_version
 
+        status = "success"
         return result_dict
 
     except FileNotFoundError as e:
@@ -314,9 +1133,948 @@ async def detect_objects_in_image(
     except ValueError as ve:
         log.error(f"{log_identifier} Value error: {ve}")
         return {"status": "error", "message": str(ve)}
+    except InferenceQueueFullError as qe:
+        log.warning(f"{log_identifier} {qe}")
+        return {"status": "error", "message": str(qe)}
     except Exception as e:
         log.exception(f"{log_identifier} Unexpected error in detect_objects_in_image: {e}")
         return {"status": "error", "message": f"An unexpected error occurred: {e}"}
+    finally:
+        await gate_hold.aclose()
+        await model_lease.aclose()
+        metrics.record_request(
+            "detect_objects_in_image", status, timings, images=images_run, boxes=boxes_returned
+        )
+
+
+async def detect_objects_in_images(
+    image_filenames: list[str],
+    objects_to_detect: list[str],
+    return_bounding_boxes: bool = False,
+    output_format: str = "nested",
+    detections_artifact_filename: Optional[str] = None,
+    tool_context: Optional[ToolContext] = None,
+    tool_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Detects and counts specified objects across many images in one call.
+
+    Image artifacts are loaded concurrently and inference runs on batches of
+    images rather than one forward pass per image.
+
+    Args:
+        image_filenames: Filenames with optional versions (e.g., ["a.jpg", "b.jpg:2"])
+        objects_to_detect: List of COCO class names to look for
+        return_bounding_boxes: If True, returns bounding boxes and confidence scores per image.
+                              If False (default), returns only counts.
+        output_format: Layout of returned boxes: "nested" (default) or "columnar"
+                       (see detect_objects_in_image)
+        detections_artifact_filename: If set, saves every box of the requested classes for
+                                      all images as one ".jsonl" or ".npz" artifact and
+                                      returns only the per-image counts
+        tool_context: Framework context for accessing artifact service
+        tool_config: Optional configuration:
+            - model_name: YOLO model to use (default: "yolo11m.pt")
+            - confidence_threshold: Minimum confidence score (default: 0.25)
+            - coordinate_decimals / confidence_decimals: Columnar rounding
+                                                         (see detect_objects_in_image)
+            - batch_size: Number of images per model.predict call (default: 8)
+            - result_cache: Optional cache of raw detections (see detect_objects_in_image);
+                            cached images skip inference
+            - sliced_inference: Optional tiled inference for high-resolution images
+                                (see detect_objects_in_image)
+            - preprocessing: Image decoding options (see detect_objects_in_image)
+            - inference_executor: Inference thread pool options (see detect_objects_in_image)
+            - process_pool: Worker process options (see detect_objects_in_image)
+            - region_of_interest: Region each image is cropped to (see detect_objects_in_image)
+            - change_gate: Reuse of detections for images that barely differ from the
+                           previously analyzed one in the list (see detect_objects_in_image)
+
+    Returns:
+        Dictionary with status, message, per-image results and aggregate counts:
+            {
+                "status": "success",
+                "message": "Detected objects in 2 of 2 images",
+                "results": [
+                    {
+                        "status": "success",
+                        "image_filename": "a.jpg",
+                        "image_version": 1,
+                        "detections": {"person": 3}
+                    },
+                    ...
+                ],
+                "aggregate_counts": {"person": 5},
+                "images_processed": 2,
+                "images_failed": 0
+            }
+
+        When detections_artifact_filename is set, the result also contains
+        "detections_artifact_filename", "detections_artifact_version" and
+        "detections_artifact_boxes". With the change gate enabled, "images_reused"
+        counts the images that reused earlier detections.
+    """
+    log_identifier = f"[ObjectDetection:detect_objects_in_images:{len(image_filenames)} images]"
+
+    if not tool_context:
+        log.error(f"{log_identifier} ToolContext is missing.")
+        return {"status": "error", "message": "ToolContext is missing."}
+
+    timings: Dict[str, float] = {}
+    # Holds the model until the call ends so it is not evicted part-way
+    model_lease = AsyncExitStack()
+    status = "error"
+    images_run = 0
+    boxes_returned = 0
+    try:
+        # Extract invocation context
+        inv_context = tool_context._invocation_context
+        if not inv_context:
+            raise ValueError("InvocationContext is not available.")
+
+        app_name = getattr(inv_context, "app_name", None)
+        user_id = getattr(inv_context, "user_id", None)
+        session_id = get_original_session_id(inv_context)
+        artifact_service = getattr(inv_context, "artifact_service", None)
+
+        if not all([app_name, user_id, session_id, artifact_service]):
+            missing_parts = [
+                part
+                for part, val in [
+                    ("app_name", app_name),
+                    ("user_id", user_id),
+                    ("session_id", session_id),
+                    ("artifact_service", artifact_service),
+                ]
+                if not val
+            ]
+            raise ValueError(
+                f"Missing required context parts: {', '.join(missing_parts)}"
+            )
+
+        if not image_filenames:
+            raise ValueError("image_filenames must contain at least one image.")
+
+        log.info(f"{log_identifier} Processing request for session {session_id}.")
+
+        # Get tool configuration
+        current_tool_config = tool_config if tool_config is not None else {}
+        confidence_threshold = current_tool_config.get("confidence_threshold", 0.25)
+        batch_size = max(1, int(current_tool_config.get("batch_size", 8)))
+
+        normalized_objects = _normalize_objects_to_detect(objects_to_detect)
+        validate_output_format(output_format)
+        if detections_artifact_filename:
+            artifact_mime_type(detections_artifact_filename)
+
+        # Load all image artifacts concurrently; a missing image fails only its own entry.
+        # Loads overlap, so the wall time of the whole gather is recorded as one stage.
+        with stage(timings, "artifact_load"):
+            loaded = await asyncio.gather(
+                *[
+                    _load_image_artifact(
+                        artifact_service, app_name, user_id, session_id, name, log_identifier
+                    )
+                    for name in image_filenames
+                ],
+                return_exceptions=True,
+            )
+
+        result_cache = _get_result_cache(current_tool_config)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_filenames)
+        loaded_images: List[Tuple[int, str, int]] = []
+        cached: Dict[int, DetectionResult] = {}
+        cache_keys: Dict[int, str] = {}
+        pending: List[Tuple[int, bytes]] = []
+        for index, (name, item) in enumerate(zip(image_filenames, loaded)):
+            if isinstance(item, BaseException):
+                if not isinstance(item, (FileNotFoundError, ValueError)):
+                    raise item
+                log.warning(f"{log_identifier} Skipping '{name}': {item}")
+                results[index] = {"status": "error", "image_filename": name, "message": str(item)}
+                continue
+            filename_base, version, image_bytes = item
+            loaded_images.append((index, filename_base, version))
+            if result_cache is not None:
+                cache_keys[index] = _result_cache_key(
+                    current_tool_config, image_bytes, confidence_threshold
+                )
+                cached_result = await result_cache.get(cache_keys[index])
+                metrics.increment("cache_hits" if cached_result is not None else "cache_misses")
+                if cached_result is not None:
+                    cached[index] = cached_result
+                    continue
+            pending.append((index, image_bytes))
+
+        model = await model_lease.enter_async_context(
+            _use_yolo_model(current_tool_config, tool_context)
+        )
+        object_class_ids = _resolve_class_ids(model.names, normalized_objects)
+        requested_class_ids = sorted(
+            {index for index in object_class_ids.values() if index is not None}
+        )
+
+        if cached:
+            log.info(f"{log_identifier} Serving {len(cached)} images from the result cache.")
+        roi = RegionOfInterest.from_config(current_tool_config.get("region_of_interest"))
+        gate_config = current_tool_config.get("change_gate", {})
+        # Images are compared in the order they were given, like frames of one camera
+        gate = ChangeGate.from_config(gate_config) if gate_config.get("enabled", False) else None
+        detection_results: Dict[int, Any] = dict(cached)
+        images_reused = 0
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            # Decode the batch concurrently in the decode pool, reduced to model resolution
+            with stage(timings, "decode"):
+                prepared_images = await asyncio.gather(
+                    *[_prepare_image(image_bytes, current_tool_config) for _, image_bytes in batch]
+                )
+            with stage(timings, "preprocess"):
+                crops = await asyncio.to_thread(
+                    lambda: [
+                        _crop_to_roi(prepared.array, prepared.original_size, roi)
+                        for prepared in prepared_images
+                    ]
+                )
+                to_run, reused = await asyncio.to_thread(
+                    _split_by_change_gate, gate, [index for index, _ in batch], [c[0] for c in crops]
+                )
+            batch_results = []
+            if to_run:
+                log.info(
+                    f"{log_identifier} Running YOLO inference on batch of {len(to_run)} images..."
+                )
+                batch_results = await _run_inference(
+                    current_tool_config,
+                    predict_images,
+                    model,
+                    [crops[position][0] for position in to_run],
+                    confidence_threshold,
+                    None if result_cache is not None else requested_class_ids,
+                    current_tool_config.get("sliced_inference", {}),
+                    stage_timings=timings,
+                )
+            images_run += len(to_run)
+            images_reused += len(reused)
+            with stage(timings, "postprocess"):
+                for position, result in zip(to_run, batch_results):
+                    index = batch[position][0]
+                    result = _restore_result(result, crops[position][1], prepared_images[position])
+                    detection_results[index] = result
+                    if result_cache is not None:
+                        await result_cache.put(cache_keys[index], result)
+                # Reused images point at an earlier image of this or a previous batch
+                for index, reference_index in reused.items():
+                    detection_results[index] = detection_results[reference_index]
+        if images_reused:
+            metrics.increment("change_gate_reuses", images_reused)
+            log.info(f"{log_identifier} {images_reused} unchanged images reused earlier detections.")
+
+        aggregate_counts = {obj: 0 for obj in normalized_objects}
+        return_boxes = return_bounding_boxes and not detections_artifact_filename
+        with stage(timings, "postprocess"):
+            for index, filename_base, version in loaded_images:
+                built = _build_detections(
+                    detection_results.get(index),
+                    object_class_ids,
+                    return_boxes,
+                    output_format,
+                    current_tool_config,
+                )
+                counts = built["total_count"] if return_boxes else built["detections"]
+                for obj, count in counts.items():
+                    aggregate_counts[obj] += count
+                results[index] = {
+                    "status": "success",
+                    "image_filename": filename_base,
+                    "image_version": version,
+                    **built,
+                }
+
+        images_failed = len(image_filenames) - len(loaded_images)
+        boxes_returned = sum(aggregate_counts.values())
+        log.info(
+            f"{log_identifier} Detection completed over {len(loaded_images)} images. "
+            f"Found: {boxes_returned} objects ({_format_timings(timings)})"
+        )
+
+        result_dict = {
+            "status": "success" if loaded_images else "error",
+            "message": f"Detected objects in {len(loaded_images)} of {len(image_filenames)} images",
+            "results": results,
+            "aggregate_counts": aggregate_counts,
+            "images_processed": len(loaded_images),
+            "images_failed": images_failed,
+        }
+        if gate is not None:
+            result_dict["images_reused"] = images_reused
+        if detections_artifact_filename and loaded_images:
+            result_dict.update(
+                await _save_detections_artifact(
+                    artifact_service,
+                    app_name,
+                    user_id,
+                    session_id,
+                    tool_context,
+                    detections_artifact_filename,
+                    [
+                        (filename_base, version, detection_results.get(index))
+                        for index, filename_base, version in loaded_images
+                    ],
+                    model.names,
+                    requested_class_ids,
+                    "detect_objects_in_images",
+                    log_identifier,
+                )
+            )
+
+        status = result_dict["status"]
+        return result_dict
+
+    except FileNotFoundError as e:
+        log.warning(f"{log_identifier} File not found error: {e}")
+        return {"status": "error", "message": str(e)}
+    except ValueError as ve:
+        log.error(f"{log_identifier} Value error: {ve}")
+        return {"status": "error", "message": str(ve)}
+    except InferenceQueueFullError as qe:
+        log.warning(f"{log_identifier} {qe}")
+        return {"status": "error", "message": str(qe)}
+    except Exception as e:
+        log.exception(f"{log_identifier} Unexpected error in detect_objects_in_images: {e}")
+        return {"status": "error", "message": f"An unexpected error occurred: {e}"}
+    finally:
+        await model_lease.aclose()
+        metrics.record_request(
+            "detect_objects_in_images", status, timings, images=images_run, boxes=boxes_returned
+        )
+
+
+async def detect_objects_in_video(
+    video_filename: str,
+    objects_to_detect: list[str],
+    frame_stride: int = 1,
+    sample_interval_seconds: Optional[float] = None,
+    tool_context: Optional[ToolContext] = None,
+    tool_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Detects and counts specified objects in sampled frames of a video or animated image.
+
+    Frames are decoded one batch at a time and run through batched inference, so
+    memory use does not grow with the length of the video.
+
+    Args:
+        video_filename: MP4, GIF or WebP filename with optional version (e.g., "clip.mp4:2")
+        objects_to_detect: List of COCO class names to look for
+        frame_stride: Analyze every Nth frame (default: 1, every frame)
+        sample_interval_seconds: Analyze one frame per this many seconds of video time
+                                 instead of using frame_stride
+        tool_context: Framework context for accessing artifact service
+        tool_config: Optional configuration:
+            - model_name: YOLO model to use (default: "yolo11m.pt")
+            - confidence_threshold: Minimum confidence score (default: 0.25)
+            - batch_size: Number of frames per model.predict call (default: 8)
+            - max_frames: Maximum number of sampled frames to analyze (default: 300)
+            - inference_executor: Inference thread pool options (see detect_objects_in_image)
+            - process_pool: Worker process options (see detect_objects_in_image)
+            - region_of_interest: Region each frame is cropped to (see detect_objects_in_image)
+            - change_gate: Reuse of detections for sampled frames that barely differ from
+                           the last analyzed frame (see detect_objects_in_image)
+
+    Returns:
+        Dictionary with status, message, per-frame counts and aggregates:
+            {
+                "status": "success",
+                "message": "Detected objects in 30 sampled frames",
+                "video_filename": "clip.mp4",
+                "video_version": 1,
+                "frames": [
+                    {"frame_index": 0, "timestamp_seconds": 0.0, "detections": {"person": 2}},
+                    ...
+                ],
+                "frames_analyzed": 30,
+                "aggregate_counts": {"person": 57},
+                "max_counts_per_frame": {"person": 3}
+            }
+
+        With the change gate enabled, "frames_reused" counts the frames that reused
+        the detections of an earlier frame.
+    """
+    log_identifier = f"[ObjectDetection:detect_objects_in_video:{video_filename}]"
+
+    if not tool_context:
+        log.error(f"{log_identifier} ToolContext is missing.")
+        return {"status": "error", "message": "ToolContext is missing."}
+
+    timings: Dict[str, float] = {}
+    # Holds the model until the call ends so it is not evicted part-way
+    model_lease = AsyncExitStack()
+    status = "error"
+    boxes_returned = 0
+    frame_results: List[Dict[str, Any]] = []
+    try:
+        # Extract invocation context
+        inv_context = tool_context._invocation_context
+        if not inv_context:
+            raise ValueError("InvocationContext is not available.")
+
+        app_name = getattr(inv_context, "app_name", None)
+        user_id = getattr(inv_context, "user_id", None)
+        session_id = get_original_session_id(inv_context)
+        artifact_service = getattr(inv_context, "artifact_service", None)
+
+        if not all([app_name, user_id, session_id, artifact_service]):
+            missing_parts = [
+                part
+                for part, val in [
+                    ("app_name", app_name),
+                    ("user_id", user_id),
+                    ("session_id", session_id),
+                    ("artifact_service", artifact_service),
+                ]
+                if not val
+            ]
+            raise ValueError(
+                f"Missing required context parts: {', '.join(missing_parts)}"
+            )
+
+        if frame_stride < 1:
+            raise ValueError("frame_stride must be at least 1.")
+        if sample_interval_seconds is not None and sample_interval_seconds <= 0:
+            raise ValueError("sample_interval_seconds must be positive.")
+
+        log.info(f"{log_identifier} Processing request for session {session_id}.")
+
+        # Get tool configuration
+        current_tool_config = tool_config if tool_config is not None else {}
+        confidence_threshold = current_tool_config.get("confidence_threshold", 0.25)
+        batch_size = max(1, int(current_tool_config.get("batch_size", 8)))
+        max_frames = current_tool_config.get("max_frames", 300)
+
+        normalized_objects = _normalize_objects_to_detect(objects_to_detect)
+
+        filename_base_for_load, version_to_load, video_bytes = await _load_image_artifact(
+            artifact_service, app_name, user_id, session_id, video_filename, log_identifier,
+            timings=timings,
+        )
+
+        model = await model_lease.enter_async_context(
+            _use_yolo_model(current_tool_config, tool_context)
+        )
+        object_class_ids = _resolve_class_ids(model.names, normalized_objects)
+        requested_class_ids = sorted(
+            {index for index in object_class_ids.values() if index is not None}
+        )
+
+        frames = iter_frames(
+            video_bytes,
+            frame_stride=frame_stride,
+            sample_interval_seconds=sample_interval_seconds,
+            max_frames=max_frames,
+        )
+        roi = RegionOfInterest.from_config(current_tool_config.get("region_of_interest"))
+        gate_config = current_tool_config.get("change_gate", {})
+        gate = ChangeGate.from_config(gate_config) if gate_config.get("enabled", False) else None
+        frame_counts: Dict[int, Dict[str, int]] = {}
+        frames_reused = 0
+        aggregate_counts = {obj: 0 for obj in normalized_objects}
+        max_counts_per_frame = {obj: 0 for obj in normalized_objects}
+        try:
+            while True:
+                # Decoding is blocking, so each batch of frames is pulled in a worker thread
+                with stage(timings, "decode"):
+                    batch = await asyncio.to_thread(next_batch, frames, batch_size)
+                if not batch:
+                    break
+                crops = [(image, None) for _, _, image in batch]
+                with stage(timings, "preprocess"):
+                    if roi is not None or gate is not None:
+                        crops = await asyncio.to_thread(
+                            lambda: [
+                                _crop_to_roi(np.asarray(image), image.size, roi)
+                                for _, _, image in batch
+                            ]
+                        )
+                    # Each sampled frame is compared with the last frame that was analyzed
+                    to_run, reused = await asyncio.to_thread(
+                        _split_by_change_gate,
+                        gate,
+                        [frame_index for frame_index, _, _ in batch],
+                        [c[0] for c in crops],
+                    )
+                batch_results = []
+                if to_run:
+                    log.debug(
+                        f"{log_identifier} Running YOLO inference on {len(to_run)} frames "
+                        f"starting at frame {batch[to_run[0]][0]}..."
+                    )
+                    batch_results = await _run_inference(
+                        current_tool_config,
+                        model.predict,
+                        [crops[position][0] for position in to_run],
+                        conf=confidence_threshold,
+                        classes=requested_class_ids,
+                        stage_timings=timings,
+                    )
+                frames_reused += len(reused)
+                with stage(timings, "postprocess"):
+                    for position, result in zip(to_run, batch_results):
+                        result = _restore_result(result, crops[position][1])
+                        frame_counts[batch[position][0]] = _build_detections(
+                            result, object_class_ids, False
+                        )["detections"]
+                    for frame_index, reference_index in reused.items():
+                        frame_counts[frame_index] = dict(frame_counts[reference_index])
+                    for frame_index, timestamp, _ in batch:
+                        counts = frame_counts[frame_index]
+                        for obj, count in counts.items():
+                            aggregate_counts[obj] += count
+                            max_counts_per_frame[obj] = max(max_counts_per_frame[obj], count)
+                        frame_results.append(
+                            {
+                                "frame_index": frame_index,
+                                "timestamp_seconds": round(timestamp, 3),
+                                "detections": counts,
+                            }
+                        )
+        finally:
+            frames.close()
+
+        if not frame_results:
+            raise ValueError(f"No frames could be decoded from '{filename_base_for_load}'.")
+
+        boxes_returned = sum(aggregate_counts.values())
+        if frames_reused:
+            metrics.increment("change_gate_reuses", frames_reused)
+            log.info(f"{log_identifier} {frames_reused} unchanged frames reused earlier detections.")
+        log.info(
+            f"{log_identifier} Detection completed over {len(frame_results)} frames. "
+            f"Found: {boxes_returned} objects ({_format_timings(timings)})"
+        )
+
+        status = "success"
+        result_dict = {
+            "status": "success",
+            "message": f"Detected objects in {len(frame_results)} sampled frames",
+            "video_filename": filename_base_for_load,
+            "video_version": version_to_load,
+            "frames": frame_results,
+            "frames_analyzed": len(frame_results),
+            "aggregate_counts": aggregate_counts,
+            "max_counts_per_frame": max_counts_per_frame,
+        }
+        if gate is not None:
+            result_dict["frames_reused"] = frames_reused
+        return result_dict
+
+    except FileNotFoundError as e:
+        log.warning(f"{log_identifier} File not found error: {e}")
+        return {"status": "error", "message": str(e)}
+    except ValueError as ve:
+        log.error(f"{log_identifier} Value error: {ve}")
+        return {"status": "error", "message": str(ve)}
+    except InferenceQueueFullError as qe:
+        log.warning(f"{log_identifier} {qe}")
+        return {"status": "error", "message": str(qe)}
+    except Exception as e:
+        log.exception(f"{log_identifier} Unexpected error in detect_objects_in_video: {e}")
+        return {"status": "error", "message": f"An unexpected error occurred: {e}"}
+    finally:
+        await model_lease.aclose()
+        metrics.record_request(
+            "detect_objects_in_video", status, timings,
+            images=len(frame_results), boxes=boxes_returned,
+        )
+
+
+async def _list_image_artifacts(
+    artifact_service: Any,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    filename_pattern: str,
+) -> List[str]:
+    """Names of the session's image artifacts matching a glob pattern (case-insensitive), sorted."""
+    list_keys_method = getattr(artifact_service, "list_artifact_keys")
+    if inspect.iscoroutinefunction(list_keys_method):
+        keys = await list_keys_method(app_name=app_name, user_id=user_id, session_id=session_id)
+    else:
+        keys = await asyncio.to_thread(
+            list_keys_method, app_name=app_name, user_id=user_id, session_id=session_id
+        )
+    pattern = filename_pattern.lower()
+    return sorted(
+        key
+        for key in keys or []
+        if os.path.splitext(key)[1].lower() in IMAGE_EXTENSIONS and fnmatch(key.lower(), pattern)
+    )
+
+
+def _report_progress(tool_context: Any, log_identifier: str, progress: Dict[str, Any]) -> None:
+    """
+    Log progress of a long-running tool and send it to the caller as a status update.
+
+    The update is an agent_progress_update signal published through the host
+    component, so gateways show it while the tool is still running.
+    """
+    status_text = (
+        f"Analyzed {progress['images_done']}/{progress['images_total']} images, "
+        f"counts so far: {progress['aggregate_counts']}"
+    )
+    log.info(f"{log_identifier} Progress: {status_text}")
+    if AgentProgressUpdateData is None:
+        return
+    try:
+        host_component = getattr(tool_context._invocation_context.agent, "host_component", None)
+        a2a_context = tool_context.state.get("a2a_context")
+        if host_component is None or not a2a_context:
+            return
+        host_component.publish_data_signal_from_thread(
+            a2a_context=a2a_context,
+            signal_data=AgentProgressUpdateData(status_text=status_text),
+            skip_buffer_flush=False,
+            log_identifier=log_identifier,
+        )
+    except Exception as e:
+        log.debug(f"{log_identifier} Could not send progress update: {e}")
+
+
+async def count_objects_in_session_images(
+    objects_to_detect: list[str],
+    filename_pattern: str = "*",
+    results_artifact_filename: Optional[str] = None,
+    tool_context: Optional[ToolContext] = None,
+    tool_config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Counts specified objects across every image artifact in the session matching a pattern.
+
+    Matching artifacts are streamed through batched detection: only the current
+    batch and the next one (loaded while the current batch runs) are held in
+    memory, so the collection can be arbitrarily large. Per-image counts are
+    written to a JSON Lines artifact instead of being returned.
+
+    Args:
+        objects_to_detect: List of COCO class names to look for
+        filename_pattern: Glob pattern for artifact names, case-insensitive
+                          (default: "*", every image artifact)
+        results_artifact_filename: Artifact receiving one JSON line of counts per image
+                                   (default: "object_counts.jsonl")
+        tool_context: Framework context for accessing artifact service
+        tool_config: Optional configuration:
+            - model_name: YOLO model to use (default: "yolo11m.pt")
+            - confidence_threshold: Minimum confidence score (default: 0.25)
+            - batch_size: Number of images per model.predict call (default: 8)
+            - max_images: Maximum matching images to analyze (default: 1000)
+            - result_cache: Optional cache of raw detections (see detect_objects_in_image)
+            - sliced_inference: Optional tiled inference (see detect_objects_in_image)
+            - preprocessing: Image decoding options (see detect_objects_in_image)
+            - inference_executor: Inference thread pool options (see detect_objects_in_image)
+            - process_pool: Worker process options (see detect_objects_in_image)
+            - region_of_interest: Region each image is cropped to (see detect_objects_in_image)
+            - change_gate: Reuse of detections for images that barely differ from the
+                           previous matching image in name order (see detect_objects_in_image)
+
+    Returns:
+        Dictionary with status, message and aggregate counts:
+            {
+                "status": "success",
+                "message": "Counted objects in 120 of 120 images matching 'cam1_*'",
+                "filename_pattern": "cam1_*",
+                "images_matched": 120,
+                "images_processed": 120,
+                "images_failed": 0,
+                "truncated": false,
+                "aggregate_counts": {"car": 431},
+                "images_containing": {"car": 97},
+                "results_artifact_filename": "object_counts.jsonl",
+                "results_artifact_version": 1
+            }
+
+        With the change gate enabled, the result also contains "images_reused".
+    """
+    log_identifier = f"[ObjectDetection:count_objects_in_session_images:{filename_pattern}]"
+
+    if not tool_context:
+        log.error(f"{log_identifier} ToolContext is missing.")
+        return {"status": "error", "message": "ToolContext is missing."}
+
+    timings: Dict[str, float] = {}
+    # Holds the model until the call ends so it is not evicted part-way
+    model_lease = AsyncExitStack()
+    status = "error"
+    images_run = 0
+    boxes_returned = 0
+    next_load: Optional[asyncio.Future] = None
+    try:
+        # Extract invocation context
+        inv_context = tool_context._invocation_context
+        if not inv_context:
+            raise ValueError("InvocationContext is not available.")
+
+        app_name = getattr(inv_context, "app_name", None)
+        user_id = getattr(inv_context, "user_id", None)
+        session_id = get_original_session_id(inv_context)
+        artifact_service = getattr(inv_context, "artifact_service", None)
+
+        if not all([app_name, user_id, session_id, artifact_service]):
+            missing_parts = [
+                part
+                for part, val in [
+                    ("app_name", app_name),
+                    ("user_id", user_id),
+                    ("session_id", session_id),
+                    ("artifact_service", artifact_service),
+                ]
+                if not val
+            ]
+            raise ValueError(
+                f"Missing required context parts: {', '.join(missing_parts)}"
+            )
+
+        log.info(f"{log_identifier} Processing request for session {session_id}.")
+
+        # Get tool configuration
+        current_tool_config = tool_config if tool_config is not None else {}
+        confidence_threshold = current_tool_config.get("confidence_threshold", 0.25)
+        batch_size = max(1, int(current_tool_config.get("batch_size", 8)))
+        max_images = current_tool_config.get("max_images", 1000)
+        output_filename = results_artifact_filename or "object_counts.jsonl"
+
+        normalized_objects = _normalize_objects_to_detect(objects_to_detect)
+
+        with stage(timings, "version_lookup"):
+            matched = await _list_image_artifacts(
+                artifact_service, app_name, user_id, session_id, filename_pattern
+            )
+        if not matched:
+            raise FileNotFoundError(f"No image artifacts match '{filename_pattern}'.")
+        truncated = len(matched) > max_images
+        matched = matched[:max_images]
+        log.info(
+            f"{log_identifier} {len(matched)} matching images"
+            f"{f' (limited to max_images={max_images})' if truncated else ''}"
+        )
+
+        model = await model_lease.enter_async_context(
+            _use_yolo_model(current_tool_config, tool_context)
+        )
+        object_class_ids = _resolve_class_ids(model.names, normalized_objects)
+        requested_class_ids = sorted(
+            {index for index in object_class_ids.values() if index is not None}
+        )
+        result_cache = _get_result_cache(current_tool_config)
+
+        def load_batch(names: List[str]) -> asyncio.Future:
+            return asyncio.ensure_future(
+                asyncio.gather(
+                    *[
+                        _load_image_artifact(
+                            artifact_service, app_name, user_id, session_id, name, log_identifier
+                        )
+                        for name in names
+                    ],
+                    return_exceptions=True,
+                )
+            )
+
+        roi = RegionOfInterest.from_config(current_tool_config.get("region_of_interest"))
+        gate_config = current_tool_config.get("change_gate", {})
+        # Matching images are compared in name order, which is capture order for camera series
+        gate = ChangeGate.from_config(gate_config) if gate_config.get("enabled", False) else None
+        # Detections of analyzed images by position in `matched`, kept while a gate may reuse them
+        gated_results: Dict[int, DetectionResult] = {}
+        images_reused = 0
+
+        batches = [matched[start:start + batch_size] for start in range(0, len(matched), batch_size)]
+        aggregate_counts = {obj: 0 for obj in normalized_objects}
+        images_containing = {obj: 0 for obj in normalized_objects}
+        result_lines: List[str] = []
+        images_done = 0
+        images_failed = 0
+        next_load = load_batch(batches[0])
+        for batch_number, names in enumerate(batches):
+            # Only the wait for artifacts not yet loaded in the background is recorded
+            with stage(timings, "artifact_load"):
+                loaded = await next_load
+            next_load = load_batch(batches[batch_number + 1]) if batch_number + 1 < len(batches) else None
+
+            batch_results: Dict[int, Optional[DetectionResult]] = {}
+            pending: List[Tuple[int, bytes, Optional[str]]] = []
+            for position, (name, item) in enumerate(zip(names, loaded)):
+                if isinstance(item, BaseException):
+                    if not isinstance(item, (FileNotFoundError, ValueError)):
+                        raise item
+                    log.warning(f"{log_identifier} Skipping '{name}': {item}")
+                    images_failed += 1
+                    result_lines.append(
+                        json.dumps({"image_filename": name, "status": "error", "message": str(item)})
+                    )
+                    continue
+                cache_key = None
+                if result_cache is not None:
+                    cache_key = _result_cache_key(current_tool_config, item[2], confidence_threshold)
+                    cached_result = await result_cache.get(cache_key)
+                    metrics.increment("cache_hits" if cached_result is not None else "cache_misses")
+                    if cached_result is not None:
+                        batch_results[position] = cached_result
+                        continue
+                pending.append((position, item[2], cache_key))
+
+            if pending:
+                with stage(timings, "decode"):
+                    prepared_images = await asyncio.gather(
+                        *[_prepare_image(image_bytes, current_tool_config) for _, image_bytes, _ in pending]
+                    )
+                with stage(timings, "preprocess"):
+                    crops = await asyncio.to_thread(
+                        lambda: [
+                            _crop_to_roi(prepared.array, prepared.original_size, roi)
+                            for prepared in prepared_images
+                        ]
+                    )
+                    to_run, reused = await asyncio.to_thread(
+                        _split_by_change_gate,
+                        gate,
+                        [images_done + position for position, _, _ in pending],
+                        [c[0] for c in crops],
+                    )
+                inference_results = []
+                if to_run:
+                    inference_results = await _run_inference(
+                        current_tool_config,
+                        predict_images,
+                        model,
+                        [crops[index][0] for index in to_run],
+                        confidence_threshold,
+                        None if result_cache is not None else requested_class_ids,
+                        current_tool_config.get("sliced_inference", {}),
+                        stage_timings=timings,
+                    )
+                images_run += len(to_run)
+                images_reused += len(reused)
+                for index, result in zip(to_run, inference_results):
+                    position, _, cache_key = pending[index]
+                    result = _restore_result(result, crops[index][1], prepared_images[index])
+                    batch_results[position] = result
+                    if cache_key is not None:
+                        await result_cache.put(cache_key, result)
+                    if gate is not None:
+                        gated_results[images_done + position] = result
+                for key, reference_key in reused.items():
+                    batch_results[key - images_done] = gated_results[reference_key]
+                if gate is not None:
+                    gated_results = {
+                        key: value for key, value in gated_results.items()
+                        if key == gate.reference_result
+                    }
+
+            with stage(timings, "postprocess"):
+                for position, result in sorted(batch_results.items()):
+                    filename_base, version, _ = loaded[position]
+                    counts = _build_detections(result, object_class_ids, False)["detections"]
+                    for obj, count in counts.items():
+                        aggregate_counts[obj] += count
+                        images_containing[obj] += int(count > 0)
+                    result_lines.append(
+                        json.dumps(
+                            {
+                                "image_filename": filename_base,
+                                "image_version": version,
+                                "status": "success",
+                                "detections": counts,
+                            }
+                        )
+                    )
+            images_done += len(names)
+            _report_progress(
+                tool_context,
+                log_identifier,
+                {
+                    "images_done": images_done,
+                    "images_total": len(matched),
+                    "aggregate_counts": dict(aggregate_counts),
+                },
+            )
+
+        images_processed = len(matched) - images_failed
+        timestamp = datetime.now(timezone.utc)
+        save_result = await save_artifact_with_metadata(
+            artifact_service=artifact_service,
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            filename=output_filename,
+            content_bytes=("\n".join(result_lines) + "\n").encode("utf-8"),
+            mime_type="application/x-ndjson",
+            metadata_dict={
+                "description": f"Per-image object counts for images matching '{filename_pattern}'",
+                "source_tool": "count_objects_in_session_images",
+                "filename_pattern": filename_pattern,
+                "classes": normalized_objects,
+                "images_processed": images_processed,
+                "images_failed": images_failed,
+                "creation_timestamp_iso": timestamp.isoformat(),
+            },
+            timestamp=timestamp,
+            schema_max_keys=DEFAULT_SCHEMA_MAX_KEYS,
+            tool_context=tool_context,
+        )
+        if save_result.get("status") == "error":
+            raise IOError(f"Failed to save per-image counts: {save_result.get('message')}")
+
+        boxes_returned = sum(aggregate_counts.values())
+        if images_reused:
+            metrics.increment("change_gate_reuses", images_reused)
+            log.info(f"{log_identifier} {images_reused} unchanged images reused earlier detections.")
+        log.info(
+            f"{log_identifier} Counting completed over {images_processed} images. "
+            f"Found: {boxes_returned} objects ({_format_timings(timings)})"
+        )
+
+        status = "success" if images_processed else "error"
+        result_dict = {
+            "status": status,
+            "message": (
+                f"Counted objects in {images_processed} of {len(matched)} images "
+                f"matching '{filename_pattern}'"
+            ),
+            "filename_pattern": filename_pattern,
+            "images_matched": len(matched),
+            "images_processed": images_processed,
+            "images_failed": images_failed,
+            "truncated": truncated,
+            "aggregate_counts": aggregate_counts,
+            "images_containing": images_containing,
+            "results_artifact_filename": output_filename,
+            "results_artifact_version": save_result["data_version"],
+        }
+        if gate is not None:
+            result_dict["images_reused"] = images_reused
+        return result_dict
+
+    except FileNotFoundError as e:
+        log.warning(f"{log_identifier} File not found error: {e}")
+        return {"status": "error", "message": str(e)}
+    except ValueError as ve:
+        log.error(f"{log_identifier} Value error: {ve}")
+        return {"status": "error", "message": str(ve)}
+    except InferenceQueueFullError as qe:
+        log.warning(f"{log_identifier} {qe}")
+        return {"status": "error", "message": str(qe)}
+    except Exception as e:
+        log.exception(f"{log_identifier} Unexpected error in count_objects_in_session_images: {e}")
+        return {"status": "error", "message": f"An unexpected error occurred: {e}"}
+    finally:
+        await model_lease.aclose()
+        if next_load is not None and not next_load.done():
+            next_load.cancel()
+        metrics.record_request(
+            "count_objects_in_session_images", status, timings,
+            images=images_run, boxes=boxes_returned,
+        )
 
 
 async def example_text_processor_tool(
@@ -0,0 +1,137 @@
+import logging
+import os
+import tempfile
+from io import BytesIO
+from typing import Iterator, List, Optional, Tuple
+
+from PIL import Image
+
+log = logging.getLogger(__name__)
+
+# A sampled frame: (frame index, timestamp in seconds, RGB image)
+Frame = Tuple[int, float, Image.Image]
+
+
+def detect_container(data: bytes) -> str:
+    """
+    Identify the container format from the leading bytes.
+
+    Returns:
+        "gif", "webp" or "video" (anything else is handed to OpenCV)
+    """
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return "video"
+
+
+class _FrameSampler:
+    """Decides which frames to keep by stride or by time interval."""
+
+    def __init__(self, frame_stride: int = 1, sample_interval_seconds: Optional[float] = None):
+        self.frame_stride = max(1, int(frame_stride))
+        self.sample_interval_seconds = sample_interval_seconds
+        self._next_sample_time = 0.0
+
+    def keep(self, frame_index: int, timestamp: float) -> bool:
+        if self.sample_interval_seconds:
+            if timestamp + 1e-6 < self._next_sample_time:
+                return False
+            self._next_sample_time += self.sample_interval_seconds
+            # Skip ahead if frames are sparser than the interval
+            while self._next_sample_time <= timestamp:
+                self._next_sample_time += self.sample_interval_seconds
+            return True
+        return frame_index % self.frame_stride == 0
+
+
+def _iter_animated_image_frames(data: bytes, sampler: _FrameSampler) -> Iterator[Frame]:
+    """Yield sampled frames of an animated GIF or WebP, decoding one frame at a time."""
+    with Image.open(BytesIO(data)) as image:
+        frame_count = getattr(image, "n_frames", 1)
+        timestamp = 0.0
+        for frame_index in range(frame_count):
+            image.seek(frame_index)
+            if sampler.keep(frame_index, timestamp):
+                yield frame_index, timestamp, image.convert("RGB")
+            # Frame durations are in milliseconds; 0 or missing means "as fast as possible"
+            timestamp += (image.info.get("duration") or 100) / 1000.0
+
+
+def _iter_video_file_frames(data: bytes, sampler: _FrameSampler) -> Iterator[Frame]:
+    """Yield sampled frames of a video container (MP4 etc.) using OpenCV."""
+    import cv2  # Installed with ultralytics
+
+    # OpenCV reads from a path, so the artifact bytes are spooled to a temporary file
+    temp_file = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
+    try:
+        with temp_file:
+            temp_file.write(data)
+        capture = cv2.VideoCapture(temp_file.name)
+        if not capture.isOpened():
+            raise ValueError("Unsupported or corrupt video artifact.")
+        try:
+            fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_index = 0
+            # grab() advances without decoding the frame into an image; only
+            # sampled frames pay for retrieve() and colour conversion
+            while capture.grab():
+                timestamp = frame_index / fps
+                if sampler.keep(frame_index, timestamp):
+                    ok, frame = capture.retrieve()
+                    if ok:
+                        yield frame_index, timestamp, Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                frame_index += 1
+        finally:
+            capture.release()
+    finally:
+        os.unlink(temp_file.name)
+
+
+def iter_frames(
+    data: bytes,
+    frame_stride: int = 1,
+    sample_interval_seconds: Optional[float] = None,
+    max_frames: Optional[int] = None,
+) -> Iterator[Frame]:
+    """
+    Stream sampled frames from a video or animated image.
+
+    Frames are decoded lazily, so only the frames of the batch being processed
+    are held in memory regardless of the video length.
+
+    Args:
+        data: Encoded MP4 (or other OpenCV-readable video), GIF or WebP bytes
+        frame_stride: Keep every Nth frame (ignored when sample_interval_seconds is set)
+        sample_interval_seconds: Keep one frame per interval of video time
+        max_frames: Stop after this many sampled frames
+
+    Yields:
+        Tuples of (frame index, timestamp in seconds, RGB PIL image)
+    """
+    sampler = _FrameSampler(frame_stride, sample_interval_seconds)
+    container = detect_container(data)
+    if container == "video":
+        frames = _iter_video_file_frames(data, sampler)
+    else:
+        frames = _iter_animated_image_frames(data, sampler)
+
+    try:
+        for sampled, frame in enumerate(frames, start=1):
+            yield frame
+            if max_frames is not None and sampled >= max_frames:
+                log.info(f"[ObjectDetection:video] Stopped after max_frames={max_frames} sampled frames")
+                return
+    finally:
+        frames.close()
+
+
+def next_batch(frames: Iterator[Frame], batch_size: int) -> List[Frame]:
+    """Take up to batch_size frames from the iterator (blocking; run in a worker thread)."""
+    batch = []
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) >= batch_size:
+            break
+    return batch
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.annotation import _PALETTE, _edge_pixels, draw_detections
+from object_detection.backends import DetectionResult
+
+
+def _result(boxes, classes, shape):
+    boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+    return DetectionResult(boxes, np.full(len(boxes), 0.9, np.float32), np.asarray(classes, np.int64), shape)
+
+
+def test_edges_of_every_box_are_drawn_in_its_color():
+    boxes = np.array([[2, 3, 9, 8], [0, 0, 4, 4]], np.int64)
+    colors = np.array([[255, 0, 0], [0, 0, 255]], np.uint8)
+    canvas = np.zeros((12, 12, 3), np.uint8)
+    rows, columns, edge_colors = _edge_pixels(boxes, colors, thickness=1, height=12, width=12)
+    canvas[rows, columns] = edge_colors
+
+    red = (canvas == [255, 0, 0]).all(axis=2)
+    assert red[3, 5] and red[8, 5] and red[5, 2] and red[5, 9]
+    assert not red[5, 5]  # Interior untouched
+    blue = (canvas == [0, 0, 255]).all(axis=2)
+    assert blue[0, 0] and blue[4, 2] and not blue[2, 2]
+
+
+def test_boxes_are_scaled_to_a_reduced_decode():
+    image = np.zeros((50, 100, 3), np.uint8)
+    # Box in a 100x200 original, drawn on the half-size decode
+    result = _result([[20, 20, 100, 80]], [0], (100, 200))
+
+    annotated = np.asarray(draw_detections(image, result, {0: "person"}, thickness=1))
+    assert annotated.shape == image.shape
+    assert annotated[25, 10].tolist() == _PALETTE[0].tolist()  # Left edge
+    assert annotated[25, 50].tolist() == _PALETTE[0].tolist()  # Right edge
+    assert annotated[30, 30].tolist() == [0, 0, 0]
+    assert not image.any()  # The input array is not modified
+
+
+def test_only_requested_classes_are_drawn():
+    image = np.zeros((40, 40, 3), np.uint8)
+    result = _result([[5, 5, 30, 30]], [2], (40, 40))
+    assert not np.asarray(draw_detections(image, result, {2: "car"}, class_ids=[0])).any()
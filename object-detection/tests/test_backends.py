@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.backends import LETTERBOX_FILL, _ExportedBackend, letterbox
+
+
+class FixedOutputBackend(_ExportedBackend):
+    """Exported backend whose graph returns one fixed raw prediction per image."""
+
+    name = "fixed"
+
+    def __init__(self, raw):
+        super().__init__({0: "person", 1: "car"}, image_size=64)
+        self.raw = raw
+        self.batches = []
+
+    def _run(self, batch):
+        self.batches.append(batch.shape)
+        return np.stack([self.raw] * len(batch))
+
+
+def test_exported_backend_requires_a_graph_runner():
+    with pytest.raises(TypeError):
+        _ExportedBackend({0: "person"}, 64)
+
+
+def test_letterbox_pads_and_scales():
+    canvas, scale, (pad_x, pad_y) = letterbox(np.zeros((32, 64, 3), np.uint8), 64)
+    assert canvas.shape == (64, 64, 3)
+    assert (scale, pad_x, pad_y) == (1.0, 0, 16)
+    assert canvas[0, 0].tolist() == [LETTERBOX_FILL] * 3
+    assert canvas[16, 0].tolist() == [0, 0, 0]
+
+
+def test_exported_predict_decodes_boxes_into_original_coordinates():
+    # (4 + classes, anchors): cx, cy, w, h in letterboxed pixels, then class scores
+    raw = np.array(
+        [
+            [32.0, 32.0, 10.0],
+            [32.0, 32.0, 10.0],
+            [16.0, 16.0, 4.0],
+            [8.0, 8.0, 4.0],
+            [0.9, 0.1, 0.0],
+            [0.0, 0.8, 0.1],
+        ],
+        np.float32,
+    )
+    backend = FixedOutputBackend(raw)
+    image = np.zeros((64, 128, 3), np.uint8)  # letterboxed at scale 0.5 with 16px vertical padding
+
+    result = backend.predict([image], conf=0.5)[0]
+    assert backend.batches == [(1, 3, 64, 64)]
+    assert result.orig_shape == (64, 128)
+    # The two overlapping boxes have different classes, so both are kept
+    assert result.cls.tolist() == [0, 1]
+    assert result.xyxy[0].tolist() == [48.0, 24.0, 80.0, 40.0]
+
+    only_cars = backend.predict([image], conf=0.5, classes=[1])[0]
+    assert only_cars.cls.tolist() == [1]
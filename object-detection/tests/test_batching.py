@@ -0,0 +1,129 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection import batching
+from object_detection.batching import BatcherClosedError, MicroBatcher, get_batcher, remove_batchers
+
+
+def test_batches_concurrent_submits_and_scatters_results():
+    """Concurrent submits share one predict call and each caller gets its own result."""
+    calls = []
+
+    def predict_batch(images):
+        calls.append(list(images))
+        return [image * 10 for image in images]
+
+    async def run():
+        batcher = MicroBatcher(predict_batch, max_batch_size=8, max_wait_ms=50)
+        try:
+            return await asyncio.gather(*[batcher.submit(value) for value in range(4)])
+        finally:
+            batcher.close()
+
+    assert asyncio.run(run()) == [0, 10, 20, 30]
+    assert calls == [[0, 1, 2, 3]]
+
+
+def test_predict_error_is_scattered_to_every_caller():
+    """A failing predict fails every caller of that batch, and the batcher keeps serving."""
+    fail = True
+
+    def predict_batch(images):
+        if fail:
+            raise RuntimeError("model exploded")
+        return list(images)
+
+    async def run():
+        nonlocal fail
+        batcher = MicroBatcher(predict_batch, max_batch_size=4, max_wait_ms=20)
+        try:
+            results = await asyncio.gather(
+                *[batcher.submit(value) for value in range(3)], return_exceptions=True
+            )
+            fail = False
+            return results, await batcher.submit(7)
+        finally:
+            batcher.close()
+
+    results, later = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert later == 7
+
+
+def test_close_during_slow_predict_fails_the_in_flight_batch():
+    """Closing the batcher while a batch is predicting must not leave its callers waiting."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def predict_batch(images):
+        started.set()
+        release.wait(5)
+        return list(images)
+
+    async def run():
+        batcher = MicroBatcher(predict_batch, max_batch_size=4, max_wait_ms=0)
+        in_flight = [asyncio.ensure_future(batcher.submit(value)) for value in range(2)]
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.ensure_future(batcher.submit(99))
+        await asyncio.sleep(0)
+
+        batcher.close()
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*in_flight, queued, return_exceptions=True), timeout=2
+            )
+        finally:
+            release.set()
+
+    results = asyncio.run(run())
+    assert len(results) == 3
+    assert all(isinstance(result, BatcherClosedError) for result in results)
+
+
+def test_close_while_collecting_fails_partial_batch():
+    """Images already taken off the queue for a batch still being filled are failed on close."""
+
+    async def run():
+        batcher = MicroBatcher(lambda images: list(images), max_batch_size=4, max_wait_ms=5000)
+        waiting = asyncio.ensure_future(batcher.submit(1))
+        await asyncio.sleep(0.05)
+        batcher.close()
+        with pytest.raises(BatcherClosedError):
+            await asyncio.wait_for(waiting, timeout=2)
+
+    asyncio.run(run())
+
+
+def test_batchers_are_kept_per_batching_settings():
+    async def run_blocking(function, *args):
+        return function(*args)
+
+    def predict(images):
+        return images
+
+    try:
+        first = get_batcher(("model", 0.25), predict, max_batch_size=4, max_wait_ms=5.0)
+        assert get_batcher(("model", 0.25), predict, max_batch_size=4, max_wait_ms=5.0) is first
+        # A caller with other settings does not inherit the first caller's
+        larger = get_batcher(("model", 0.25), predict, max_batch_size=32, max_wait_ms=5.0)
+        slower = get_batcher(("model", 0.25), predict, max_batch_size=4, max_wait_ms=50.0)
+        other_runner = get_batcher(
+            ("model", 0.25), predict, max_batch_size=4, max_wait_ms=5.0, run_blocking=run_blocking
+        )
+        assert len({id(first), id(larger), id(slower), id(other_runner)}) == 4
+        assert larger.max_batch_size == 32
+        assert slower.max_wait_seconds == 0.05
+        assert other_runner.run_blocking is run_blocking
+
+        # Evicting the model drops every batcher created for it
+        assert remove_batchers(lambda key: key[0] == "model") == 4
+        assert not batching._batchers
+    finally:
+        remove_batchers(lambda key: True)
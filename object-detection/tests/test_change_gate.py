@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+import threading
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.change_gate import ChangeGate, get_change_gate
+
+
+def _frame(value=100, size=(120, 160)):
+    return np.full((*size, 3), value, np.uint8)
+
+
+def test_first_image_always_runs():
+    gate = ChangeGate()
+    assert not gate.is_unchanged(gate.signature(_frame()))
+
+
+def test_identical_and_noisy_images_reuse_the_reference():
+    gate = ChangeGate()
+    gate.set_reference(gate.signature(_frame()), result="detections")
+
+    noisy = _frame().astype(np.int16) + np.random.default_rng(0).integers(-3, 4, size=(120, 160, 3))
+    assert gate.is_unchanged(gate.signature(_frame()))
+    assert gate.is_unchanged(gate.signature(noisy.clip(0, 255).astype(np.uint8)))
+    assert gate.reference_result == "detections"
+    assert gate.reuses == 2
+
+
+def test_changed_region_runs_the_model():
+    gate = ChangeGate()
+    gate.set_reference(gate.signature(_frame()))
+    changed = _frame()
+    changed[:30, :40] = 255
+    assert not gate.is_unchanged(gate.signature(changed))
+    assert gate.last_changed_fraction > gate.min_changed_fraction
+
+
+def test_max_reuse_forces_a_rerun():
+    gate = ChangeGate(max_reuse=2)
+    signature = gate.signature(_frame())
+    gate.set_reference(signature)
+    assert [gate.is_unchanged(signature) for _ in range(3)] == [True, True, False]
+
+    gate.set_reference(signature)
+    assert gate.is_unchanged(signature)
+
+
+def test_stream_gates_are_shared_until_settings_change():
+    gate = get_change_gate(("session", "camera.jpg"), {})
+    assert get_change_gate(("session", "camera.jpg"), {}) is gate
+    assert get_change_gate(("session", "other.jpg"), {}) is not gate
+
+    retuned = get_change_gate(("session", "camera.jpg"), {"pixel_threshold": 30})
+    assert retuned is not gate
+    assert retuned.pixel_threshold == 30
+
+
+def test_exclusive_serializes_check_and_update():
+    gate = ChangeGate()
+    order = []
+
+    async def analyze(name, delay):
+        async with gate.exclusive():
+            order.append(f"{name} check")
+            await asyncio.sleep(delay)
+            order.append(f"{name} update")
+
+    async def run():
+        await asyncio.gather(analyze("first", 0.02), analyze("second", 0))
+
+    asyncio.run(run())
+    assert order == ["first check", "first update", "second check", "second update"]
+
+
+def test_exclusive_is_released_on_error_and_across_event_loops():
+    gate = ChangeGate()
+
+    async def fail():
+        async with gate.exclusive():
+            raise RuntimeError("inference failed")
+
+    try:
+        asyncio.run(fail())
+    except RuntimeError:
+        pass
+
+    held = threading.Event()
+    release = threading.Event()
+
+    async def hold():
+        async with gate.exclusive():
+            held.set()
+            await asyncio.to_thread(release.wait)
+
+    holder = threading.Thread(target=asyncio.run, args=(hold(),))
+    holder.start()
+    held.wait(5)
+
+    async def wait_for_gate():
+        waiter = asyncio.ensure_future(gate.exclusive().__aenter__())
+        await asyncio.sleep(0.02)
+        assert not waiter.done()
+        release.set()
+        assert await asyncio.wait_for(waiter, 5) is gate
+
+    asyncio.run(wait_for_gate())
+    holder.join(5)
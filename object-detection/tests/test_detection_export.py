@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+from io import BytesIO
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.backends import DetectionResult
+from object_detection.detection_export import (
+    artifact_mime_type,
+    columnar_boxes,
+    encode_detections,
+    validate_output_format,
+)
+
+CLASS_NAMES = {0: "person", 1: "bicycle", 2: "car"}
+
+
+def _records():
+    first = DetectionResult(
+        np.array([[1.234, 2, 30, 40], [5, 6, 70, 80]], np.float32),
+        np.array([0.91234, 0.5], np.float32),
+        np.array([0, 2], np.int64),
+        (100, 100),
+    )
+    second = DetectionResult(
+        np.array([[10, 20, 30, 40]], np.float32), np.array([0.8], np.float32), np.array([0], np.int64), (100, 100)
+    )
+    return [("a.jpg", 0, first), ("b.jpg", 3, second), ("missing.jpg", 1, None)]
+
+
+def test_jsonl_round_trip_keeps_requested_classes():
+    encoded, count = encode_detections("boxes.jsonl", _records(), CLASS_NAMES, [0])
+    rows = [json.loads(line) for line in encoded.decode("utf-8").splitlines()]
+
+    assert count == 2
+    assert rows == [
+        {"image_filename": "a.jpg", "image_version": 0, "class": "person", "class_id": 0,
+         "x1": 1.23, "y1": 2.0, "x2": 30.0, "y2": 40.0, "confidence": 0.9123},
+        {"image_filename": "b.jpg", "image_version": 3, "class": "person", "class_id": 0,
+         "x1": 10.0, "y1": 20.0, "x2": 30.0, "y2": 40.0, "confidence": 0.8},
+    ]
+
+
+def test_npz_round_trip_keeps_full_precision():
+    records = _records()
+    encoded, count = encode_detections("boxes.npz", records, CLASS_NAMES, [0, 2])
+    with np.load(BytesIO(encoded)) as data:
+        assert count == 3
+        assert data["xyxy"].tolist() == np.concatenate([records[0][2].xyxy, records[1][2].xyxy]).tolist()
+        assert data["confidence"].dtype == np.float32
+        assert data["class_id"].tolist() == [0, 2, 0]
+        assert data["image_index"].tolist() == [0, 0, 1]
+        assert data["image_filenames"].tolist() == ["a.jpg", "b.jpg", "missing.jpg"]
+        assert data["image_versions"].tolist() == [0, 3, 1]
+        assert data["class_names"].tolist() == ["person", "bicycle", "car"]
+
+
+def test_empty_selection_encodes_no_boxes():
+    encoded, count = encode_detections("boxes.jsonl", _records(), CLASS_NAMES, [1])
+    assert (encoded, count) == (b"", 0)
+
+    encoded, count = encode_detections("boxes.npz", _records(), CLASS_NAMES, [1])
+    with np.load(BytesIO(encoded)) as data:
+        assert count == 0
+        assert data["xyxy"].shape == (0, 4)
+
+
+def test_columnar_boxes_are_parallel_rounded_arrays():
+    result = _records()[0][2]
+    columns = columnar_boxes(result, np.array([True, False]))
+    assert columns == {"x1": [1.2], "y1": [2.0], "x2": [30.0], "y2": [40.0], "confidence": [0.912]}
+
+
+def test_unknown_formats_are_rejected():
+    assert artifact_mime_type("boxes.JSONL") == "application/x-ndjson"
+    with pytest.raises(ValueError):
+        artifact_mime_type("boxes.csv")
+    validate_output_format("columnar")
+    with pytest.raises(ValueError):
+        validate_output_format("table")
@@ -0,0 +1,133 @@
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.executor import (
+    InferenceExecutor,
+    InferenceQueueFullError,
+    get_inference_executor,
+    shutdown_inference_executor,
+)
+
+
+def _blocking_job(started: threading.Event, release: threading.Event, value):
+    started.set()
+    release.wait(5)
+    return value
+
+
+def test_queue_limit_rejects_and_counts_jobs():
+    """Jobs beyond max_queue are rejected, and every counter settles once work finishes."""
+    executor = InferenceExecutor(workers=1, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    async def run():
+        running = asyncio.ensure_future(executor.run(_blocking_job, started, release, "first"))
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.ensure_future(executor.run(lambda: "second"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(InferenceQueueFullError):
+            await executor.run(lambda: "rejected")
+        busy = executor.get_stats()
+
+        release.set()
+        return busy, await running, await queued
+
+    try:
+        busy, first, second = asyncio.run(run())
+    finally:
+        release.set()
+        executor.shutdown()
+
+    assert (first, second) == ("first", "second")
+    assert (busy["queued"], busy["running"], busy["rejected"]) == (1, 1, 1)
+    stats = executor.get_stats()
+    assert (stats["queued"], stats["running"]) == (0, 0)
+    assert (stats["submitted"], stats["completed"], stats["failed"]) == (2, 2, 0)
+
+
+def test_cancelled_queued_job_releases_its_slot():
+    """A caller cancelled while its job is still queued gives the queue slot back."""
+    executor = InferenceExecutor(workers=1, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    async def run():
+        running = asyncio.ensure_future(executor.run(_blocking_job, started, release, None))
+        await asyncio.to_thread(started.wait, 5)
+        queued = asyncio.ensure_future(executor.run(ran.append, "cancelled"))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+
+        # The slot is free again, so this job is accepted rather than rejected
+        replacement = asyncio.ensure_future(executor.run(ran.append, "replacement"))
+        await asyncio.sleep(0)
+        release.set()
+        await running
+        await replacement
+
+    try:
+        asyncio.run(run())
+    finally:
+        release.set()
+        executor.shutdown()
+
+    assert ran == ["replacement"]
+    assert executor.get_stats()["queued"] == 0
+
+
+def test_failed_job_raises_and_is_counted():
+    """Exceptions reach the caller and count as failed jobs."""
+    executor = InferenceExecutor(workers=1)
+
+    def explode():
+        raise RuntimeError("predict failed")
+
+    try:
+        with pytest.raises(RuntimeError, match="predict failed"):
+            asyncio.run(executor.run(explode))
+    finally:
+        executor.shutdown()
+
+    stats = executor.get_stats()
+    assert (stats["failed"], stats["completed"], stats["running"]) == (1, 0, 0)
+
+
+def test_stage_timings_are_accumulated():
+    """Queue wait and inference time of each call are added to the caller's timings."""
+    executor = InferenceExecutor(workers=1)
+    timings = {}
+    try:
+        asyncio.run(executor.run(lambda: None, stage_timings=timings))
+        asyncio.run(executor.run(lambda: None, stage_timings=timings))
+    finally:
+        executor.shutdown()
+    assert set(timings) == {"queue_wait", "inference"}
+    assert all(value >= 0.0 for value in timings.values())
+
+
+def test_executors_are_shared_per_settings():
+    """Identical settings share an executor; different settings get their own."""
+    try:
+        default = get_inference_executor({})
+        assert get_inference_executor(None) is default
+        assert get_inference_executor({"workers": 1}) is default
+
+        wide = get_inference_executor({"workers": 2, "max_queue": 8})
+        assert wide is not default
+        assert (wide.workers, wide.max_queue) == (2, 8)
+        # Requesting the first settings again does not replace the second executor
+        assert get_inference_executor({}) is default
+        assert get_inference_executor({"workers": 2, "max_queue": 8}) is wide
+    finally:
+        shutdown_inference_executor()
+    assert get_inference_executor({}) is not default
+    shutdown_inference_executor()
@@ -0,0 +1,207 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeLoader:
+    """Loader that records every load and can be made slow or failing."""
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.loads = []
+        self.models = {}
+
+    def __call__(self, model_name, **load_options):
+        self.loads.append(model_name)
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError(f"cannot load {model_name}")
+        model = FakeModel(model_name)
+        self.models.setdefault(model_name, []).append(model)
+        return model
+
+
+def _resident_keys(registry):
+    return [entry["key"] for entry in registry.get_stats()["resident_models"]]
+
+
+def test_concurrent_first_requests_share_one_load():
+    loader = FakeLoader(delay=0.1)
+    registry = ModelRegistry(loader)
+
+    async def run():
+        return await asyncio.gather(*[registry.get("yolo.pt") for _ in range(5)])
+
+    models = asyncio.run(run())
+    assert loader.loads == ["yolo.pt"]
+    assert all(model is models[0] for model in models)
+    stats = registry.get_stats()
+    assert (stats["misses"], stats["hits"]) == (1, 4)
+
+
+def test_loads_from_different_event_loops_share_one_load():
+    loader = FakeLoader(delay=0.1)
+    registry = ModelRegistry(loader)
+    models = []
+
+    def load_on_private_loop():
+        models.append(asyncio.run(registry.get("yolo.pt")))
+
+    threads = [threading.Thread(target=load_on_private_loop) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.loads == ["yolo.pt"]
+    assert len(models) == 3 and all(model is models[0] for model in models)
+
+
+def test_failed_load_is_retried_by_the_next_caller():
+    loader = FakeLoader(failures=1)
+    registry = ModelRegistry(loader)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await registry.get("yolo.pt")
+        return await registry.get("yolo.pt")
+
+    assert asyncio.run(run()).name == "yolo.pt"
+    assert loader.loads == ["yolo.pt", "yolo.pt"]
+
+
+def test_least_recently_used_model_is_evicted_and_closed():
+    loader = FakeLoader()
+    registry = ModelRegistry(loader, max_resident_models=2)
+    evicted = []
+    registry.add_eviction_listener(evicted.append)
+
+    async def run():
+        await registry.get("a.pt")
+        await registry.get("b.pt")
+        await registry.get("a.pt")  # b is now least recently used
+        await registry.get("c.pt")
+
+    asyncio.run(run())
+    assert evicted == ["b.pt"]
+    assert _resident_keys(registry) == ["a.pt", "c.pt"]
+    assert loader.models["b.pt"][0].closed.wait(2)
+    assert not loader.models["a.pt"][0].closed.is_set()
+
+
+def test_variants_are_separate_entries():
+    registry = ModelRegistry(FakeLoader())
+
+    async def run():
+        await registry.get("a.pt")
+        await registry.get("a.pt", variant="onnx")
+
+    asyncio.run(run())
+    assert _resident_keys(registry) == ["a.pt", "a.pt@onnx"]
+
+
+def test_models_idle_past_the_ttl_are_unloaded():
+    registry = ModelRegistry(FakeLoader(), max_resident_models=4, idle_ttl_seconds=60)
+
+    async def run():
+        await registry.get("old.pt")
+        await registry.get("recent.pt")
+        return registry.evict_idle(now=time.monotonic() + 30), registry.evict_idle(now=time.monotonic() + 120)
+
+    assert asyncio.run(run()) == ([], ["old.pt", "recent.pt"])
+    assert _resident_keys(registry) == []
+    assert registry.get_stats()["idle_unloads"] == 2
+
+
+def test_no_ttl_keeps_idle_models():
+    registry = ModelRegistry(FakeLoader())
+    asyncio.run(registry.get("a.pt"))
+    assert registry.evict_idle(now=time.monotonic() + 3600) == []
+    assert _resident_keys(registry) == ["a.pt"]
+
+
+def test_model_in_use_is_not_evicted_until_released():
+    loader = FakeLoader()
+    registry = ModelRegistry(loader, max_resident_models=1)
+
+    async def run():
+        async with registry.acquire("a.pt") as model:
+            await registry.get("b.pt")
+            # Over the limit, but the only other model is still in use
+            assert _resident_keys(registry) == ["a.pt", "b.pt"]
+            assert not model.closed.is_set()
+        # Released: the deferred LRU eviction happens now
+        return _resident_keys(registry)
+
+    assert asyncio.run(run()) == ["b.pt"]
+    assert loader.models["a.pt"][0].closed.wait(2)
+
+
+def test_model_evicted_while_in_use_is_closed_after_release():
+    loader = FakeLoader()
+    registry = ModelRegistry(loader)
+
+    async def run():
+        async with registry.acquire("a.pt") as model:
+            assert registry.evict("a.pt")
+            await asyncio.sleep(0.05)
+            assert not model.closed.is_set()
+        return model
+
+    model = asyncio.run(run())
+    assert model.closed.wait(2)
+    assert _resident_keys(registry) == []
+
+
+def test_idle_models_are_unloaded_but_held_ones_are_kept():
+    loader = FakeLoader()
+    registry = ModelRegistry(loader, max_resident_models=4, idle_ttl_seconds=60)
+
+    async def run():
+        await registry.get("idle.pt")
+        async with registry.acquire("busy.pt"):
+            later = time.monotonic() + 120
+            return registry.evict_idle(now=later)
+
+    assert asyncio.run(run()) == ["idle.pt"]
+    assert _resident_keys(registry) == ["busy.pt"]
+    assert registry.get_stats()["idle_unloads"] == 1
+
+
+def test_idle_time_counts_from_release():
+    registry = ModelRegistry(FakeLoader(), idle_ttl_seconds=60)
+
+    async def run():
+        async with registry.acquire("a.pt"):
+            pass
+        # Idle for less than the TTL since release, so it stays
+        return registry.evict_idle(now=time.monotonic() + 30)
+
+    assert asyncio.run(run()) == []
+    assert _resident_keys(registry) == ["a.pt"]
+
+
+def test_configure_replaces_every_limit():
+    registry = ModelRegistry(FakeLoader(), max_resident_models=3, max_memory_mb=512, idle_ttl_seconds=60)
+    registry.configure(max_resident_models=1)
+    assert (registry.max_resident_models, registry.max_memory_mb, registry.idle_ttl_seconds) == (1, None, None)
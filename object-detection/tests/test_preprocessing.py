@@ -0,0 +1,36 @@
+import asyncio
+import os
+import sys
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.preprocessing import _get_decode_executor, decode_image_async
+
+
+def _png(width, height):
+    buffer = BytesIO()
+    Image.fromarray(np.zeros((height, width, 3), np.uint8)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_decode_pools_are_kept_per_worker_count():
+    default = _get_decode_executor()
+    two = _get_decode_executor(2)
+
+    assert _get_decode_executor(4) is default
+    assert two is not default
+    # Alternating worker counts reuse both pools instead of rebuilding them
+    assert _get_decode_executor(None) is default
+    assert _get_decode_executor(2) is two
+
+
+def test_decode_shrinks_to_the_target_size():
+    prepared = asyncio.run(decode_image_async(_png(1280, 720), target_size=640, workers=2))
+    assert prepared.array.shape == (360, 640, 3)
+    assert prepared.original_size == (1280, 720)
+    assert prepared.was_reduced
@@ -0,0 +1,136 @@
+import itertools
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.model_registry import _estimate_model_bytes
+from object_detection.process_pool import (
+    DetectionProcessPool,
+    ProcessPoolFailedError,
+    WorkerCrashedError,
+    _Worker,
+    _pack_images,
+)
+
+
+def test_pack_images_lays_out_arrays_and_pil_images_in_one_block():
+    rng = np.random.default_rng(0)
+    array = rng.integers(0, 256, size=(30, 40, 3), dtype=np.uint8)
+    pil_pixels = rng.integers(0, 256, size=(20, 10, 3), dtype=np.uint8)
+    grayscale = Image.fromarray(rng.integers(0, 256, size=(5, 6), dtype=np.uint8), mode="L")
+
+    block, layout = _pack_images([array, Image.fromarray(pil_pixels), grayscale])
+    try:
+        assert [(offset, shape) for offset, shape, _ in layout] == [
+            (0, (30, 40, 3)),
+            (3600, (20, 10, 3)),
+            (4200, (5, 6, 3)),
+        ]
+        # Read back the way a worker process does
+        unpacked = [
+            np.ndarray(shape, np.dtype(dtype), buffer=block.buf, offset=offset).copy()
+            for offset, shape, dtype in layout
+        ]
+        assert np.array_equal(unpacked[0], array)
+        assert np.array_equal(unpacked[1], pil_pixels)
+        assert np.array_equal(unpacked[2], np.asarray(grayscale.convert("RGB")))
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_pack_non_contiguous_array():
+    array = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)[:, ::2]
+    block, layout = _pack_images([array])
+    try:
+        offset, shape, dtype = layout[0]
+        assert np.array_equal(np.ndarray(shape, np.dtype(dtype), buffer=block.buf, offset=offset), array)
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _pool_without_processes(workers=2, max_restarts=1):
+    """A pool whose workers are never spawned, for driving crash handling directly."""
+    pool = DetectionProcessPool.__new__(DetectionProcessPool)
+    pool.model_name = "broken.pt"
+    pool.max_restarts = max_restarts
+    pool.ready_timeout = 5.0
+    pool.threads_per_worker = 1
+    pool._job_ids = itertools.count()
+    pool._lock = threading.Lock()
+    pool._ready_changed = threading.Condition(pool._lock)
+    pool._closed = False
+    pool._failed = False
+    pool._workers = [_Worker(worker_id) for worker_id in range(workers)]
+    pool.started = []
+    pool._start = pool.started.append
+    return pool
+
+
+def _exited_process():
+    return SimpleNamespace(pid=123, exitcode=1, join=lambda timeout=None: None)
+
+
+def test_crashing_workers_are_given_up_on_and_fail_the_pool(monkeypatch):
+    monkeypatch.setattr("object_detection.process_pool.RESTART_BACKOFF_SECONDS", 0.0)
+    pool = _pool_without_processes(workers=2, max_restarts=1)
+    first, second = pool._workers
+    pending = Future()
+    first.pending[7] = pending
+
+    pool._handle_exit(first, _exited_process())
+    # The restart waits on a timer instead of blocking the reader thread
+    first.restart_timer.join(timeout=5)
+    assert pool.started == [first]
+    assert first.restarts == 1
+    assert isinstance(pending.exception(), WorkerCrashedError)
+
+    pool._handle_exit(first, _exited_process())
+    assert first.gave_up and first.restart_timer is not None
+    assert pool.started == [first]
+    assert not pool.failed
+
+    pool._handle_exit(second, _exited_process())
+    second.restart_timer.join(timeout=5)
+    pool._handle_exit(second, _exited_process())
+    assert pool.failed
+    assert pool.get_stats()["failed"]
+    with pytest.raises(ProcessPoolFailedError):
+        pool._submit("block", [], 0.25, None)
+
+
+def test_closing_cancels_a_pending_restart(monkeypatch):
+    monkeypatch.setattr("object_detection.process_pool.RESTART_BACKOFF_SECONDS", 30.0)
+    pool = _pool_without_processes(workers=1, max_restarts=3)
+    worker = pool._workers[0]
+    pool._handle_exit(worker, _exited_process())
+
+    pool.close()
+    worker.restart_timer.join(timeout=5)
+    assert not worker.restart_timer.is_alive()
+    assert pool.started == []
+
+
+def test_pool_memory_counts_every_worker_process():
+    pool = _pool_without_processes(workers=3)
+    this_process = os.getpid()
+    pool._workers[0].pid, pool._workers[0].ready = this_process, True
+    pool._workers[1].pid, pool._workers[1].ready = this_process, True
+
+    single = pool.resident_bytes() // 3
+    assert single > 0
+    # The worker still loading is counted like a ready one
+    assert _estimate_model_bytes(pool) == pytest.approx(3 * single, rel=0.1)
+
+    pool._workers[0].ready = pool._workers[1].ready = False
+    assert pool.resident_bytes() == 0
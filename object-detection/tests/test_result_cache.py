@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.backends import DetectionResult
+from object_detection.result_cache import DetectionCache, image_digest
+
+
+def _result():
+    return DetectionResult(
+        np.array([[1.5, 2, 30, 40]], np.float32), np.array([0.75], np.float32), np.array([3], np.int64), (480, 640)
+    )
+
+
+def test_keys_separate_images_models_and_parameters():
+    digest = image_digest(b"image bytes")
+    key = DetectionCache.make_key(digest, "yolo.pt", 0.25, 640)
+
+    assert key.startswith(digest)
+    assert DetectionCache.make_key(digest, "yolo.pt", 0.25, 640) == key
+    assert DetectionCache.make_key(image_digest(b"other bytes"), "yolo.pt", 0.25, 640) != key
+    assert DetectionCache.make_key(digest, "yolo.pt@onnx", 0.25, 640) != key
+    assert DetectionCache.make_key(digest, "yolo.pt", 0.3, 640) != key
+    assert DetectionCache.make_key(digest, "yolo.pt", 0.25, 1280) != key
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = DetectionCache(max_entries=2)
+    asyncio.run(cache.put("a", _result()))
+    asyncio.run(cache.put("b", _result()))
+    assert asyncio.run(cache.get("a")) is not None
+    asyncio.run(cache.put("c", _result()))
+
+    assert asyncio.run(cache.get("b")) is None
+    assert asyncio.run(cache.get("a")) is not None and asyncio.run(cache.get("c")) is not None
+    stats = cache.get_stats()
+    assert (stats["entries"], stats["evictions"], stats["misses"]) == (2, 1, 1)
+
+
+def test_persisted_entries_survive_a_restart(tmp_path):
+    asyncio.run(DetectionCache(persist_dir=str(tmp_path)).put("key", _result()))
+
+    restarted = DetectionCache(persist_dir=str(tmp_path))
+    loaded = asyncio.run(restarted.get("key"))
+    assert loaded.xyxy.tolist() == [[1.5, 2, 30, 40]]
+    assert loaded.conf.tolist() == [0.75]
+    assert loaded.cls.tolist() == [3]
+    assert loaded.orig_shape == (480, 640)
+    assert restarted.get_stats()["disk_hits"] == 1
+    assert not [name for name in os.listdir(tmp_path) if ".tmp" in name]
+
+
+def test_unreadable_persisted_entry_is_a_miss(tmp_path):
+    (tmp_path / "broken.npz").write_bytes(b"not a numpy archive")
+    cache = DetectionCache(persist_dir=str(tmp_path))
+    assert asyncio.run(cache.get("broken")) is None
+    assert cache.get_stats()["misses"] == 1
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.backends import LETTERBOX_FILL, DetectionResult
+from object_detection.roi import RegionOfInterest
+
+
+def _result(boxes, shape):
+    boxes = np.asarray(boxes, np.float32).reshape(-1, 4)
+    return DetectionResult(boxes, np.full(len(boxes), 0.5, np.float32), np.zeros(len(boxes), np.int64), shape)
+
+
+def test_box_crop_restores_boxes_to_full_image_coordinates():
+    region = RegionOfInterest.from_config({"box": [20, 10, 80, 50]})
+    image = np.zeros((100, 200, 3), np.uint8)
+    crop = region.crop(image, (200, 100))
+
+    assert crop.array.shape == (40, 60, 3)
+    assert crop.offset == (20, 10)
+    assert crop.mask is None
+
+    restored = crop.restore(_result([[0, 0, 10, 10]], (40, 60)))
+    assert restored.xyxy.tolist() == [[20, 10, 30, 20]]
+    assert restored.orig_shape == (100, 200)
+
+
+def test_region_scales_to_a_reduced_decode():
+    # Pixel coordinates of a 400x200 original applied to a half-size decode
+    region = RegionOfInterest.from_config({"box": [100, 50, 300, 150]})
+    crop = region.crop(np.zeros((100, 200, 3), np.uint8), (400, 200))
+    assert crop.offset == (50, 25)
+    assert crop.array.shape == (50, 100, 3)
+
+
+def test_normalized_region_uses_fractions_of_the_decoded_image():
+    region = RegionOfInterest.from_config({"box": [0.5, 0.0, 1.0, 0.5], "normalized": True})
+    crop = region.crop(np.zeros((100, 200, 3), np.uint8), (4000, 2000))
+    assert crop.offset == (100, 0)
+    assert crop.array.shape == (50, 100, 3)
+
+
+def test_polygon_masks_outside_pixels_and_drops_outside_detections():
+    # Triangle covering the lower-left half of a 100x100 square
+    region = RegionOfInterest.from_config({"polygon": [[0, 0], [0, 100], [100, 100]]})
+    crop = region.crop(np.full((100, 100, 3), 255, np.uint8), (100, 100))
+
+    assert crop.array[90, 5].tolist() == [255, 255, 255]
+    assert crop.array[5, 90].tolist() == [LETTERBOX_FILL] * 3
+
+    restored = crop.restore(_result([[0, 80, 20, 100], [80, 0, 100, 20]], (100, 100)))
+    assert restored.xyxy.tolist() == [[0, 80, 20, 100]]
+    assert len(restored.conf) == len(restored.cls) == 1
+
+
+def test_region_outside_the_image_is_rejected():
+    region = RegionOfInterest.from_config({"box": [500, 500, 600, 600]})
+    with pytest.raises(ValueError, match="does not overlap"):
+        region.crop(np.zeros((100, 100, 3), np.uint8), (100, 100))
+
+
+@pytest.mark.parametrize(
+    "roi_config",
+    [{"box": [10, 10, 5, 20]}, {"box": [1, 2, 3]}, {"polygon": [[0, 0], [1, 1]]}, {"circle": [0, 0, 1]}],
+)
+def test_malformed_regions_are_rejected(roi_config):
+    with pytest.raises(ValueError):
+        RegionOfInterest.from_config(roi_config)
+
+
+def test_no_region_configured():
+    assert RegionOfInterest.from_config(None) is None
+    assert RegionOfInterest.from_config({}) is None
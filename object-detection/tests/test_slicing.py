@@ -0,0 +1,91 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from object_detection.backends import DetectionResult, class_aware_nms, nms
+from object_detection.slicing import merge_detections, sliced_predict, tile_windows
+
+
+def _result(boxes, scores, classes, shape=(100, 100)):
+    return DetectionResult(
+        np.asarray(boxes, np.float32).reshape(-1, 4),
+        np.asarray(scores, np.float32),
+        np.asarray(classes, np.int64),
+        shape,
+    )
+
+
+def test_tile_windows_cover_the_image_with_edge_aligned_last_tiles():
+    windows = tile_windows(1000, 700, 640, 0.2)
+    assert windows == [(0, 0, 640, 640), (360, 0, 1000, 640), (0, 60, 640, 700), (360, 60, 1000, 700)]
+
+    covered = np.zeros((700, 1000), dtype=bool)
+    for left, top, right, bottom in windows:
+        covered[top:bottom, left:right] = True
+    assert covered.all()
+
+
+def test_image_smaller_than_a_tile_is_one_window():
+    assert tile_windows(300, 200, 640, 0.2) == [(0, 0, 300, 200)]
+
+
+@pytest.mark.parametrize("tile_size, overlap", [(16, 0.2), (640, 1.0), (640, -0.1)])
+def test_tile_windows_reject_bad_settings(tile_size, overlap):
+    with pytest.raises(ValueError):
+        tile_windows(1000, 1000, tile_size, overlap)
+
+
+def test_nms_suppresses_overlaps_and_keeps_highest_score_first():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [50, 50, 60, 60]], np.float32)
+    scores = np.array([0.6, 0.9, 0.5], np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+
+
+def test_class_aware_nms_keeps_overlapping_boxes_of_different_classes():
+    boxes = np.array([[0, 0, 10, 10], [0, 0, 10, 10], [0, 0, 10, 10]], np.float32)
+    scores = np.array([0.9, 0.8, 0.7], np.float32)
+    classes = np.array([0, 1, 0], np.int64)
+    assert class_aware_nms(boxes, scores, classes, 0.5).tolist() == [0, 1]
+    assert class_aware_nms(boxes, scores, classes, 0.5, max_detections=1).tolist() == [0]
+
+
+def test_merge_shifts_tile_boxes_and_merges_duplicates():
+    # The same object seen by two overlapping tiles, plus one object only in the second tile
+    first = _result([[90, 10, 110, 30]], [0.8], [2])
+    second = _result([[10, 10, 30, 30], [50, 50, 60, 60]], [0.9, 0.7], [2, 2])
+    merged = merge_detections([first, second], [(0, 0), (80, 0)], (200, 300))
+
+    assert merged.orig_shape == (200, 300)
+    assert merged.xyxy.tolist() == [[90, 10, 110, 30], [130, 50, 140, 60]]
+    assert merged.conf.tolist() == pytest.approx([0.9, 0.7])
+
+
+def test_merge_of_empty_tiles_is_empty():
+    empty = _result([], [], [])
+    merged = merge_detections([empty, empty], [(0, 0), (10, 0)], (50, 60))
+    assert len(merged) == 0
+    assert merged.xyxy.shape == (0, 4)
+    assert merged.orig_shape == (50, 60)
+
+
+def test_sliced_predict_runs_tiles_and_full_image_in_one_batch():
+    calls = []
+
+    class FakeModel:
+        def predict(self, images, conf, classes=None):
+            calls.append([image.size for image in images])
+            # One box in the top-left corner of every input
+            return [_result([[0, 0, 20, 20]], [0.5], [0], (image.size[1], image.size[0])) for image in images]
+
+    image = np.zeros((100, 150, 3), np.uint8)
+    merged = sliced_predict(FakeModel(), image, conf=0.25, tile_size=100, overlap=0.0)
+
+    assert calls == [[(100, 100), (100, 100), (150, 100)]]
+    # The full-image box duplicates the first tile's box; the second tile's is shifted
+    assert sorted(merged.xyxy.tolist()) == [[0, 0, 20, 20], [50, 0, 70, 20]]
+    assert merged.orig_shape == (100, 150)
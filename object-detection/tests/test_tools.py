@@ -0,0 +1,63 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+pytest.importorskip("ultralytics")
+pytest.importorskip("google.adk")
+
+from object_detection import tools
+from object_detection.tools import _result_cache_key
+
+
+def test_result_cache_key_covers_decode_resolution():
+    config = {"model_name": "yolo11n.pt"}
+    key = _result_cache_key(config, b"image", 0.25)
+
+    assert _result_cache_key(dict(config), b"image", 0.25) == key
+    assert _result_cache_key({**config, "preprocessing": {"shrink_on_load": False}}, b"image", 0.25) != key
+    assert _result_cache_key({**config, "image_size": 1280}, b"image", 0.25) != key
+    # Region-of-interest crops always decode at full resolution
+    roi_config = {**config, "region_of_interest": {"box": [0, 0, 10, 10]}}
+    assert _result_cache_key(roi_config, b"image", 0.25) != key
+    # A full-resolution annotation decodes the model input at full resolution too
+    assert _result_cache_key(config, b"image", 0.25, full_resolution=True) != key
+
+
+def test_result_caches_are_kept_per_settings(tmp_path):
+    small = tools._get_result_cache({"result_cache": {"enabled": True, "max_entries": 2}})
+    persisted = tools._get_result_cache(
+        {"result_cache": {"enabled": True, "max_entries": 2, "persist_dir": str(tmp_path)}}
+    )
+    assert tools._get_result_cache({"result_cache": {"enabled": True, "max_entries": 2}}) is small
+    assert persisted is not small
+    # Creating the second cache did not change the first one's settings
+    assert (small.max_entries, small.persist_dir) == (2, None)
+    assert persisted.persist_dir == str(tmp_path)
+    assert tools._get_result_cache({"result_cache": {"enabled": False}}) is None
+
+
+def test_progress_is_sent_as_a_status_signal(monkeypatch):
+    monkeypatch.setattr(tools, "AgentProgressUpdateData", lambda status_text: {"status_text": status_text})
+    signals = []
+    host_component = SimpleNamespace(publish_data_signal_from_thread=lambda **kwargs: signals.append(kwargs))
+    context = SimpleNamespace(
+        _invocation_context=SimpleNamespace(agent=SimpleNamespace(host_component=host_component)),
+        state={"a2a_context": {"logical_task_id": "task"}},
+    )
+
+    tools._report_progress(
+        context, "[test]", {"images_done": 8, "images_total": 20, "aggregate_counts": {"car": 3}}
+    )
+    assert len(signals) == 1
+    assert signals[0]["a2a_context"] == {"logical_task_id": "task"}
+    assert signals[0]["signal_data"]["status_text"].startswith("Analyzed 8/20 images")
+
+    # Without a task context there is nobody to send the update to
+    context.state = {}
+    tools._report_progress(context, "[test]", {"images_done": 9, "images_total": 20, "aggregate_counts": {}})
+    assert len(signals) == 1